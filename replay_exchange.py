@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+import cProfile
+import pstats
+import time
+from source.exchange.Journal import replay
+
+async def run_replay(journal, snapshot=None) -> None:
+    start = time.time()
+    exchange, replayed = await replay(journal, snapshot)
+    elapsed = time.time() - start
+    print(f'replayed {replayed} requests in {elapsed:.3f}s ({replayed / elapsed if elapsed else 0:.0f}/s)')
+    print(f'exchange time: {exchange.datetime}, books: {list(exchange.books)}, agents: {len(exchange.agents)}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rebuild an exchange from a snapshot and the journal written after it.')
+    parser.add_argument('journal', help='the journal file written by run_exchange')
+    parser.add_argument('--snapshot', default=None, help='a snapshot taken while journaling; only later journal entries are replayed')
+    parser.add_argument('--profile', action='store_true', help='profile the replay and print the slowest calls')
+    args = parser.parse_args()
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        asyncio.run(run_replay(args.journal, args.snapshot))
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+    else:
+        asyncio.run(run_replay(args.journal, args.snapshot))
@@ -2,6 +2,7 @@ from random import randint
 import traceback
 from source.Messaging import Requester
 from source.exchange.ExchangeRequests import ExchangeRequests as Requests
+from source.exchange.MarketDataHub import MarketDataHub
 from source.agents.Agents import NaiveMarketMaker, RandomMarketTaker, LowBidder
 from rich import print
 import asyncio
@@ -9,18 +10,20 @@ asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 tickers = ['XYZ']
 
-async def run_agent(exchange_channel = 5570) -> None:
+async def run_agent(exchange_channel = 5570, market_data_channel = 5590) -> None:
     try:
         agent = None
         picker = randint(0,3)
         requester = Requester(channel=exchange_channel)
         await requester.connect()
+        # the agents read the books they trade from a local replica of the market-data feed rather than asking the exchange each time
+        market_data = MarketDataHub(market_data_channel, tickers) if market_data_channel else None
         if picker == 0:
-            agent =  NaiveMarketMaker(name='market_maker', tickers=tickers, aum=1_000, spread_pct=0.005, qty_per_order=4, requester=Requests(requester))
+            agent =  NaiveMarketMaker(name='market_maker', tickers=tickers, aum=1_000, spread_pct=0.005, qty_per_order=4, requester=Requests(requester), market_data=market_data)
         elif picker == 1:
-            agent = RandomMarketTaker(name='market_taker', tickers=tickers, aum=1_000, prob_buy=.2, prob_sell=.2, qty_per_order=1, requester=Requests(requester))
+            agent = RandomMarketTaker(name='market_taker', tickers=tickers, aum=1_000, prob_buy=.2, prob_sell=.2, qty_per_order=1, requester=Requests(requester), market_data=market_data)
         else:
-            agent = LowBidder(name='low_bidder', tickers=tickers, aum=1_000, requester=Requests(requester))
+            agent = LowBidder(name='low_bidder', tickers=tickers, aum=1_000, requester=Requests(requester), market_data=market_data)
         registered = await agent.register()
         if registered is None:
             raise Exception("Agent not registered")
@@ -4,7 +4,6 @@ from source.Messaging import Responder
 import asyncio
 from rich import print
 asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-from source.utils._utils import dumps
 
 
 async def run_crypto(crypto_channel = 5571) -> None:
@@ -16,9 +15,9 @@ async def run_crypto(crypto_channel = 5571) -> None:
         blockchain = Blockchain()
 
         async def callback(msg):
-            if msg['topic'] == 'get_transactions': return dumps(await blockchain.get_transactions())
-            elif msg['topic'] == 'add_transaction': return dumps(await blockchain.add_transaction(msg['ticker'], msg['fee'], msg['amount'], msg['sender'], msg['recipient'], msg['dt']))
-            else: return f'unknown topic {msg["topic"]}'
+            if msg['topic'] == 'get_transactions': return await blockchain.get_transactions()
+            elif msg['topic'] == 'add_transaction': return await blockchain.add_transaction(msg['ticker'], msg['fee'], msg['amount'], msg['sender'], msg['recipient'], msg['dt'])
+            else: return {'error': f'unknown topic {msg["topic"]}'}
 
         while True:
             msg = await responder.respond(callback)
@@ -1,100 +1,63 @@
 from datetime import datetime
 import traceback
-from source.Messaging import Responder, Requester, Subscriber
+from source.Messaging import RouterResponder, Requester, Subscriber, Publisher
 from source.exchange.Exchange import Exchange
+from source.exchange.TradeStore import TradeStore
+from source.exchange.Journal import Journal, JOURNALED_TOPICS
+from source.exchange.MarketDataFeed import MarketDataFeed
+from source.exchange.TopicDispatcher import TopicDispatcher
 from source.company.PublicCompany import PublicCompany
-from source.utils._utils import dumps, string_to_time
+from source.utils._utils import string_to_time
 from rich import print
 from rich.console import Console
-from rich.table import Table
+from rich.live import Live
+from contextlib import nullcontext
 import time
 import asyncio
 asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-async def run_exchange(exchange_channel = 5570, time_channel = 5114) -> None:
+async def run_exchange(exchange_channel = 5570, time_channel = 5114, auction = False, market_data_channel = 5590, show_stats = True) -> None:
     try: 
-        exchange = Exchange(datetime=datetime(1700,1,1))
+        exchange = Exchange(datetime=datetime(1700,1,1), trade_store=TradeStore('exchange_trades.db', reset=True), hot_window=10_000, auction=auction, journal=Journal('exchange.journal', reset=True), feed=MarketDataFeed(Publisher(market_data_channel), snapshot_seconds=5))
         await exchange.create_asset("XYZ", 'stock')
         time_puller = Subscriber(time_channel)
-        responder = Responder(exchange_channel)
+        responder = RouterResponder(exchange_channel)
         requester = Requester(exchange_channel)
         await responder.connect()
         await requester.connect()
 
-        topic_times = {}
+        dispatcher = TopicDispatcher(exchange)
+        # syncs the journal's last buffered requests while no new request arrives to trigger it
+        asyncio.ensure_future(exchange.journal.flush_periodically())
 
-        def get_time():
+        async def get_time():
             clock = time_puller.subscribe("time")
             if clock == None: 
                 pass
             elif type(clock) is not str:
                 pass
             else: 
-                exchange.datetime = string_to_time(clock)
+                # in auction mode a new clock tick first clears the orders collected during the last one
+                await exchange._set_datetime(string_to_time(clock))
 
         async def callback(msg) -> str:
-            topic_start_time = time.time()
-            if msg['topic'] == 'create_asset': result = dumps((await exchange.create_asset(msg['ticker'],msg['asset_type'],msg['qty'], msg['seed_price'], msg['seed_bid'], msg['seed_ask'])))
-            elif msg['topic'] == 'sim_time': result = dumps(exchange.datetime)
-            elif msg['topic'] == 'limit_buy': result = dumps((await exchange.limit_buy(msg['ticker'], msg['price'], msg['qty'], msg['creator'], msg['fee'])).to_dict())
-            elif msg['topic'] == 'limit_sell': result = dumps((await exchange.limit_sell(msg['ticker'], msg['price'], msg['qty'], msg['creator'], msg['fee'])).to_dict())
-            elif msg['topic'] == 'market_buy': result = await exchange.market_buy(msg['ticker'], msg['qty'], msg['buyer'], msg['fee'])
-            elif msg['topic'] == 'market_sell': result = await exchange.market_sell(msg['ticker'], msg['qty'], msg['seller'], msg['fee'])
-            elif msg['topic'] == 'cancel_order': result = await exchange.cancel_order(msg['order_id'])
-            elif msg['topic'] == 'cancel_all_orders': result = await exchange.cancel_all_orders(msg['agent'], msg['ticker'])
-            elif msg['topic'] == 'candles': result = await exchange.get_price_bars(ticker=msg['ticker'], bar_size=msg['interval'], limit=msg['limit'])
-            # elif msg['topic'] == 'mempool': result = await exchange.mempool(msg['limit'])
-            elif msg['topic'] == 'order_book': result = dumps( (await exchange.get_order_book(msg['ticker'])).to_dict(msg['limit']))
-            elif msg['topic'] == 'latest_trade': result = dumps(await exchange.get_latest_trade(msg['ticker']))
-            elif msg['topic'] == 'trades': result = dumps( await exchange.get_trades(msg['ticker']))
-            elif msg['topic'] == 'quotes': result = await exchange.get_quotes(msg['ticker'])
-            elif msg['topic'] == 'best_bid': result = dumps((await exchange.get_best_bid(msg['ticker'])).to_dict())
-            elif msg['topic'] == 'best_ask': result = dumps((await exchange.get_best_ask(msg['ticker'])).to_dict())
-            elif msg['topic'] == 'midprice': result = await exchange.get_midprice(msg['ticker'])
-            elif msg['topic'] == 'cash': result = await exchange.get_cash(msg['agent'])
-            elif msg['topic'] == 'assets': result = await exchange.get_assets(msg['agent'])
-            elif msg['topic'] == 'register_agent': result = await exchange.register_agent(msg['name'], msg['initial_cash'])
-            elif msg['topic'] == 'get_agent': result = dumps(await exchange.get_agent(msg['name']))
-            elif msg['topic'] == 'get_agents': result = dumps(await exchange.get_agents())
-            elif msg['topic'] == 'add_cash': result = dumps(await exchange.add_cash(msg['agent'], msg['amount']))
-            elif msg['topic'] == 'remove_cash': result = dumps(await exchange.remove_cash(msg['agent'], msg['amount']))
-            elif msg['topic'] == 'get_cash': result = dumps(await exchange.get_cash(msg['agent']))
-            elif msg['topic'] == 'get_assets': result = dumps(await exchange.get_assets(msg['agent']))
-            elif msg['topic'] == 'get_agents_holding': result = dumps(await exchange.get_agents_holding(msg['ticker']))
-            elif msg['topic'] == 'get_agents_positions': result = dumps(await exchange.get_agents_positions(msg['ticker']))
-            elif msg['topic'] == 'get_agents_simple': result = dumps(await exchange.get_agents_simple())
-            elif msg['topic'] == 'get_positions': result = dumps(await exchange.get_positions(msg['agent'], msg['page_size'], msg['page']))
-            #TODO: exchange topic to get general exchange data
-            else: result = f'unknown topic {msg["topic"]}'
-
-            topic_end_time = time.time()
-            topic_time = topic_end_time - topic_start_time
-            if msg['topic'] in topic_times:
-                topic_times[msg['topic']] = (topic_times[msg['topic']] + topic_time)
-            else:
-                topic_times[msg['topic']] = topic_time
-            return result
+            if msg['topic'] in JOURNALED_TOPICS:
+                exchange.journal.append(msg, exchange.datetime)
+            return await dispatcher.dispatch(msg)
 
         console = Console()
-
-        while True:
-            get_time()
-            msg = await responder.respond(callback)
-            if msg is None:
-                continue
-
-            # # Print the table with topic execution times using rich
-            # table = Table(title="Topic Execution Times", show_header=True, header_style="bold magenta")
-            # table.add_row("Total Execution Time", f"{sum(topic_times.values()):.4f}")
-            # table.add_column("Topic", style="cyan", justify="left")
-            # table.add_column("Execution Time (s)", justify="right")
-
-            # for topic, execution_time in topic_times.items():
-            #     table.add_row(topic, f"{execution_time:.4f}")
-
-            # # Clear the console and print the updated table
-            # console.clear()
-            # console.print(table, justify="left", style="bold", end="\r")
+        with Live(dispatcher.table(), console=console, refresh_per_second=1, transient=False) if show_stats else nullcontext() as live:
+            last_render = time.time()
+            while True:
+                await get_time()
+                await responder.respond(callback)
+                # assets too quiet to reach the feed's snapshot_interval still get a snapshot every few seconds for late subscribers
+                exchange.feed.refresh(exchange.books.values())
+                exchange.journal.flush_if_due()
+                # redrawing the table on every request would cost more than most requests do
+                if live is not None and time.time() - last_render >= 1:
+                    live.update(dispatcher.table())
+                    last_render = time.time()
 
     except Exception as e:
         print("[Exchange Error] ", e)
@@ -102,6 +65,8 @@ async def run_exchange(exchange_channel = 5570, time_channel = 5114) -> None:
         return None  
     except KeyboardInterrupt:
         print("attempting to close exchange..." )
+        exchange.trade_log.flush()
+        exchange.journal.close()
         return None
     
 if __name__ == '__main__':
@@ -0,0 +1,85 @@
+import os
+import traceback
+from datetime import datetime
+from multiprocessing import Process
+from source.Messaging import Responder, Requester, Subscriber
+from source.exchange.Exchange import Exchange
+from source.exchange.ExchangeShard import ExchangeShard, shard_name
+from source.exchange.Ledger import Ledger
+from source.exchange.LedgerRequests import LedgerRequests
+from source.exchange.ShardRouter import ShardRouter
+from source.utils._utils import string_to_time
+from rich import print
+import asyncio
+asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+async def run_ledger(ledger_channel) -> None:
+    try:
+        ledger = Ledger()
+        responder = Responder(ledger_channel)
+        await responder.connect()
+
+        while True:
+            await responder.respond(ledger.handle)
+
+    except Exception as e:
+        print("[Ledger Error] ", e)
+        print(traceback.print_exc())
+        return None
+
+async def run_shard(name, shard_channel, ledger_channel, time_channel) -> None:
+    try:
+        ledger_requester = Requester(ledger_channel)
+        await ledger_requester.connect()
+        shard = ExchangeShard(name, LedgerRequests(ledger_requester), Exchange(datetime=datetime(1700,1,1)))
+        exchange = shard.exchange
+        time_puller = Subscriber(time_channel)
+        responder = Responder(shard_channel)
+        await responder.connect()
+
+        async def get_time():
+            clock = time_puller.subscribe("time")
+            if type(clock) is str:
+                await exchange._set_datetime(string_to_time(clock))
+
+        dispatcher = shard.dispatcher()
+
+        while True:
+            await get_time()
+            await responder.respond(dispatcher.dispatch)
+
+    except Exception as e:
+        print(f"[Exchange Shard {name} Error] ", e)
+        print(traceback.print_exc())
+        return None
+
+async def run_router(exchange_channel, shard_channels, ledger_channel) -> None:
+    router = ShardRouter(exchange_channel, shard_channels, ledger_channel)
+    await router.connect()
+    await router.route()
+
+def start(coroutine, *args) -> None:
+    asyncio.run(coroutine(*args))
+
+def main(shards=None, exchange_channel=5570, time_channel=5114, ledger_channel=5580, first_shard_channel=5581) -> None:
+    """Runs the exchange as a ledger process, one process per shard and a router on the exchange channel.
+    Agents connect to the exchange channel exactly as they would to run_exchange.py.
+    """
+    shards = shards or max((os.cpu_count() or 2) - 2, 1)
+    shard_channels = [first_shard_channel + idx for idx in range(shards)]
+    processes = [Process(target=start, args=(run_ledger, ledger_channel))]
+    processes += [Process(target=start, args=(run_shard, shard_name(idx), channel, ledger_channel, time_channel)) for idx, channel in enumerate(shard_channels)]
+    processes.append(Process(target=start, args=(run_router, exchange_channel, shard_channels, ledger_channel)))
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("attempting to close exchange shards...")
+        for process in processes:
+            process.terminate()
+            process.join()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Tuple
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+EPOCH = datetime(1970, 1, 1)
+DATETIME_EXT = 1
+
+def _default(obj):
+    # datetimes become 'YYYY-MM-DD HH:MM:SS', the format string_to_time reads; anything else unknown falls back to its str, as dumps did
+    return str(obj)
+
+class JsonCodec():
+    """Compact JSON, without indentation or key sorting. Frames are plain JSON, so peers using send_json and recv_json still understand them.
+    """
+    name = 'json'
+    tag = b''
+
+    def encode(self, obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), default=_default).encode('utf-8')
+
+    def decode(self, data: bytes):
+        return json.loads(data)
+
+class MsgpackCodec():
+    """MessagePack, with datetimes carried as an extension type holding signed microseconds since the epoch, so they decode back to datetimes.
+    Needs the optional msgpack package.
+    """
+    name = 'msgpack'
+    tag = b'm'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ValueError('the msgpack codec needs the msgpack package, install it with pip install msgpack')
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, datetime):
+            if obj.tzinfo is not None:
+                obj = obj.astimezone(timezone.utc).replace(tzinfo=None)
+            return msgpack.ExtType(DATETIME_EXT, struct.pack('>q', (obj - EPOCH) // timedelta(microseconds=1)))
+        return str(obj)
+
+    @staticmethod
+    def _ext_hook(code, data):
+        if code == DATETIME_EXT:
+            return EPOCH + timedelta(microseconds=struct.unpack('>q', data)[0])
+        return msgpack.ExtType(code, data)
+
+    def encode(self, obj) -> bytes:
+        # with datetime=False msgpack leaves every datetime to _default, naive or not
+        return msgpack.packb(obj, default=self._default, use_bin_type=True, datetime=False)
+
+    def decode(self, data: bytes):
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+CODECS: Dict[str, Any] = {}
+_by_tag: Dict[bytes, Any] = {}
+
+def register_codec(codec) -> None:
+    """Makes a codec available by name to Requesters and recognised by its tag on the Responder side.
+    A codec has a name, a one-byte tag that cannot start a JSON document (JSON itself has the empty tag), and encode and decode methods.
+    """
+    CODECS[codec.name] = codec
+    if codec.tag:
+        _by_tag[codec.tag] = codec
+
+def get_codec(name='json'):
+    if name not in CODECS:
+        if name == 'msgpack':
+            MsgpackCodec()
+        raise ValueError(f'unknown codec {name}, expected one of {sorted(CODECS)}')
+    return CODECS[name]
+
+def pack(codec, obj) -> bytes:
+    return codec.tag + codec.encode(obj)
+
+def unpack(frame: bytes) -> Tuple[Any, Any]:
+    """returns the codec a frame was written with, so that the reply can be written with the same one, and the decoded message.
+    """
+    codec = _by_tag.get(frame[:1])
+    if codec is None:
+        codec = CODECS['json']
+        return codec, codec.decode(frame)
+    return codec, codec.decode(frame[1:])
+
+register_codec(JsonCodec())
+if msgpack is not None:
+    register_codec(MsgpackCodec())
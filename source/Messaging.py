@@ -1,16 +1,27 @@
+import sys
 import traceback
 import json
 import zmq
 import zmq.asyncio
 import asyncio
-asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+from source.Codecs import get_codec, pack, unpack
+# zmq.asyncio needs the selector loop on Windows; the policy does not exist elsewhere
+if sys.platform == 'win32':
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 # logging.basicConfig(format="%(levelname)s: %(message)s", level=logging.WARN)
 
 class Requester:
-    def __init__(self, channel='5556', max_retries=3):
+    def __init__(self, channel='5556', max_retries=3, codec='json'):
+        """
+        Args:
+            channel (str, optional): the port of the Responder. Defaults to '5556'.
+            max_retries (int, optional): the number of times request_lazy resends a request. Defaults to 3.
+            codec (str, optional): the codec of every request on this connection, 'json' or 'msgpack'; the Responder replies in the same one. Defaults to 'json'.
+        """
         self.channel = channel
         self.max_retries = max_retries
+        self.codec = get_codec(codec)
         self.request_timeout = 2500  # ms
         self.context = zmq.asyncio.Context()
 
@@ -22,8 +33,8 @@ class Requester:
 
     async def request(self, msg) -> str:
         try:
-            await self.socket.send_json(msg)
-            return await self.socket.recv_json()
+            await self.socket.send(pack(self.codec, msg))
+            return unpack(await self.socket.recv())[1]
         except zmq.ZMQError as e:
             print("[ZMQ Requester Error]", e, "Request:", msg)
             return None
@@ -34,13 +45,12 @@ class Requester:
 
     async def request_lazy(self, msg) -> str:
         try:
-            await self.socket.send_json(msg)
+            await self.socket.send(pack(self.codec, msg))
             retries_left = self.max_retries
             while True:
                 socks = dict(await self.poller.poll(self.request_timeout) )
                 if socks.get(self.socket) == zmq.POLLIN:
-                    reply = await self.socket.recv_json()
-                    return reply
+                    return unpack(await self.socket.recv())[1]
                 else:
                     print("[Requester Warning] No response from server, retrying...")
                     retries_left -= 1
@@ -54,7 +64,7 @@ class Requester:
                     self.socket.connect(f'tcp://127.0.0.1:{self.channel}')
                     self.poller = zmq.asyncio.Poller()
                     self.poller.register(self.socket, zmq.POLLIN)
-                    await self.socket.send_json(msg)
+                    await self.socket.send(pack(self.codec, msg))
                     continue
         except zmq.ZMQError as e:
             print("[ZMQ Requester Error]", e, "Request:", msg)
@@ -70,6 +80,65 @@ class Requester:
         await self.socket.close()
         await self.context.term()
 
+class DealerRequester:
+    """Makes requests over a DEALER socket, so that many can be in flight at once from one connection, e.g. with asyncio.gather.
+    Each request carries a correlation id that the server sends back with its reply, and the reply resolves the future of the request with that id.
+    Works with a RouterResponder, and with a Responder, which returns the id as part of the envelope.
+    """
+    def __init__(self, channel='5556', codec='json', timeout=None):
+        """
+        Args:
+            channel (str, optional): the port of the responder. Defaults to '5556'.
+            codec (str, optional): the codec of every request on this connection. Defaults to 'json'.
+            timeout (float, optional): seconds to wait for a reply before request returns None. Defaults to None, which waits forever.
+        """
+        self.channel = channel
+        self.codec = get_codec(codec)
+        self.timeout = timeout
+        self.next_id = 0
+        self.pending = {}
+        self.context = zmq.asyncio.Context()
+
+    async def connect(self) -> None:
+        self.socket = self.context.socket(zmq.DEALER)
+        self.socket.connect(f'tcp://127.0.0.1:{self.channel}')
+        self.collector = asyncio.ensure_future(self.collect())
+
+    async def collect(self) -> None:
+        while True:
+            try:
+                request_id, _, reply = await self.socket.recv_multipart()
+                future = self.pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(unpack(reply)[1])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("[DealerRequester Error]", e)
+                print(traceback.format_exc())
+
+    async def request(self, msg) -> str:
+        self.next_id += 1
+        request_id = str(self.next_id).encode()
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            await self.socket.send_multipart([request_id, b'', pack(self.codec, msg)])
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            print("[DealerRequester Warning] No response from server", "Request:", msg)
+            return None
+        except zmq.ZMQError as e:
+            print("[ZMQ DealerRequester Error]", e, "Request:", msg)
+            return None
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def close(self):
+        self.collector.cancel()
+        self.socket.close()
+        self.context.term()
+
 class Responder:
     def __init__(self, channel='5556'):
         self.channel = channel
@@ -80,10 +149,11 @@ class Responder:
         self.socket.bind(f'tcp://127.0.0.1:{self.channel}')
 
     async def respond(self, callback=lambda msg: msg) -> str: 
+        codec = get_codec('json')
         try:
-            msg = await self.socket.recv_json()
+            codec, msg = unpack(await self.socket.recv())
             response = await callback(msg)
-            await self.socket.send_json(response)
+            await self.socket.send(pack(codec, response))
             return response
         except zmq.ZMQError as e:
             print("[ZMQ Response Error]", e, "Request:", msg)
@@ -92,8 +162,59 @@ class Responder:
         except Exception as e:
             print("[Response Error]", e, "Request:", msg)
             print(traceback.format_exc())
-            await self.socket.send_json({'error': e})
-            return json.dumps({'error': e})
+            await self.socket.send(pack(codec, {'error': str(e)}))
+            return json.dumps({'error': str(e)})
+
+class RouterResponder:
+    """Serves many clients over a ROUTER socket. Each call to respond handles every request already waiting, up to max_batch,
+    one after another, and routes each reply back by the envelope its request came with.
+    Clients may be REQ sockets (a Requester) or DEALER sockets (a DealerRequester) with several requests in flight.
+    """
+    def __init__(self, channel='5556', max_batch=1000):
+        """
+        Args:
+            channel (str, optional): the port to bind. Defaults to '5556'.
+            max_batch (int, optional): the most requests handled by one call to respond, so other work in the caller's loop, like the clock, is not starved. Defaults to 1000.
+        """
+        self.channel = channel
+        self.max_batch = max_batch
+
+    async def connect(self) -> None:
+        self.context = zmq.asyncio.Context()
+        self.socket = self.context.socket(zmq.ROUTER)
+        self.socket.bind(f'tcp://127.0.0.1:{self.channel}')
+
+    async def respond(self, callback=lambda msg: msg) -> int:
+        """Waits for a request, then handles it and every other request already queued.
+
+        returns: the number of requests handled.
+        """
+        frames = [await self.socket.recv_multipart()]
+        while len(frames) < self.max_batch:
+            try:
+                frames.append(await self.socket.recv_multipart(zmq.NOBLOCK))
+            except zmq.Again:
+                break
+        for request in frames:
+            # everything before the payload is the envelope: the client's identity, a DealerRequester's correlation id and the empty delimiter
+            envelope, payload = request[:-1], request[-1]
+            codec = get_codec('json')
+            msg = None
+            try:
+                codec, msg = unpack(payload)
+                response = await callback(msg)
+            except Exception as e:
+                print("[Response Error]", e, "Request:", msg)
+                print(traceback.format_exc())
+                response = {'error': str(e)}
+            try:
+                reply = pack(codec, response)
+            except Exception as e:
+                print("[Response Error]", e, "Request:", msg)
+                reply = pack(codec, {'error': str(e)})
+            # a ROUTER drops replies to clients that have gone away, so a disconnect cannot stall the batch
+            await self.socket.send_multipart(envelope + [reply])
+        return len(frames)
 
 class Broker:
     def __init__(self, request_side='5556', response_side='5557'):
@@ -1,49 +1,167 @@
-import time
 import json
 import traceback
 import asyncio
+from collections import OrderedDict
+from typing import Dict
+
+# which reads may be cached, and what makes them stale:
+# 'book' reads are valid until the asset's market-data sequence number moves, 'clock' reads until the sim clock ticks
+DEFAULT_CACHE_POLICIES = {
+    'order_book': 'book',
+    'depth': 'book',
+    'quotes': 'book',
+    'best_bid': 'book',
+    'best_ask': 'book',
+    'midprice': 'book',
+    'latest_trade': 'book',
+    'trades': 'book',
+    'candles': 'clock',
+    'get_agents_holding': 'clock',
+    'get_agents_positions': 'clock',
+}
+
+WRITE_TOPICS = {'limit_buy', 'limit_sell', 'market_buy', 'market_sell', 'cancel_order', 'cancel_all_orders', 'batch', 'create_asset', 'restore'}
+
+class ResponseCache():
+    """An LRU cache of read replies, keyed on the topic and a canonical form of the request's arguments.
+
+    An entry remembers the version of the market it was read at and is only returned while that version is current.
+    For 'book' topics the version is the asset's market-data sequence number, passed in through `observe`, e.g. from the MarketDataFeed,
+    together with a count of this client's own writes to the asset. For 'clock' topics it is the sim time passed in through `tick`,
+    together with a count of all of this client's writes.
+    Until a sequence number or a clock tick has been seen there is nothing to invalidate on, so the read is not cached.
+    """
+    def __init__(self, policies: Dict[str, str]=None, max_size=1024):
+        """
+        Args:
+            policies (Dict[str, str], optional): maps each cacheable topic to 'book' or 'clock'; other topics are never cached. Defaults to DEFAULT_CACHE_POLICIES.
+            max_size (int, optional): the most entries kept, the least recently used are evicted first. Defaults to 1024.
+        """
+        self.policies = DEFAULT_CACHE_POLICIES if policies is None else policies
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.seq: Dict[str, int] = {}
+        self.writes: Dict[str, int] = {}
+        self.all_writes = 0
+        self.write_count = 0
+        self.clock = None
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f'<ResponseCache: {len(self.entries)} entries, {self.hits} hits, {self.misses} misses>'
+
+    @staticmethod
+    def key(topic: str, message: dict) -> str:
+        return topic + json.dumps(message, sort_keys=True, separators=(',', ':'), default=str)
+
+    def version(self, topic: str, message: dict):
+        """returns what a reply to the request depends on, or None if it may not be cached.
+        """
+        policy = self.policies.get(topic)
+        if policy == 'book':
+            ticker = message.get('ticker')
+            if ticker not in self.seq:
+                return None
+            return (self.seq[ticker], self.writes.get(ticker, 0), self.all_writes)
+        if policy == 'clock' and self.clock is not None:
+            return (self.clock, self.write_count)
+        return None
+
+    def get(self, key: str, version):
+        entry = self.entries.get(key)
+        if entry is None or entry[1] != version:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, version, value) -> None:
+        self.entries[key] = (value, version)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def observe(self, ticker: str, seq: int) -> None:
+        """Records the latest market-data sequence number of an asset, e.g. from a MarketDataFeed message.
+        """
+        self.seq[ticker] = seq
+
+    def tick(self, dt) -> None:
+        """Records the sim time, so that 'clock' entries from an earlier tick go stale.
+        """
+        self.clock = dt
+
+    def wrote(self, message: dict) -> None:
+        """Marks the reads of an asset this client just wrote to as stale, or of every asset if the write does not name one,
+        so a client always reads its own writes even before the feed's sequence number reaches it.
+        """
+        ticker = message.get('ticker')
+        self.write_count += 1
+        if ticker:
+            self.writes[ticker] = self.writes.get(ticker, 0) + 1
+        else:
+            self.all_writes += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
 
 class Requests():
     """
     Creates an API for making requests to the exchange process.
     """
-    def __init__(self, requester, cache=False):
+    def __init__(self, requester, cache=False, cache_policies: Dict[str, str]=None, cache_size=1024):
+        """
+        Args:
+            requester (Requester): sends a request and returns the decoded reply.
+            cache (bool, optional): whether to cache reads, see ResponseCache. Defaults to False.
+            cache_policies (Dict[str, str], optional): which topics may be cached and how they go stale. Defaults to DEFAULT_CACHE_POLICIES.
+            cache_size (int, optional): the most replies cached. Defaults to 1024.
+        """
         self.requester = requester
-        self.cache=cache
+        self.cache = ResponseCache(cache_policies, cache_size) if cache else None
         self.timeout = 5
         self.max_tries = 1
         self.debug = True
-        self.message_cache = {}
-        self.cache_duration = 5  # Cache duration in seconds (adjust as needed)
+
+    def observe(self, ticker: str, seq: int) -> None:
+        if self.cache is not None:
+            self.cache.observe(ticker, seq)
+
+    def tick(self, dt) -> None:
+        if self.cache is not None:
+            self.cache.tick(dt)
 
     async def make_request(self, topic: str, message: dict, factory, tries=0) -> str:
         try:
-            # Check if the message is already cached and not expired
-            if self.cache and topic in self.message_cache:
-                cached_msg, expiration_time = self.message_cache[topic]
-                current_time = time.time()
-                if current_time < expiration_time:
-                    return cached_msg
+            key = version = None
+            if self.cache is not None:
+                if topic in WRITE_TOPICS:
+                    self.cache.wrote(message)
+                else:
+                    version = self.cache.version(topic, message)
+                    if version is not None:
+                        key = self.cache.key(topic, message)
+                        entry = self.cache.get(key, version)
+                        if entry is not None:
+                            return entry[0]
 
             message['topic'] = topic
             msg = await self.requester.request(message)
 
+            # the Requester's codec has already decoded the reply, so it is used as it is
             if msg is None:
                 raise Exception(f'{topic} is None, {msg}')
-            elif isinstance(msg, str):
-                parsed_msg = json.loads(msg)
-            elif isinstance(msg, list):
-                parsed_msg = msg
-            elif not isinstance(msg, dict):
-                raise Exception(f'{topic} got type {type(msg)}, expected dict. Message: {msg}')
-            elif 'error' in msg:
+            elif isinstance(msg, dict) and 'error' in msg:
                 raise Exception(f'{topic} error, {msg}')
             else:
                 parsed_msg = msg
 
-            # Cache the message along with the expiration time
-            expiration_time = time.time() + self.cache_duration
-            self.message_cache[topic] = (parsed_msg, expiration_time)
+            if key is not None:
+                self.cache.put(key, version, parsed_msg)
+            elif topic == 'sim_time' and self.cache is not None:
+                self.cache.tick(parsed_msg)
 
             return parsed_msg
         except Exception as e:
@@ -7,11 +7,26 @@ import asyncio
 class Agent():
     """The Agent class is the base class for developing different traders that participate in the simulated exchange.
     """
-    def __init__(self, name:str, aum:int=10_000, requester=None):
+    def __init__(self, name:str, aum:int=10_000, requester=None, market_data=None):
+        """
+        Args:
+            name (str): the name to register with the exchange.
+            aum (int, optional): the starting cash. Defaults to 10_000.
+            requester (ExchangeRequests, optional): makes the agent's requests to the exchange. Defaults to None.
+            market_data (MarketDataHub, optional): a local replica of the books the agent reads, fed by the exchange's market-data feed.
+                While an asset's replica is in sync, its quotes, depth, midprice and latest trade are read from it instead of the exchange, in the same form.
+                The feed carries price levels, not orders, so the best bid and ask and the order book are always read from the exchange.
+                Its sequence numbers also invalidate the book reads cached by the requester, if it caches.
+                Defaults to None, which reads everything from the exchange.
+        """
         self.id = UUID()
         self.name = name 
         self.tickers = []
         self.requests = requester
+        self.market_data = market_data
+        if market_data is not None and getattr(requester, 'cache', None) is not None:
+            # the feed's sequence numbers tell the requests cache when a cached book read has gone stale
+            market_data.listeners.append(requester.observe)
         self.cash = aum
         self.initial_cash = aum
 
@@ -21,6 +36,17 @@ class Agent():
     def __str__(self):
         return f'<Agent: {self.name}>'
 
+    async def _replica(self, ticker:str):
+        """returns the local market-data replica if it is in sync for an asset, otherwise None so the caller asks the exchange.
+        A replica that is new or has skipped a message asks the exchange for a snapshot rather than wait for the feed's next one.
+        """
+        if self.market_data is None:
+            return None
+        self.market_data.start()
+        if self.market_data.needs_snapshot(ticker):
+            await self.requests.request_market_data_snapshot(ticker)
+        return self.market_data if self.market_data.synced(ticker) else None
+
     async def get_latest_trade(self, ticker:str) -> dict:
         """returns the most recent trade of a given asset
 
@@ -30,6 +56,9 @@ class Agent():
         returns:
             Trade: the most recent trade
         """
+        replica = await self._replica(ticker)
+        if replica is not None and replica.latest_trade(ticker) is not None:
+            return replica.latest_trade(ticker)
         return await self.requests.get_latest_trade(ticker)
 
     async def get_best_bid(self, ticker:str) -> dict:
@@ -63,14 +92,28 @@ class Agent():
         returns:
             float: the current midprice
         """
+        replica = await self._replica(ticker)
+        if replica is not None:
+            quote = replica.quote(ticker)
+            return {'midprice': (quote['bid_p'] + quote['ask_p']) / 2}
         return await self.requests.get_midprice(ticker)
 
     async def get_order_book(self,ticker) -> dict:
         return await self.requests.get_order_book(ticker)
 
     async def get_quotes(self,ticker) -> dict:
+        replica = await self._replica(ticker)
+        if replica is not None:
+            return replica.quote(ticker)
         return await self.requests.get_quotes(ticker)
 
+    async def get_depth(self, ticker, limit=10) -> dict:
+        replica = await self._replica(ticker)
+        if replica is not None:
+            book = replica.book(ticker, limit)
+            return {'ticker': ticker, 'seq': book['book_seq'], 'bids': book['bids'], 'asks': book['asks']}
+        return await self.requests.get_depth(ticker, limit)
+
     async def get_trades(self, ticker, limit=20) -> List[dict]:
         return await self.requests.get_trades(ticker, limit=limit)
 
@@ -140,14 +183,28 @@ class Agent():
         """
         return await self.requests.cancel_order(id=id)
 
-    async def cancel_all_orders(self, ticker:str) -> dict:
+    async def cancel_all_orders(self, ticker:str=None) -> dict:
         """Cancels all remaining orders that the agent has on an asset.
 
         Args:
-            ticker (str): the ticker of the asset.
+            ticker (str, optional): the ticker of the asset. If None, cancels the agent's orders on every asset.
         """
         return await self.requests.cancel_all_orders(ticker, self.name)
 
+    async def submit_batch(self, actions:List[dict]) -> List[dict]:
+        """Sends several order and cancel actions to the exchange in one request. They are run in the order given.
+
+        Args:
+            actions (List[dict]): each action has a 'topic' ('limit_buy', 'limit_sell', 'market_buy', 'market_sell', 'cancel_order' or 'cancel_all_orders')
+            and the fields of that request. The agent's name is filled in for 'creator', 'buyer', 'seller' and 'agent' where the topic needs it.
+
+        returns:
+            List[dict]: the result of each action, in order.
+        """
+        owner = {'limit_buy': 'creator', 'limit_sell': 'creator', 'market_buy': 'buyer', 'market_sell': 'seller', 'cancel_all_orders': 'agent'}
+        actions = [{owner[action['topic']]: self.name, **action} if action.get('topic') in owner else action for action in actions]
+        return await self.requests.submit_batch(actions)
+
     async def get_price_bars(self,ticker, bar_size='1D', limit=20) -> pd.DataFrame:
         return await self.requests.get_price_bars(ticker, bar_size, limit=limit)
     
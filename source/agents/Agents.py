@@ -3,8 +3,8 @@ import random
 from time import sleep
 
 class RandomMarketTaker(Agent):
-    def __init__(self,name,tickers, aum=10000,prob_buy=.2,prob_sell=.2,qty_per_order=1,seed=None, requester=None):
-        Agent.__init__(self, name, aum, requester=requester)
+    def __init__(self,name,tickers, aum=10000,prob_buy=.2,prob_sell=.2,qty_per_order=1,seed=None, requester=None, market_data=None):
+        Agent.__init__(self, name, aum, requester=requester, market_data=market_data)
         if  prob_buy + prob_sell> 1:
             raise ValueError("Sum of probabilities cannot be greater than 1.") 
         self.prob_buy = prob_buy
@@ -49,8 +49,8 @@ class RandomMarketTaker(Agent):
         return True
 
 class LowBidder(Agent):
-    def __init__(self, name, tickers, aum, qty_per_order=1, requester=None):
-        Agent.__init__(self, name, aum, requester=requester)
+    def __init__(self, name, tickers, aum, qty_per_order=1, requester=None, market_data=None):
+        Agent.__init__(self, name, aum, requester=requester, market_data=market_data)
         self.qty_per_order = qty_per_order
         self.tickers = tickers
         self.assets = {}
@@ -78,8 +78,8 @@ class LowBidder(Agent):
 
 class GreedyScalper(Agent):
     '''waits for initial supply to dry up, then starts inserting bids very low and asks very high'''
-    def __init__(self, name, tickers, aum, qty_per_order=1, requester=None):
-        Agent.__init__(self, name, aum, requester=requester)
+    def __init__(self, name, tickers, aum, qty_per_order=1, requester=None, market_data=None):
+        Agent.__init__(self, name, aum, requester=requester, market_data=market_data)
         self.qty_per_order = qty_per_order
         self.tickers = tickers
         self.aum = aum
@@ -99,8 +99,8 @@ class GreedyScalper(Agent):
         return True
 
 class NaiveMarketMaker(Agent):
-    def __init__(self, name, tickers, aum, spread_pct=.005, qty_per_order=1, requester=None):
-        Agent.__init__(self, name, aum, requester=requester)
+    def __init__(self, name, tickers, aum, spread_pct=.005, qty_per_order=1, requester=None, market_data=None):
+        Agent.__init__(self, name, aum, requester=requester, market_data=market_data)
         self.qty_per_order = qty_per_order
         self.tickers = tickers
         self.spread_pct = spread_pct
@@ -121,7 +121,9 @@ class NaiveMarketMaker(Agent):
             if latest_trade is None or 'price' not in latest_trade:
                 break
             price = latest_trade['price']
-            await self.cancel_all_orders(ticker)
-            buy_order = await self.limit_buy(ticker, price * (1-self.spread_pct/2), qty=self.qty_per_order)
-            sell_order = await self.limit_sell(ticker, price * (1+self.spread_pct/2), qty=self.qty_per_order)
+            await self.submit_batch([
+                {'topic': 'cancel_all_orders', 'ticker': ticker},
+                {'topic': 'limit_buy', 'ticker': ticker, 'price': price * (1-self.spread_pct/2), 'qty': self.qty_per_order},
+                {'topic': 'limit_sell', 'ticker': ticker, 'price': price * (1+self.spread_pct/2), 'qty': self.qty_per_order}
+            ])
         return True
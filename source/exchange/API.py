@@ -1,9 +1,12 @@
+import json
 from quart import Quart, websocket, jsonify, request
 from .ExchangeRequests import ExchangeRequests as Requests
+from .MarketDataHub import MarketDataHub
 
-async def API(requester):
+async def API(requester, hub=None):
     app = Quart(__name__)
     requests = Requests(requester, cache=False)
+    await WebSockets(app, hub if hub is not None else MarketDataHub())
 
     @app.route('/')
     async def index():
@@ -98,6 +101,14 @@ async def API(requester):
         if (ticker is None or ticker == ""):
             return jsonify({'message': 'Ticker not found.'}), 400
         return await requests.get_quotes(ticker)
+
+    @app.route('/api/v1/get_depth', methods=['GET'])
+    async def get_depth() -> str:
+        ticker = request.args.get('ticker')
+        limit = request.args.get('limit', 10, type=int)
+        if (ticker is None or ticker == ""):
+            return jsonify({'message': 'Ticker not found.'}), 400
+        return await requests.get_depth(ticker, limit)
         
     @app.route('/api/v1/get_best_bid', methods=['GET'])
     async def get_best_bid() -> str:
@@ -168,9 +179,11 @@ async def API(requester):
     async def cancel_all_orders() -> str:
         data = await request.get_json()
         agent = data['agent']
-        ticker = data['ticker']
-        if (ticker is None or ticker == "" or agent is None or agent == ""):
-            return await jsonify({'message': 'Ticker not found.'}), 400
+        ticker = data.get('ticker')
+        if (agent is None or agent == ""):
+            return await jsonify({'message': 'Agent not found.'}), 400
+        if (ticker == ""):
+            ticker = None
         return await requests.cancel_all_orders(ticker, agent)
 
     @app.route('/api/v1/market_buy', methods=['POST'])
@@ -205,6 +218,18 @@ async def API(requester):
 
     return app
 
-#TODO: for this to work we need to push data from the exchange and pull it to here then re-broadcast via websocket
-async def WebSockets(app, sim):
-    pass
\ No newline at end of file
+async def WebSockets(app, hub: MarketDataHub):
+    """Streams an asset's market data to WebSocket clients from the hub's one subscription to the exchange's feed.
+    A client first receives the whole book, then conflated updates as fast as it reads them.
+    """
+    @app.websocket('/ws/v1/market/<ticker>')
+    async def market(ticker):
+        hub.start()
+        client = hub.subscribe(ticker)
+        try:
+            await websocket.send(json.dumps(hub.book(ticker)))
+            while True:
+                await client.ready.wait()
+                await websocket.send(json.dumps(client.drain(), default=str))
+        finally:
+            hub.unsubscribe(client)
\ No newline at end of file
@@ -0,0 +1,48 @@
+import numpy as np
+from typing import List, Tuple, Union
+
+def clearing_price(bids: List[dict], asks: List[dict], reference=None) -> Tuple[Union[float, None], int]:
+    """Finds the uniform price that crosses the most quantity between two sides of a book.
+
+    Demand at a price is the bid quantity priced at or above it and supply is the ask quantity priced at or below it,
+    both read off cumulative sums over the sorted levels. The executable volume at a price is the smaller of the two.
+    Ties in volume go to the price with the smallest imbalance, then to the price closest to `reference`, then to the lowest price.
+
+    Args:
+        bids (List[dict]): aggregated bid levels with 'price' and 'qty', as returned by BookSide.depth.
+        asks (List[dict]): aggregated ask levels with 'price' and 'qty'.
+        reference (float, optional): the price to prefer when several prices cross the same volume, usually the last trade. Defaults to None.
+
+    returns:
+        Tuple[Union[float, None], int]: the clearing price and the volume that crosses at it, or (None, 0) if the book does not cross.
+    """
+    if not bids or not asks:
+        return None, 0
+    bid_prices = np.array([level['price'] for level in bids], dtype=float)
+    bid_qtys = np.array([level['qty'] for level in bids], dtype=float)
+    ask_prices = np.array([level['price'] for level in asks], dtype=float)
+    ask_qtys = np.array([level['qty'] for level in asks], dtype=float)
+
+    bid_order = np.argsort(bid_prices)
+    bid_prices, bid_qtys = bid_prices[bid_order], bid_qtys[bid_order]
+    ask_order = np.argsort(ask_prices)
+    ask_prices, ask_qtys = ask_prices[ask_order], ask_qtys[ask_order]
+
+    prices = np.unique(np.concatenate([bid_prices, ask_prices]))
+    bid_cum = np.concatenate([[0], np.cumsum(bid_qtys)])
+    ask_cum = np.concatenate([[0], np.cumsum(ask_qtys)])
+    demand = bid_cum[-1] - bid_cum[np.searchsorted(bid_prices, prices, side='left')]
+    supply = ask_cum[np.searchsorted(ask_prices, prices, side='right')]
+    volume = np.minimum(demand, supply)
+
+    max_volume = volume.max()
+    if max_volume <= 0:
+        return None, 0
+    candidates = np.flatnonzero(volume == max_volume)
+    imbalance = np.abs(demand[candidates] - supply[candidates])
+    candidates = candidates[imbalance == imbalance.min()]
+    if reference is not None and len(candidates) > 1:
+        distance = np.abs(prices[candidates] - reference)
+        candidates = candidates[distance == distance.min()]
+    price = prices[candidates[0]].item()
+    return price, int(max_volume) if float(max_volume).is_integer() else max_volume.item()
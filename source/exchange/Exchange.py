@@ -4,24 +4,49 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 import pandas as pd
 import math
-from typing import List
+from collections import deque
+from copy import copy
+from typing import List, Union
 from .types.OrderBook import OrderBook
 from .types.Trade import Trade
+from .types.TradeLog import TradeLog
+from .types.BarAggregator import BarAggregator
 from .types.LimitOrder import LimitOrder
 from .types.OrderSide import OrderSide
+from .types.OrderIndex import OrderIndex
 from .types.Fees import Fees
-from .types.Transaction import Transaction, Exit
-from .types.Position import Position
-from source.utils._utils import format_dataframe_rows_to_dict
+from .CallAuction import clearing_price
+from .Risk import Risk
+from .Snapshot import read_snapshot, write_snapshot, SNAPSHOT_VERSION
+from .types.Transaction import Transaction
+from .types.PositionLedger import PositionLedger
+from .types.HoldingsIndex import HoldingsIndex
+from .types.IdGenerator import IdGenerator
+from .types.TickScale import TickScale, from_cash_units, to_cash_units
+from .types.Account import Account
+from .types.AccountRegistry import AccountRegistry
 from uuid import uuid4 as UUID
 
 # Creates an Orderbook and Assets
 class Exchange():
-    def __init__(self, datetime= None):
-        self.agents = []
+    def __init__(self, datetime= None, bar_intervals=('1Min', '15Min', '1H', '1D'), trade_store=None, hot_window=None, auction=False, journal=None, feed=None, snapshot_dir='snapshots'):
+        self.ids = IdGenerator()
+        self.agents = AccountRegistry()
         self.assets = {}
+        self.scales = {}
         self.books = {}
-        self.trade_log: List[Trade] = [] #TODO: this is going to get to big to hold in memory, need a DB
+        self.order_index = OrderIndex()
+        self.risk = Risk()
+        self.positions = PositionLedger(self.ids)
+        self.holdings = HoldingsIndex()
+        self.trade_log = TradeLog(trade_store, hot_window)
+        self.auction = auction
+        self.journal = journal
+        self.feed = feed
+        # the only directory snapshots named over the network are written to and restored from
+        self.snapshot_dir = snapshot_dir
+        self.bar_intervals = bar_intervals
+        self.bars = {}
         self.datetime = datetime
         self.agents_cash_updates = []
         self.blockchain = None
@@ -30,7 +55,74 @@ class Exchange():
     async def __str__(self):
         return ', '.join(ob for ob in self.books)
 
-    async def create_asset(self, ticker: str, asset_type='stock', market_qty=1000, seed_price=100, seed_bid=.99, seed_ask=1.01) -> OrderBook:
+    async def snapshot(self, path: str) -> dict:
+        """Saves the exchange's state to a file: the books, the accounts with their positions, the position ledger and holdings,
+        fees, the clock and the trades kept in memory with their sequence numbers. Trades already persisted in a TradeStore stay there.
+
+        Args:
+            path (str): the file to write.
+
+        returns:
+            dict: the path, format version and size of the snapshot.
+        """
+        state = {
+            'datetime': self.datetime,
+            'ids': self.ids,
+            'assets': self.assets,
+            'scales': self.scales,
+            'books': self.books,
+            'agents': self.agents,
+            'order_index': self.order_index,
+            'risk': self.risk,
+            'positions': self.positions,
+            'holdings': self.holdings,
+            'tapes': self.trade_log.tapes,
+            'bar_intervals': self.bar_intervals,
+            'bars': self.bars,
+            'auction': self.auction,
+            'fees': self.fees,
+            'journal_seq': None,
+        }
+        if self.journal is not None:
+            self.journal.flush()
+            state['journal_seq'] = self.journal.seq
+        size = write_snapshot(path, state)
+        return {'snapshot': path, 'version': SNAPSHOT_VERSION, 'bytes': size}
+
+    async def restore(self, path: str) -> dict:
+        """Replaces the exchange's state with one saved by snapshot. The exchange keeps its own TradeStore, if it has one.
+
+        Args:
+            path (str): the snapshot file.
+
+        returns:
+            dict: the path, the restored clock time and the journal sequence number the snapshot was taken at, if it was journaled.
+        """
+        state = read_snapshot(path)
+        self.datetime = state['datetime']
+        self.ids = state['ids']
+        self.assets = state['assets']
+        self.scales = state['scales']
+        self.books = state['books']
+        self.agents = state['agents']
+        self.order_index = state['order_index']
+        self.risk = state['risk']
+        self.positions = state['positions']
+        self.holdings = state['holdings']
+        self.trade_log.tapes = state['tapes']
+        self.bar_intervals = state['bar_intervals']
+        self.bars = state['bars']
+        self.auction = state['auction']
+        self.fees = state['fees']
+        if self.journal is not None and state['journal_seq'] is not None and self.journal.seq < state['journal_seq']:
+            # replay skips the entries up to the snapshot's journal_seq, so a new journal must continue past it or its first entries would be skipped
+            self.journal.seq = state['journal_seq']
+        if self.feed is not None:
+            for book in self.books.values():
+                self.feed.snapshot(book)
+        return {'restored': path, 'datetime': self.datetime, 'journal_seq': state['journal_seq']}
+
+    async def create_asset(self, ticker: str, asset_type='stock', market_qty=1000, seed_price=100, seed_bid=.99, seed_ask=1.01, tick_size=None, lot_size=None) -> OrderBook:
         """_summary_
 
         Args:
@@ -40,24 +132,49 @@ class Exchange():
             seed_price (int, optional): Price of an initial trade that is created for ease of use. async defaults to 100.
             seed_bid (float, optional): Limit price of an initial buy order, expressed as percentage of the seed_price. async defaults to .99.
             seed_ask (float, optional): Limit price of an initial sell order, expressed as percentage of the seed_price. async defaults to 1.01.
+            tick_size (float, optional): the smallest price increment; order prices are rounded to it. Defaults to 1e-8 for crypto and 0.01 otherwise.
+            lot_size (float, optional): order quantities must be a multiple of it. Defaults to 1e-8 for crypto and 1 otherwise.
         """
-        self.assets[ticker] = {'type':asset_type}
+        if tick_size is None:
+            tick_size = 1e-8 if asset_type == 'crypto' else 0.01
+        if lot_size is None:
+            lot_size = 1e-8 if asset_type == 'crypto' else 1
+        if ticker in self.books:
+            # listing an asset again replaces its book, so the orders resting in the old one are cancelled first
+            for order in self.books[ticker].bids.to_list() + self.books[ticker].asks.to_list():
+                self._remove_order(self.books[ticker], order)
+        self.scales[ticker] = TickScale(tick_size, lot_size)
+        self.assets[ticker] = {'type':asset_type, 'tick_size': tick_size, 'lot_size': lot_size}
         self.books[ticker] = OrderBook(ticker)
-        self.agents.append({'name':'init_seed_'+ticker,'cash':market_qty * seed_price,'_transactions':[], 'positions':[], 'assets': {ticker: market_qty}})
+        self.bars[ticker] = BarAggregator(ticker, self.bar_intervals)
+        seed = self.agents.get('init_seed_'+ticker)
+        if seed is not None:
+            # the new seed account replaces the old one, so the old one's holdings and positions leave the indexes with it
+            for held, qty in seed.assets.items():
+                self.holdings.add(seed.name, held, -qty)
+            self.positions.remove_account(seed)
+        self.agents.add(Account('init_seed_'+ticker, market_qty * seed_price, assets={ticker: market_qty}))
+        self.holdings.add('init_seed_'+ticker, ticker, market_qty)
         await self._process_trade(ticker, market_qty, seed_price, 'init_seed_'+ticker, 'init_seed_'+ticker)
-        await self.limit_buy(ticker, seed_price * seed_bid, 1, 'init_seed_'+ticker)
-        await self.limit_sell(ticker, seed_price * seed_ask, market_qty, 'init_seed_'+ticker)
+        # the seed orders get fixed ids so that replaying a journal recreates them exactly
+        await self.limit_buy(ticker, seed_price * seed_bid, 1, 'init_seed_'+ticker, order_id='init_seed_'+ticker+'_bid')
+        await self.limit_sell(ticker, seed_price * seed_ask, market_qty, 'init_seed_'+ticker, order_id='init_seed_'+ticker+'_ask')
         return self.assets[ticker]
    
     async def _process_trade(self, ticker, qty, price, buyer, seller, accounting='FIFO', fee=0.0, position_id=None):
-        # check that seller and buyer have cash and assets before processing trade
-        if not await self.agent_has_cash(buyer, price, qty):
-            return None
-        if not await self.agent_has_assets(seller, ticker, qty):
-            return None
-        
-        trade = Trade(ticker, qty, price, buyer, seller, self.datetime, fee=fee)
-        self.trade_log.append(trade)
+        # the cash of the trade is computed from integer ticks, in integer cash units
+        scale = self.scales[ticker]
+        ticks = scale.to_ticks(price)
+        price = scale.to_price(ticks)
+        cash_units = scale.cash_units(ticks, qty)
+        # both sides were checked before they traded: a taker against its available balance, a resting order by what it reserved
+        cash_flow = from_cash_units(cash_units)
+
+        self.trade_log.record(ticker, qty, price, buyer, seller, self.datetime, fee=fee)
+        if self.feed is not None:
+            self.feed.trade(ticker, price, qty, self.datetime, buyer, seller, fee)
+        if ticker in self.bars:
+            self.bars[ticker].add(self.datetime, price, qty)
         if ticker in self.assets and (self.assets[ticker]['type'] == 'crypto'):
             # TODO: send request to add transaction to blockchain
             # blockchain.add_transaction(ticker, fee, amount=qty*price, sender=seller, recipient=buyer, dt=datetime)
@@ -67,8 +184,8 @@ class Exchange():
         else:
             txn_time = self.datetime
             transaction = [
-                {'agent':buyer,'cash_flow':-qty*price,'ticker':ticker,'qty': qty, 'fee':fee, 'dt': txn_time, 'type': 'buy'},
-                {'agent':seller,'cash_flow':qty*price,'ticker':ticker,'qty': -qty, 'fee':fee, 'dt': txn_time, 'type': 'sell'}
+                {'agent':buyer,'cash_flow':-cash_flow,'cash_units':-cash_units,'ticker':ticker,'qty': qty, 'fee':fee, 'dt': txn_time, 'type': 'buy'},
+                {'agent':seller,'cash_flow':cash_flow,'cash_units':cash_units,'ticker':ticker,'qty': -qty, 'fee':fee, 'dt': txn_time, 'type': 'sell'}
             ]
             # self.agents_cash_updates.extend(transaction)
             await self.__update_agents(transaction, accounting, position_id=position_id)
@@ -95,29 +212,50 @@ class Exchange():
         returns:
             Trade
         """
-        latest_trade = next((trade for trade in self.trade_log[::-1] if trade.ticker == ticker), {'error': 'no trades found'})
-        if isinstance(latest_trade, Trade):
-            return latest_trade.to_dict()
+        tape = self.trade_log.get(ticker)
+        if tape is not None and len(tape) > 0:
+            return tape.latest()
         else:
             return {'error': 'no trades found'}
 
     async def get_quotes(self, ticker) -> dict:
-        try:
-            # TODO: if more than one order has the best price, add the quantities.
-            best_bid = self.books[ticker].bids[0]
-            best_ask = self.books[ticker].asks[0]
-        except IndexError :
-            best_bid = LimitOrder(ticker, 0, 0, 'null_quote', OrderSide.BUY, self.datetime)
-            best_ask = LimitOrder(ticker, 0, 0, 'null_quote', OrderSide.SELL, self.datetime)
-
-        quotes = {
-            'ticker': ticker,
-            'bid_qty': best_bid.qty,
-            'bid_p': best_bid.price,
-            'ask_qty': best_ask.qty,
-            'ask_p': best_ask.price,
-        }
-        return quotes
+        """returns the best bid and ask of an asset, with the total quantity resting at each price.
+
+        Args:
+            ticker (str): the ticker of the asset
+
+        returns:
+            dict: the L1 quote, cached by the book until its best levels change.
+        """
+        return self.books[ticker].quote()
+
+    async def get_depth(self, ticker, limit=10) -> dict:
+        """returns the aggregated L2 depth of an asset.
+
+        Args:
+            ticker (str): the ticker of the asset
+            limit (int, optional): the number of price levels per side. Defaults to 10.
+
+        returns:
+            dict: the book's sequence number and, per side, a list of price levels with their total quantity and number of orders.
+        """
+        return self.books[ticker].depth(limit)
+
+    async def publish_snapshot(self, ticker) -> dict:
+        """publishes a market-data snapshot of an asset's book now, for a subscriber that joined late or skipped a message.
+
+        Args:
+            ticker (str): the ticker of the asset
+
+        returns:
+            dict: the feed sequence number the snapshot is current as of.
+        """
+        if self.feed is None:
+            return {'error': 'no market-data feed'}
+        if ticker not in self.books:
+            return {'error': f'unknown ticker {ticker}'}
+        self.feed.snapshot(self.books[ticker])
+        return {'snapshot': ticker, 'seq': self.feed.seq.get(ticker, 0)}
 
     async def get_midprice(self, ticker:str) -> float:
         """returns the current midprice of the best bid and ask quotes.
@@ -128,30 +266,36 @@ class Exchange():
         returns:
             float: the current midprice
         """
-        quotes = await self.get_quotes(ticker)
+        quotes = self.books[ticker].quote()
         return {"midprice" :(quotes['bid_p'] + quotes['ask_p']) / 2}
 
-    async def get_trades(self, ticker:str, limit=20) -> list:
-        """Retrieves all past trades of a given asset
+    async def get_trades(self, ticker:str, limit=20, start=None, end=None) -> list:
+        """Retrieves the most recent trades of a given asset, or its trades within a time range
 
         Args:
             ticker (str): the ticker of the asset
+            limit (int, optional): the number of most recent trades to return. Defaults to 20.
+            start (datetime, optional): if given with or without end, returns the trades with start <= dt < end instead, up to limit of the most recent.
+            end (datetime, optional): the end of the time range, exclusive.
 
         returns:
-            pd.DataFrame: a dataframe containing all trades
+            list: the trades, oldest first
         """
-        trades = pd.DataFrame.from_records([t.to_dict() for t in self.trade_log if t.ticker == ticker]).tail(limit)
-        return format_dataframe_rows_to_dict(trades)
+        if start is not None or end is not None:
+            return self.trade_log.between(ticker, start, end)[-limit:]
+        return self.trade_log.tail(ticker, limit)
     
     async def get_price_bars(self, ticker, limit=20, bar_size='1D') -> list:
-        #TODO: not resampling correctly
-        trades = await self.trades
-        trades = trades[trades['ticker']== ticker]
-        trades.index = pd.to_datetime(trades.index)
-        df = trades.resample(bar_size).agg({'price': 'ohlc', 'qty': 'sum'})
-        df.columns = df.columns.droplevel()
-        df.rename(columns={'qty':'volume'},inplace=True)
-        return format_dataframe_rows_to_dict(df.tail(limit))
+        """returns the most recent open, high, low, close and volume bars of an asset. Bars are only returned for intervals that had trades.
+
+        Args:
+            ticker (str): the ticker of the asset
+            limit (int, optional): the number of bars to return. Defaults to 20.
+            bar_size (str, optional): the bar interval, e.g. '1Min', '15Min', '1H', '1D'. Defaults to '1D'.
+        """
+        if ticker not in self.bars:
+            return []
+        return self.bars[ticker].get(bar_size, limit, trades=self.trade_log.rows(ticker))
     
     async def get_best_ask(self, ticker:str) -> LimitOrder:
         """retrieves the current best ask in the orderbook of an asset
@@ -162,8 +306,9 @@ class Exchange():
         returns:
             LimitOrder
         """
-        if self.books[ticker].asks and self.books[ticker].asks[0]:
-            return self.books[ticker].asks[0]
+        best_ask = self.books[ticker].asks.best
+        if best_ask:
+            return best_ask
         else:
             return LimitOrder(ticker, 0, 0, 'null_quote', OrderSide.SELL, self.datetime)
 
@@ -176,136 +321,265 @@ class Exchange():
         returns:
             LimitOrder
         """
-        if self.books[ticker].bids and self.books[ticker].bids[0]:
-            return self.books[ticker].bids[0]
+        best_bid = self.books[ticker].bids.best
+        if best_bid:
+            return best_bid
         else:
             return LimitOrder(ticker, 0, 0, 'null_quote', OrderSide.BUY, self.datetime)
 
-    async def limit_buy(self, ticker: str, price: float, qty: int, creator: str, fee=0, tif='GTC', position_id=UUID()) -> LimitOrder:
-        has_cash = await self.agent_has_cash(creator, price, qty)
-        if has_cash:
-            if not self.assets[ticker]['type'] == 'crypto':
-                price = round(price,2)
+    async def limit_buy(self, ticker: str, price: float, qty: int, creator: str, fee=0, tif='GTC', position_id=None, order_id=None) -> LimitOrder:
+        scale = self.scales[ticker]
+        if not scale.valid_qty(qty):
+            return LimitOrder("error", 0, 0, 'invalid_lot_size', OrderSide.BUY, self.datetime)
+        ticks = scale.to_ticks(price)
+        account = self.agents.get(creator)
+        if account is not None and self.risk.available_cash(account) >= scale.cash_units(ticks, qty):
+            price = scale.to_price(ticks)
+            book = self.books[ticker]
             # check if we can match trades before submitting the limit order
             unfilled_qty = qty
             while unfilled_qty > 0:
-                if tif == 'TEST':
+                if tif == 'TEST' or self.auction:
                     break
-                best_ask = await self.get_best_ask(ticker)
-                if best_ask.creator != 'null_quote' and best_ask.creator != creator and price >= best_ask.price:
+                best_ask = book.asks.best
+                if best_ask is not None and best_ask.creator != creator and ticks >= best_ask.ticks:
                     trade_qty = min(unfilled_qty, best_ask.qty)
                     taker_fee = self.fees.taker_fee(trade_qty)
                     self.fees.total_fee_revenue += taker_fee
                     if(type(fee) is str): fee = float(fee)
                     await self._process_trade(ticker, trade_qty, best_ask.price, creator, best_ask.creator, fee=fee+taker_fee, position_id=position_id)
                     unfilled_qty -= trade_qty
-                    self.books[ticker].asks[0].qty -= trade_qty
-                    self.books[ticker].asks = [ask for ask in self.books[ticker].asks if ask.qty > 0]
+                    self._fill_order(book, best_ask, trade_qty)
                 else:
                     break
-            queue = len(self.books[ticker].bids)
-            for idx, order in enumerate(self.books[ticker].bids):
-                if price > order.price:
-                    queue = idx
-                    break
             maker_fee = 0
             if unfilled_qty > 0:
                 maker_fee = self.fees.maker_fee(unfilled_qty)
                 self.fees.total_fee_revenue += maker_fee
-            new_order = LimitOrder(ticker, price, unfilled_qty, creator, OrderSide.BUY, self.datetime,fee=fee+maker_fee, position_id=position_id)
-            self.books[ticker].bids.insert(queue, new_order)
-            initial_order = new_order
+            new_order = LimitOrder(ticker, price, unfilled_qty, creator, OrderSide.BUY, self.datetime,fee=fee+maker_fee, position_id=position_id, id=order_id if order_id is not None else self.ids(), ticks=ticks)
+            if unfilled_qty > 0:
+                self._rest_order(book, new_order)
+            initial_order = copy(new_order)
             initial_order.qty = qty
             return initial_order
         else:
             return LimitOrder("error", 0, 0, 'insufficient_funds', OrderSide.BUY, self.datetime)
 
-    async def limit_sell(self, ticker: str, price: float, qty: int, creator: str, fee=0, tif='GTC', accounting='FIFO') -> LimitOrder:
-        has_assets = await self.agent_has_assets(creator, ticker, qty)
-        if has_assets:
-            if not self.assets[ticker]['type'] == 'crypto':
-                price = round(price,2)
+    async def limit_sell(self, ticker: str, price: float, qty: int, creator: str, fee=0, tif='GTC', accounting='FIFO', order_id=None) -> LimitOrder:
+        scale = self.scales[ticker]
+        if not scale.valid_qty(qty):
+            return LimitOrder("error", 0, 0, 'invalid_lot_size', OrderSide.SELL, self.datetime)
+        account = self.agents.get(creator)
+        if account is not None and self.risk.available_assets(account, ticker) >= qty:
+            ticks = scale.to_ticks(price)
+            price = scale.to_price(ticks)
+            book = self.books[ticker]
             unfilled_qty = qty
             # check if we can match trades before submitting the limit order
             while unfilled_qty > 0:
-                if tif == 'TEST':
+                if tif == 'TEST' or self.auction:
                     break
-                best_bid = await self.get_best_bid(ticker)
-                if best_bid.creator != 'null_quote' and best_bid.creator != creator and price <= best_bid.price:
+                best_bid = book.bids.best
+                if best_bid is not None and best_bid.creator != creator and ticks <= best_bid.ticks:
                     trade_qty = min(unfilled_qty, best_bid.qty)
                     taker_fee = self.fees.taker_fee(trade_qty)
                     self.fees.total_fee_revenue += taker_fee
                     if(type(fee) is str): fee = float(fee)
                     await self._process_trade(ticker, trade_qty, best_bid.price, best_bid.creator, creator, accounting, fee=fee+taker_fee)
                     unfilled_qty -= trade_qty
-                    self.books[ticker].bids[0].qty -= trade_qty
-                    self.books[ticker].bids = [bid for bid in self.books[ticker].bids if bid.qty > 0]
+                    self._fill_order(book, best_bid, trade_qty)
                 else:
                     break
-            queue = len(self.books[ticker].asks)
-            for idx, order in enumerate(self.books[ticker].asks):
-                if price < order.price:
-                    queue = idx
-                    break
             maker_fee = 0
             if unfilled_qty > 0:
                 maker_fee = self.fees.maker_fee(unfilled_qty)
                 self.fees.total_fee_revenue += maker_fee
-            new_order = LimitOrder(ticker, price, unfilled_qty, creator, OrderSide.SELL, self.datetime, fee=fee+maker_fee, accounting=accounting)
-            self.books[ticker].asks.insert(queue, new_order)
-            initial_order = new_order
+            new_order = LimitOrder(ticker, price, unfilled_qty, creator, OrderSide.SELL, self.datetime, fee=fee+maker_fee, accounting=accounting, id=order_id if order_id is not None else self.ids(), ticks=ticks)
+            if unfilled_qty > 0:
+                self._rest_order(book, new_order)
+            initial_order = copy(new_order)
             initial_order.qty = qty
             return initial_order
         else:
             return LimitOrder("error", 0, 0, 'insufficient_assets', OrderSide.SELL, self.datetime)
 
+    async def run_auction(self, ticker=None) -> List[dict]:
+        """Clears the resting orders of one or every asset in a uniform-price call auction.
+
+        In auction mode limit orders are not matched on arrival; they rest in the book, which may cross, until the next clock tick.
+        The clearing price is the one that crosses the most quantity, and every fill of the auction trades at it.
+        Bids and asks are filled in price-time priority. An agent's orders never trade with each other, and an order whose agent can no longer settle is cancelled.
+
+        Args:
+            ticker (str, optional): the ticker of the asset. Defaults to None, which clears every asset.
+
+        returns:
+            List[dict]: per asset that crossed, the clearing price, the quantity traded and the fills.
+        """
+        results = []
+        for ticker in ([ticker] if ticker is not None else list(self.books)):
+            result = await self._clear_book(ticker)
+            if result is not None:
+                results.append(result)
+        return results
+
+    async def _clear_book(self, ticker) -> Union[dict, None]:
+        book = self.books[ticker]
+        latest = self.trade_log.get(ticker)
+        reference = latest.latest()['price'] if latest is not None and len(latest) > 0 else None
+        price, volume = clearing_price(book.bids.depth(None), book.asks.depth(None), reference)
+        if price is None:
+            return None
+        bids = [bid for bid in book.bids if bid.price >= price]
+        asks = deque(ask for ask in book.asks if ask.price <= price)
+        fills = []
+        unfilled = volume
+        for bid in bids:
+            skipped = []
+            while bid.qty > 0 and unfilled > 0 and asks:
+                ask = asks.popleft()
+                if ask.creator == bid.creator:
+                    skipped.append(ask)
+                    continue
+                trade_qty = min(bid.qty, ask.qty, unfilled)
+                # both orders rest with their cash or assets reserved, and the clearing price is within both limits
+                await self._process_trade(ticker, trade_qty, price, bid.creator, ask.creator, ask.accounting, position_id=bid.position_id)
+                self._fill_order(book, bid, trade_qty)
+                self._fill_order(book, ask, trade_qty)
+                unfilled -= trade_qty
+                fills.append({'qty': trade_qty, 'price': price, 'buyer': bid.creator, 'seller': ask.creator})
+                if ask.qty > 0:
+                    asks.appendleft(ask)
+            asks.extendleft(reversed(skipped))
+            if unfilled <= 0:
+                break
+        if not fills:
+            return None
+        return {'ticker': ticker, 'price': price, 'qty': volume - unfilled, 'fills': fills}
+
+    # every change to a book goes through these three, which keep the order index, the reservations and the market-data feed in step with it
+    def _rest_order(self, book: OrderBook, order: LimitOrder) -> None:
+        book.add(order)
+        self.order_index.add(order)
+        self.risk.hold(order, self.scales[order.ticker])
+        if self.feed is not None:
+            self.feed.level(book, order)
+
+    def _fill_order(self, book: OrderBook, order: LimitOrder, qty: int) -> None:
+        book.fill(order, qty)
+        self.risk.release(order, qty, self.scales[order.ticker])
+        if order.qty <= 0:
+            self.order_index.remove(order.id)
+        if self.feed is not None:
+            self.feed.level(book, order)
+
+    def _remove_order(self, book: OrderBook, order: LimitOrder) -> bool:
+        self.order_index.remove(order.id)
+        removed = book.remove(order)
+        if removed:
+            self.risk.release(order, order.qty, self.scales[order.ticker])
+            if self.feed is not None:
+                self.feed.level(book, order)
+        return removed
+
+    def _cancel_over_committed(self, account: Account) -> None:
+        """Cancels an agent's resting buy orders, newest first, until its cash covers the rest again after cash was taken outside of trading.
+        """
+        orders = self.order_index.get_agent_orders(account.name)
+        for order in sorted(orders, key=lambda order: order.dt, reverse=True):
+            if self.risk.available_cash(account) >= 0:
+                break
+            if order.type == OrderSide.BUY:
+                self._remove_order(self.books[order.ticker], order)
+
     async def get_order(self, ticker, id) -> LimitOrder:
-        if ticker in self.books:
-            bid = next(([idx,o] for idx, o in enumerate(self.books[ticker].bids) if o.id == id),None)
-            if bid:
-                return bid[1]
-            ask = next(([idx,o] for idx, o in enumerate(self.books[ticker].asks) if o.id == id),None)
-            if ask:
-                return ask[1]
+        entry = self.order_index.get(id)
+        if entry is not None and entry[0] == ticker:
+            return entry[2]
         return {'error': 'order not found'}
 
     async def cancel_order(self, id) -> dict:
-        for book in self.books:
-            bid = next(([idx,o] for idx, o in enumerate(self.books[book].bids) if o.id == id),None)
-            if bid:
-                self.books[book].bids[bid[0]]
-                self.books[book].bids.pop(bid[0])
-                return {"cancelled_order": id}
-            ask = next(([idx,o] for idx, o in enumerate(self.books[book].asks) if o.id == id),None)
-            if ask:
-                self.books[book].asks.pop(ask[0])
+        entry = self.order_index.get(id)
+        if entry is not None:
+            ticker, side, order = entry
+            if self._remove_order(self.books[ticker], order):
                 return {"cancelled_order": id}
         return {"cancelled_order": "order not found"}
 
-    async def cancel_all_orders(self, agent, ticker) -> dict:
-        self.books[ticker].bids = [b for b in self.books[ticker].bids if b.creator != agent]
-        self.books[ticker].asks = [a for a in self.books[ticker].asks if a.creator != agent]
+    async def get_order_index_stats(self) -> dict:
+        """returns the number of indexed resting orders and the hit/miss counts of order lookups.
+        """
+        return self.order_index.stats()
+
+    async def cancel_all_orders(self, agent, ticker=None) -> dict:
+        """Cancels every resting order of an agent on a ticker, or on every ticker if none is given.
+
+        Args:
+            agent (str): the name of the agent
+            ticker (str, optional): the ticker of the asset. Defaults to None, which cancels across all tickers.
+        """
+        orders = self.order_index.get_agent_orders(agent, ticker)
+        for order in orders:
+            self._remove_order(self.books[order.ticker], order)
+        if ticker is None:
+            return {"cancelled_all_orders": sorted({order.ticker for order in orders})}
         return {"cancelled_all_orders": ticker}
 
+    async def submit_batch(self, actions: List[dict]) -> List[dict]:
+        """Runs a list of order and cancel actions in order, in one pass.
+
+        Args:
+            actions (List[dict]): each action has a 'topic' of 'limit_buy', 'limit_sell', 'market_buy', 'market_sell', 'cancel_order' or 'cancel_all_orders',
+            and the same fields as the request for that topic.
+
+        returns:
+            List[dict]: the result of each action, in the order they were given. An action that cannot be run gets an {'error': ...} result and does not stop the others.
+        """
+        results = []
+        for action in actions:
+            try:
+                topic = action['topic']
+                if topic == 'limit_buy': result = (await self.limit_buy(action['ticker'], action['price'], action['qty'], action['creator'], action.get('fee', 0))).to_dict()
+                elif topic == 'limit_sell': result = (await self.limit_sell(action['ticker'], action['price'], action['qty'], action['creator'], action.get('fee', 0))).to_dict()
+                elif topic == 'market_buy': result = await self.market_buy(action['ticker'], action['qty'], action['buyer'], action.get('fee', 0))
+                elif topic == 'market_sell': result = await self.market_sell(action['ticker'], action['qty'], action['seller'], action.get('fee', 0))
+                elif topic == 'cancel_order': result = await self.cancel_order(action['order_id'])
+                elif topic == 'cancel_all_orders': result = await self.cancel_all_orders(action['agent'], action.get('ticker'))
+                else: result = {'error': f'unknown batch action {topic}'}
+            except KeyError as e:
+                result = {'error': f'missing or unknown {e} in batch action'}
+            results.append(result)
+        return results
+
     async def market_buy(self, ticker: str, qty: int, buyer: str, fee=0.0) -> dict:
+        if not self.scales[ticker].valid_qty(qty):
+            return {"market_buy": "invalid lot size"}
         best_price = (await self.get_best_ask(ticker)).price
         has_cash = (await self.agent_has_cash(buyer, best_price, qty))
         if has_cash:
+            scale = self.scales[ticker]
+            account = self.agents.get(buyer)
+            book = self.books[ticker]
             fills = []
-            for idx, ask in enumerate(self.books[ticker].asks):
+            for ask in book.asks:
                 if ask.creator == buyer:
                     continue
                 trade_qty = min(ask.qty, qty)
-                self.books[ticker].asks[idx].qty -= trade_qty
+                # only the best price was checked, so fills further down the book are capped to what the buyer can still pay for
+                lot_cost = scale.cash_units(ask.ticks, scale.lot_size)
+                if lot_cost > 0:
+                    trade_qty = min(trade_qty, self.risk.available_cash(account) // lot_cost * scale.lot_size)
+                if trade_qty <= 0:
+                    break
                 qty -= trade_qty
                 taker_fee = self.fees.taker_fee(qty)
                 self.fees.total_fee_revenue += taker_fee
                 if(type(fee) is str): fee = float(fee)
                 fills.append({'qty': trade_qty, 'price': ask.price, 'fee': fee+taker_fee})
                 await self._process_trade(ticker, trade_qty,ask.price, buyer, ask.creator, fee=fee+taker_fee)
+                self._fill_order(book, ask, trade_qty)
                 if qty == 0:
                     break
-            self.books[ticker].asks = [ask for ask in self.books[ticker].asks if ask.qty > 0]
             if(fills == []):
                 return {"market_buy": "no fills"}
             return {"market_buy": ticker, "buyer": buyer, "fills": fills}
@@ -313,22 +587,24 @@ class Exchange():
             return {"market_buy": "insufficient funds"}
 
     async def market_sell(self, ticker: str, qty: int, seller: str, fee=0.0, accounting='FIFO') -> dict:
+        if not self.scales[ticker].valid_qty(qty):
+            return {"market_sell": "invalid lot size"}
         if await self.agent_has_assets(seller, ticker, qty):
+            book = self.books[ticker]
             fills = []
-            for idx, bid in enumerate(self.books[ticker].bids):
+            for bid in book.bids:
                 if bid.creator == seller:
                     continue
                 trade_qty = min(bid.qty, qty)
-                self.books[ticker].bids[idx].qty -= trade_qty
                 qty -= trade_qty
                 taker_fee = self.fees.taker_fee(qty)
                 self.fees.total_fee_revenue += taker_fee
                 if(type(fee) is str): fee = float(fee)
                 fills.append({'qty': trade_qty, 'price': bid.price, 'fee': fee+taker_fee})
                 await self._process_trade(ticker, trade_qty,bid.price, bid.creator, seller, accounting, fee=fee+taker_fee)
+                self._fill_order(book, bid, trade_qty)
                 if qty == 0:
                     break
-            self.books[ticker].bids = [bid for bid in self.books[ticker].bids if bid.qty > 0]
             if(fills == []):
                 return {"market_sell": "no fills"}
             return {"market_sell": ticker, "seller": seller, "fills": fills }
@@ -336,131 +612,124 @@ class Exchange():
             return {"market_sell": "insufficient assets"}
 
     async def agent_has_cash(self, agent, price, qty) -> bool:
-        agent_cash = (await self.get_cash(agent))
-        return agent_cash['cash'] >= price * qty
+        """returns whether an agent's cash not held by its resting orders covers price * qty.
+        """
+        account = self.agents.get(agent)
+        return account is not None and self.risk.available_cash(account) >= to_cash_units(price * qty)
     
     async def agent_has_assets(self, agent, ticker, qty) -> bool:
-        agent_assets = (await self.get_assets(agent))
-        if ticker in agent_assets['assets']:
-            return agent_assets['assets'][ticker] >= qty
+        """returns whether an agent holds qty of an asset that its resting orders are not already selling.
+        """
+        account = self.agents.get(agent)
+        if account is not None and ticker in account.assets:
+            return self.risk.available_assets(account, ticker) >= qty
         else: 
             return False
         
     @property
     async def trades(self) -> pd.DataFrame:
-        return pd.DataFrame.from_records([t.to_dict() for t in self.trade_log]).set_index('dt')
+        return pd.DataFrame.from_records(list(self.trade_log)).set_index('dt')
 
     async def _set_datetime(self, dt) -> None:
+        if self.auction and dt != self.datetime:
+            await self.run_auction()
         self.datetime = dt
 
     async def get_transactions(self, agent) -> dict:
         return {'transactions':(await self.get_agent(agent))['_transactions']}
 
-    async def register_agent(self, name, initial_cash) -> dict:
+    async def register_agent(self, name, initial_cash, registered_name=None) -> dict:
         #TODO: use an agent class???
-        registered_name = name + str(UUID())[0:8]
-        self.agents.append({'name':registered_name,'cash':initial_cash,'_transactions':[], 'positions':[], 'assets': {}})
+        if registered_name is None:
+            registered_name = name + str(UUID())[0:8]
+        elif registered_name in self.agents:
+            # a journaled name is replayed as given, but it must not replace an account that already exists
+            return {'error': f'agent {registered_name} already exists'}
+        self.agents.add(Account(registered_name, initial_cash))
         return {'registered_agent':registered_name}
 
     async def get_cash(self, agent_name) -> dict:
-        agent_info = await self.get_agent(agent_name)
-        return {'cash':agent_info['cash']}
+        account = self.agents.get(agent_name)
+        if account is None:
+            return {'error': 'agent not found'}
+        return {'cash':account.cash}
     
     async def get_assets(self, agent) -> dict:
-        agent_info = await self.get_agent(agent)
-        return {'assets': agent_info['assets']}
+        account = self.agents.get(agent)
+        if account is None:
+            return {'error': 'agent not found'}
+        return {'assets': account.assets}
     
     async def __update_agents(self, transaction, accounting, position_id) -> None:
+        # an agent trading with itself (the seed trade in create_asset) opens a position without closing one
+        wash_trade = len(transaction) == 2 and transaction[0]['agent'] == transaction[1]['agent']
         for side in transaction:
-            agent_idx = await self.__get_agent_index(side['agent'])
-            if agent_idx is not None:
-                self.agents[agent_idx]['cash'] += side['cash_flow']
-                sided_transaction = Transaction(side['cash_flow'], side['ticker'], side['qty'], side['dt'], side['type']).to_dict()
+            account = self.agents.get(side['agent'])
+            if account is not None:
+                account.cash_units += side['cash_units'] if 'cash_units' in side else to_cash_units(side['cash_flow'])
+                sided_transaction = Transaction(side['cash_flow'], side['ticker'], side['qty'], side['dt'], side['type'], self.ids()).to_dict()
                 if side['type'] == 'buy':
-                    new_position = True
-                    for position in self.agents[agent_idx]['positions']:
-                        if position['id'] == position_id:
-                            new_position = False
-                            self.agents[agent_idx]['positions'][idx]['qty'] += side['qty']
-                            self.agents[agent_idx]['positions'][idx]['enters'].append(sided_transaction)
-                            break
-                    if new_position:
-                        self.agents[agent_idx]['positions'].append(Position(UUID(), side['ticker'], side['qty'], side['dt'], enters=[sided_transaction]).to_dict())
-                        
-                elif side['type'] == 'sell':
-                    if accounting == 'FIFO':
-                        self.agents[agent_idx]['positions'].sort(key=lambda x: x['dt'])
-                    if accounting == 'LIFO':
-                        self.agents[agent_idx]['positions'].sort(key=lambda x: x['dt'], reverse=True)
-                    for idx, position in enumerate(self.agents[agent_idx]['positions']):
-                        if position['ticker'] == side['ticker']:
-                            while side['qty'] > 0:
-                                for enter in self.agents[agent_idx]['positions'][idx]['enters']:
-                                    if enter['qty'] >= side['qty']:
-                                        self.agents[agent_idx]['positions'][idx]['qty'] -= side['qty']
-                                        self.agents[agent_idx]['positions'][idx]['exits'].append(Exit(side['cash_flow'], side['ticker'], side['qty'], side['dt'], side['type'], side['cash_flow']-enter['cash_flow'], enter['id'], enter['dt']).to_dict())
-                                        side['qty'] = 0
-                                        break
-                                    else:
-                                        self.agents[agent_idx]['positions'][idx]['exits'].append(Exit(side['cash_flow'], side['ticker'], side['qty'], side['dt'], side['type'], side['cash_flow']-enter['cash_flow'], enter['id'], enter['dt']).to_dict())
-                                        side['qty'] -= self.agents[agent_idx]['positions'][idx]['qty']
-                                        self.agents[agent_idx]['positions'][idx]['qty'] = 0
-                            break
-                self.agents[agent_idx]['_transactions'].append(sided_transaction)
-                if side['ticker'] in self.agents[agent_idx]['assets']: 
-                    self.agents[agent_idx]['assets'][side['ticker']] += side['qty']
+                    self.positions.enter(account, sided_transaction, position_id)
+                elif side['type'] == 'sell' and not wash_trade:
+                    self.positions.exit(account, sided_transaction, accounting)
+                account._transactions.append(sided_transaction)
+                if side['ticker'] in account.assets: 
+                    account.assets[side['ticker']] += side['qty']
                 else: 
-                    self.agents[agent_idx]['assets'][side['ticker']] = side['qty']
+                    account.assets[side['ticker']] = side['qty']
+                self.holdings.add(account.name, side['ticker'], side['qty'])
                 
     async def __update_agents_currency(self, transaction) -> None:
         if transaction.confirmed:
-            buyer_idx = await self.__get_agent_index(transaction.recipient)
-            seller_idx = await self.__get_agent_index(transaction.sender)
-            if(buyer_idx is None or seller_idx is None):
+            buyer = self.agents.get(transaction.recipient)
+            seller = self.agents.get(transaction.sender)
+            if(buyer is None or seller is None):
                 return None
-            buyer = self.agents[buyer_idx]
-            seller = self.agents[seller_idx]
             #TODO: have cash be an asset that is some currency
-            buyer['cash'] -= transaction.amount + transaction.fee #NOTE: transaction.fee includes the exchange fee and the network fee
-            seller['cash'] += transaction.amount
-            buyer['_transactions'].append({'dt':self.datetime,'cash_flow':-(transaction.amount+transaction.fee),'ticker':transaction.ticker,'qty':transaction.amount})
-            seller['_transactions'].append({'dt':self.datetime,'cash_flow':transaction.amount,'ticker':transaction.ticker,'qty':transaction.amount})
+            buyer.cash -= transaction.amount + transaction.fee #NOTE: transaction.fee includes the exchange fee and the network fee
+            seller.cash += transaction.amount
+            buyer._transactions.append({'dt':self.datetime,'cash_flow':-(transaction.amount+transaction.fee),'ticker':transaction.ticker,'qty':transaction.amount})
+            seller._transactions.append({'dt':self.datetime,'cash_flow':transaction.amount,'ticker':transaction.ticker,'qty':transaction.amount})
 
     async def get_agent(self, agent_name)  -> dict:
-        return next((d for (index, d) in enumerate(self.agents) if d['name'] == agent_name), {'error': 'agent not found'})
+        account = self.agents.get(agent_name)
+        if account is None:
+            return {'error': 'agent not found'}
+        return account.to_dict()
 
     async def __get_agent_index(self,agent_name) -> dict:
-        return next((index for (index, d) in enumerate(self.agents) if d['name'] == agent_name), None)
+        return self.agents.index(agent_name)
     
     async def get_agents(self) -> dict:
-        return self.agents
+        return [account.to_dict() for account in self.agents]
     
     async def total_cash(self) -> float:
-        return sum(agent['cash'] for agent in self.agents if 'init_seed' not in agent['name'])
+        return sum(agent.cash for agent in self.agents if 'init_seed' not in agent.name)
     
     async def agents_cash(self) -> dict:
         info = []
         for agent in self.agents:
-            if agent['name'] != 'init_seed':
+            if agent.name != 'init_seed':
                 last_action = None
-                if len(agent['_transactions']) > 0:
-                    last_action =agent['_transactions'][-1]['type']
-                info.append({agent['name']: {'cash':agent['cash'],'assets':agent['assets'], 'last_action': last_action }})
+                if len(agent._transactions) > 0:
+                    last_action =agent._transactions[-1]['type']
+                info.append({agent.name: {'cash':agent.cash,'assets':agent.assets, 'last_action': last_action }})
         return info
     
     async def add_cash(self, agent, amount) -> dict:
-        agent_idx = await self.__get_agent_index(agent)
-        if agent_idx is not None:
-            self.agents[agent_idx]['cash'] += amount
-            return {'cash':self.agents[agent_idx]['cash']}
+        account = self.agents.get(agent)
+        if account is not None:
+            account.cash += amount
+            return {'cash':account.cash}
         else:
             return {'error': 'agent not found'}
 
     async def remove_cash(self, agent, amount, notes='') -> dict:
-        agent_idx = await self.__get_agent_index(agent)
-        if agent_idx is not None:
-            self.agents[agent_idx]['cash'] -= amount
-            return {'cash':self.agents[agent_idx]['cash']}
+        account = self.agents.get(agent)
+        if account is not None:
+            account.cash -= amount
+            self._cancel_over_committed(account)
+            return {'cash':account.cash}
         else:
             return {'error': 'agent not found'}
 
@@ -480,37 +749,25 @@ class Exchange():
         
         ticker: the ticker of the asset
         """
-        shares_outstanding = 0
-        for agent in self.agents:
-            if ticker in agent['assets']:
-                shares_outstanding += agent['assets'][ticker]
-        return shares_outstanding
+        return self.holdings.get_outstanding(ticker)
     
     async def get_agents_holding(self, ticker) -> list:
         """
-        Returns a list of agents holding a given ticker
+        Returns a list of agents that hold or have held a given ticker, in the order they registered
         Args: 
         
         ticker: the ticker of the asset
         """
-        agents_holding = []
-        for agent in self.agents:
-            if ticker in agent['assets']:
-                agents_holding.append(agent['name'])
-        return agents_holding
+        return sorted((agent for agent in self.holdings.get_holders(ticker) if agent in self.agents), key=self.agents.index)
     
     async def get_agents_positions(self,ticker) -> list:
         """
-        Returns a list of agents positions of a given ticker
+        Returns a list of every agent with its positions of a given ticker, empty for the agents that never held it.
+        If ticker is None, returns all the positions of every agent
         """
-        agent_positions = []
-        for agent in self.agents:
-            positions = []
-            for position in agent['positions']:
-                if ticker is None or position['ticker'] == ticker:
-                    positions.append(position)
-            agent_positions.append({'agent':agent['name'],'positions':positions})
-        return agent_positions
+        if ticker is None:
+            return [{'agent':agent.name,'positions':agent.positions} for agent in self.agents]
+        return [{'agent':agent.name,'positions':list(self.positions.get_positions(agent.name, ticker))} for agent in self.agents]
     
     async def get_agents_simple(self) -> list:
         """
@@ -518,7 +775,7 @@ class Exchange():
         """
         agents_simple = []
         for agent in self.agents:
-            agents_simple.append({'agent':agent['name'],'cash':agent['cash'],'assets':agent['assets']})
+            agents_simple.append({'agent':agent.name,'cash':agent.cash,'assets':agent.assets})
         return agents_simple
     
     async def get_positions(self, agent, page_size=10, page=1) -> dict:
@@ -526,15 +783,13 @@ class Exchange():
         if "error" in agent_info:
             return agent_info
         
-        positions = agent_info['positions']
-        positions.sort(key=lambda position: position['dt'], reverse=True)
-
+        # positions are kept in the order they were opened, so the newest page is read from the back without sorting
         positions = agent_info['positions']
         total_positions = len(positions)
         total_pages = math.ceil(total_positions / page_size)
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
-        paginated_positions = positions[start_idx:end_idx]
+        paginated_positions = [positions[total_positions - 1 - idx] for idx in range(start_idx, min(end_idx, total_positions))]
 
         next_page = page + 1 if end_idx < total_positions else None
 
@@ -5,8 +5,8 @@ sys.path.append(parent_dir)
 from source.Requests import Requests
 
 class ExchangeRequests(Requests):
-    def __init__(self, requester, cache=False):
-        super().__init__(requester, cache)
+    def __init__(self, requester, cache=False, cache_policies=None, cache_size=1024):
+        super().__init__(requester, cache, cache_policies, cache_size)
 
     async def get_sim_time(self):
         return await self.make_request('sim_time', {}, self.requester)
@@ -26,12 +26,18 @@ class ExchangeRequests(Requests):
     async def get_latest_trade(self, ticker):
         return await self.make_request('latest_trade', {'ticker': ticker}, self.requester)
 
-    async def get_trades(self, ticker, limit):
-        return await self.make_request('trades', {'ticker': ticker, 'limit': limit}, self.requester)
+    async def get_trades(self, ticker, limit, start=None, end=None):
+        return await self.make_request('trades', {'ticker': ticker, 'limit': limit, 'start': start, 'end': end}, self.requester)
 
     async def get_quotes(self, ticker):
         return await self.make_request('quotes', {'ticker': ticker}, self.requester)
 
+    async def get_depth(self, ticker, limit=10):
+        return await self.make_request('depth', {'ticker': ticker, 'limit': limit}, self.requester)
+
+    async def request_market_data_snapshot(self, ticker):
+        return await self.make_request('market_data_snapshot', {'ticker': ticker}, self.requester)
+
     async def get_best_bid(self, ticker):
         return await self.make_request('best_bid', {'ticker': ticker}, self.requester)
 
@@ -53,6 +59,9 @@ class ExchangeRequests(Requests):
     async def cancel_all_orders(self, ticker, agent):
         return await self.make_request('cancel_all_orders', {'ticker': ticker, 'agent': agent}, self.requester)
 
+    async def submit_batch(self, actions):
+        return await self.make_request('batch', {'actions': actions}, self.requester)
+
     async def market_buy(self, ticker, quantity, creator, fee=0.0):
         return await self.make_request('market_buy', {'ticker': ticker, 'qty': quantity, 'buyer': creator, 'fee': fee}, self.requester)
     
@@ -90,4 +99,16 @@ class ExchangeRequests(Requests):
         return await self.make_request('get_agents_simple', {}, self.requester)
     
     async def get_positions(self, agent, page_size=10, page=1):
-        return await self.make_request('get_positions', {'agent': agent, 'page_size': page_size, "page": page}, self.requester)
\ No newline at end of file
+        return await self.make_request('get_positions', {'agent': agent, 'page_size': page_size, "page": page}, self.requester)
+
+    async def snapshot(self, name):
+        return await self.make_request('snapshot', {'name': name}, self.requester)
+
+    async def restore(self, name):
+        return await self.make_request('restore', {'name': name}, self.requester)
+
+    async def get_order_index_stats(self):
+        return await self.make_request('order_index_stats', {}, self.requester)
+
+    async def get_stats(self):
+        return await self.make_request('stats', {}, self.requester)
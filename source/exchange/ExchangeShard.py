@@ -0,0 +1,210 @@
+import zlib
+from typing import Iterable, List, Optional
+from .Exchange import Exchange
+from .TopicDispatcher import TopicDispatcher
+from .types.Account import Account
+from .types.LimitOrder import LimitOrder
+from .types.OrderSide import OrderSide
+from .types.TickScale import from_cash_units
+
+def shard_for(ticker: str, shards: int) -> int:
+    """returns the index of the shard that owns a ticker. The same ticker always maps to the same shard, in every process.
+    """
+    return zlib.crc32(ticker.encode('utf-8')) % shards
+
+def shard_name(idx: int) -> str:
+    return f'shard_{idx}'
+
+def shard_for_order(order_id: str, shards: int) -> Optional[int]:
+    """returns the index of the shard holding an order, from the shard name its id is prefixed with or, for a seed order, from its ticker.
+    returns None if the id does not tell.
+    """
+    prefix, _, rest = order_id.partition('.')
+    if rest and prefix.startswith('shard_') and prefix[6:].isdigit() and int(prefix[6:]) < shards:
+        return int(prefix[6:])
+    if order_id.startswith('init_seed_') and order_id.endswith(('_bid', '_ask')):
+        return shard_for(order_id[len('init_seed_'):-4], shards)
+    return None
+
+class ExchangeShard():
+    """An Exchange that owns a subset of the tickers and keeps agent balances in step with a central Ledger.
+
+    The shard's accounts only hold what the ledger has reserved for it. Before an order is placed the shard reserves what it could spend:
+    price * qty on the asset's price grid for a limit buy, the cost of taking qty from the resting asks for a market buy, the quantity for a sell.
+    After the request it keeps just what the agents' resting orders still need and settles everything else back to the ledger,
+    so fills, price improvement and cancels are all returned the same way.
+    """
+    def __init__(self, name: str, ledger, exchange: Exchange=None):
+        """
+        Args:
+            name (str): the name of the shard, used as its key in the ledger.
+            ledger (Ledger or LedgerRequests): anything with the ledger's async reserve and settle methods.
+            exchange (Exchange, optional): the exchange holding the shard's books. Defaults to a new Exchange.
+        """
+        self.name = name
+        self.ledger = ledger
+        self.exchange = exchange if exchange is not None else Exchange()
+        # keeps order, transaction and position ids unique across shards
+        self.exchange.ids.prefix = name + '.'
+
+    def __repr__(self) -> str:
+        return f'<ExchangeShard: {self.name} {list(self.exchange.books)}>'
+
+    def dispatcher(self) -> TopicDispatcher:
+        """returns the shard's request handlers: the order topics go through the shard, so that they reserve and settle with the ledger, and the reads go straight to its exchange.
+        """
+        dispatcher = TopicDispatcher(self.exchange)
+        dispatcher.register('create_asset', lambda msg: self.create_asset(msg['ticker'], msg['asset_type'], msg['qty'], msg['seed_price'], msg['seed_bid'], msg['seed_ask'], msg.get('tick_size'), msg.get('lot_size')))
+        dispatcher.register('limit_buy', lambda msg: self.limit_buy(msg['ticker'], msg['price'], msg['qty'], msg['creator'], msg['fee']), LimitOrder.to_dict)
+        dispatcher.register('limit_sell', lambda msg: self.limit_sell(msg['ticker'], msg['price'], msg['qty'], msg['creator'], msg['fee']), LimitOrder.to_dict)
+        dispatcher.register('market_buy', lambda msg: self.market_buy(msg['ticker'], msg['qty'], msg['buyer'], msg['fee']))
+        dispatcher.register('market_sell', lambda msg: self.market_sell(msg['ticker'], msg['qty'], msg['seller'], msg['fee']))
+        dispatcher.register('cancel_order', lambda msg: self.cancel_order(msg['order_id']))
+        dispatcher.register('cancel_all_orders', lambda msg: self.cancel_all_orders(msg['agent'], msg.get('ticker')))
+        dispatcher.register('batch', lambda msg: self.submit_batch(msg['actions']))
+        return dispatcher
+
+    def _account(self, agent) -> Account:
+        account = self.exchange.agents.get(agent)
+        if account is None:
+            account = Account(agent, 0)
+            self.exchange.agents.add(account)
+        return account
+
+    async def _reserve(self, agent, cash=0, ticker=None, qty=0) -> bool:
+        reservation = await self.ledger.reserve(self.name, agent, cash, ticker, qty)
+        if not isinstance(reservation, dict) or not reservation.get('reserved'):
+            return False
+        account = self._account(agent)
+        account.cash += reservation['cash']
+        if reservation['qty']:
+            account.assets[ticker] = account.assets.get(ticker, 0) + reservation['qty']
+        return True
+
+    def _notional(self, ticker, price, qty) -> float:
+        """returns what a limit buy can spend, with its price rounded to the tick as the exchange's risk check counts it.
+        """
+        scale = self.exchange.scales[ticker]
+        return from_cash_units(scale.cash_units(scale.to_ticks(price), qty))
+
+    def _market_notional(self, ticker, qty, buyer) -> float:
+        """returns the most a market buy can spend: the cost of taking qty from the asks it would trade against, best first.
+        """
+        scale = self.exchange.scales[ticker]
+        units = 0
+        for ask in self.exchange.books[ticker].asks:
+            if ask.creator == buyer:
+                continue
+            take = min(ask.qty, qty)
+            units += scale.cash_units(ask.ticks, take)
+            qty -= take
+            if qty <= 0:
+                break
+        return from_cash_units(units)
+
+    def _trade_seq(self, ticker) -> int:
+        tape = self.exchange.trade_log.get(ticker)
+        return tape.next_seq if tape is not None else 0
+
+    def _traders_since(self, ticker, seq) -> List[str]:
+        count = self._trade_seq(ticker) - seq
+        if count <= 0:
+            return []
+        return [agent for trade in self.exchange.trade_log.tail(ticker, count) for agent in (trade['buyer'], trade['seller'])]
+
+    async def _settle(self, agents: Iterable[str]) -> None:
+        """Keeps in each agent's shard account what its resting orders need, and reports the rest to the ledger as released.
+        """
+        balances = {}
+        for agent in dict.fromkeys(agents):
+            account = self.exchange.agents.get(agent)
+            if account is None:
+                continue
+            # what the agent's resting orders need is what the exchange's risk check has reserved for them
+            needed_units = self.exchange.risk.reserved_cash(agent)
+            needed_cash = from_cash_units(needed_units)
+            needed_assets = dict(self.exchange.risk.reserved_assets(agent))
+            release_assets = {}
+            for ticker, qty in account.assets.items():
+                if qty != needed_assets.get(ticker, 0):
+                    release_assets[ticker] = qty - needed_assets.get(ticker, 0)
+            balances[agent] = {
+                'cash': needed_cash,
+                'assets': needed_assets,
+                'release_cash': from_cash_units(account.cash_units - needed_units),
+                'release_assets': release_assets
+            }
+            account.cash_units = needed_units
+            account.assets.clear()
+            account.assets.update(needed_assets)
+        if balances:
+            await self.ledger.settle(self.name, balances)
+
+    async def create_asset(self, ticker: str, asset_type='stock', market_qty=1000, seed_price=100, seed_bid=.99, seed_ask=1.01, tick_size=None, lot_size=None) -> dict:
+        asset = await self.exchange.create_asset(ticker, asset_type, market_qty, seed_price, seed_bid, seed_ask, tick_size, lot_size)
+        await self._settle(['init_seed_'+ticker])
+        return asset
+
+    async def limit_buy(self, ticker: str, price: float, qty: int, creator: str, fee=0) -> LimitOrder:
+        if not await self._reserve(creator, cash=self._notional(ticker, price, qty)):
+            return LimitOrder("error", 0, 0, 'insufficient_funds', OrderSide.BUY, self.exchange.datetime)
+        seq = self._trade_seq(ticker)
+        order = await self.exchange.limit_buy(ticker, price, qty, creator, fee)
+        await self._settle([creator] + self._traders_since(ticker, seq))
+        return order
+
+    async def limit_sell(self, ticker: str, price: float, qty: int, creator: str, fee=0) -> LimitOrder:
+        if not await self._reserve(creator, ticker=ticker, qty=qty):
+            return LimitOrder("error", 0, 0, 'insufficient_assets', OrderSide.SELL, self.exchange.datetime)
+        seq = self._trade_seq(ticker)
+        order = await self.exchange.limit_sell(ticker, price, qty, creator, fee)
+        await self._settle([creator] + self._traders_since(ticker, seq))
+        return order
+
+    async def market_buy(self, ticker: str, qty: int, buyer: str, fee=0.0) -> dict:
+        # a buyer that cannot cover the whole walk reserves all it has instead, as the exchange caps its fills to the buyer's cash
+        if not await self._reserve(buyer, cash=self._market_notional(ticker, qty, buyer)) and not await self._reserve(buyer, cash=None):
+            return {"market_buy": "insufficient funds"}
+        seq = self._trade_seq(ticker)
+        result = await self.exchange.market_buy(ticker, qty, buyer, fee)
+        await self._settle([buyer] + self._traders_since(ticker, seq))
+        return result
+
+    async def market_sell(self, ticker: str, qty: int, seller: str, fee=0.0) -> dict:
+        if not await self._reserve(seller, ticker=ticker, qty=qty):
+            return {"market_sell": "insufficient assets"}
+        seq = self._trade_seq(ticker)
+        result = await self.exchange.market_sell(ticker, qty, seller, fee)
+        await self._settle([seller] + self._traders_since(ticker, seq))
+        return result
+
+    async def cancel_order(self, id) -> dict:
+        entry = self.exchange.order_index.get(id)
+        result = await self.exchange.cancel_order(id)
+        if entry is not None:
+            await self._settle([entry[2].creator])
+        return result
+
+    async def cancel_all_orders(self, agent, ticker=None) -> dict:
+        result = await self.exchange.cancel_all_orders(agent, ticker)
+        await self._settle([agent])
+        return result
+
+    async def submit_batch(self, actions: List[dict]) -> List[dict]:
+        """Runs a list of order and cancel actions in order, reserving and settling each one like a single request.
+        """
+        results = []
+        for action in actions:
+            try:
+                topic = action['topic']
+                if topic == 'limit_buy': result = (await self.limit_buy(action['ticker'], action['price'], action['qty'], action['creator'], action.get('fee', 0))).to_dict()
+                elif topic == 'limit_sell': result = (await self.limit_sell(action['ticker'], action['price'], action['qty'], action['creator'], action.get('fee', 0))).to_dict()
+                elif topic == 'market_buy': result = await self.market_buy(action['ticker'], action['qty'], action['buyer'], action.get('fee', 0))
+                elif topic == 'market_sell': result = await self.market_sell(action['ticker'], action['qty'], action['seller'], action.get('fee', 0))
+                elif topic == 'cancel_order': result = await self.cancel_order(action['order_id'])
+                elif topic == 'cancel_all_orders': result = await self.cancel_all_orders(action['agent'], action.get('ticker'))
+                else: result = {'error': f'unknown batch action {topic}'}
+            except KeyError as e:
+                result = {'error': f'missing or unknown {e} in batch action'}
+            results.append(result)
+        return results
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Iterator, List
+from uuid import uuid4 as UUID
+
+JOURNALED_TOPICS = {'create_asset', 'limit_buy', 'limit_sell', 'market_buy', 'market_sell', 'cancel_order', 'cancel_all_orders', 'batch', 'add_cash', 'remove_cash', 'register_agent'}
+
+class Journal():
+    """A write-ahead log of the requests that change an exchange's state, one JSON line per request, each with a sequence number and the exchange time.
+
+    Lines are buffered and written with one fsync per `batch_size` requests or per `flush_interval` seconds, whichever comes first,
+    so a crash loses at most the last unsynced batch instead of paying for an fsync on every message.
+    append only sees the interval pass when another request arrives, so a quiet exchange runs flush_periodically to sync its last batch.
+    """
+    def __init__(self, path='exchange.journal', batch_size=256, flush_interval=0.05, reset=False):
+        """
+        Args:
+            path (str, optional): the journal file. Defaults to 'exchange.journal'.
+            batch_size (int, optional): the number of buffered requests that triggers an fsync. Defaults to 256.
+            flush_interval (float, optional): the maximum seconds a buffered request waits for an fsync. Defaults to 0.05.
+            reset (bool, optional): start a new journal instead of appending to the file. Defaults to False.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending: List[str] = []
+        self.last_flush = time.time()
+        self.seq = 0
+        if reset and os.path.exists(path):
+            os.remove(path)
+        elif os.path.exists(path):
+            for entry in Journal.read(path):
+                self.seq = entry['seq']
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __repr__(self) -> str:
+        return f'<Journal: {self.path} @ {self.seq}>'
+
+    @staticmethod
+    def stamp(msg: dict, seq: int) -> dict:
+        """Assigns the random part of a request, the name of a registered agent, before it is journaled, so that replaying it registers the same name.
+        Order ids are not stamped: they come from the exchange's IdGenerator, which a snapshot saves, so replaying the same requests draws the same ones.
+        """
+        if msg['topic'] == 'register_agent' and msg.get('registered_name') is None:
+            msg['registered_name'] = msg['name'] + str(UUID())[0:8]
+        return msg
+
+    def append(self, msg: dict, dt: datetime=None) -> int:
+        """Stamps and buffers a request, returning its sequence number.
+        """
+        self.seq += 1
+        self.pending.append(json.dumps({'seq': self.seq, 'dt': dt.isoformat(sep=' ') if isinstance(dt, datetime) else dt, 'msg': Journal.stamp(msg, self.seq)}, separators=(',', ':'), default=str))
+        if len(self.pending) >= self.batch_size or time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+        return self.seq
+
+    def flush(self) -> None:
+        if self.pending:
+            self.file.write('\n'.join(self.pending) + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = []
+        self.last_flush = time.time()
+
+    def flush_if_due(self) -> bool:
+        """Flushes the buffered requests if the oldest has waited `flush_interval` seconds.
+
+        returns:
+            bool: whether anything was written.
+        """
+        if self.pending and time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+            return True
+        return False
+
+    async def flush_periodically(self) -> None:
+        """Calls flush_if_due every `flush_interval` seconds until cancelled, e.g. as a task beside the exchange's request loop.
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush_if_due()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+    @staticmethod
+    def read(path: str, after_seq=0) -> Iterator[dict]:
+        """Yields the journaled requests with a sequence number above `after_seq`, in order. A torn last line from a crash is skipped.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if entry['seq'] > after_seq:
+                    if entry['dt'] is not None:
+                        entry['dt'] = datetime.fromisoformat(entry['dt'])
+                    yield entry
+
+async def apply(dispatcher, msg: dict):
+    """Runs a journaled request through the exchange's TopicDispatcher, the same handler table run_exchange serves requests with.
+    A request that fails returns {'error': ...}, as the RouterResponder answers it live, so one bad entry does not stop a replay.
+    """
+    if msg['topic'] not in JOURNALED_TOPICS:
+        raise ValueError(f'{msg["topic"]} is not a journaled topic')
+    try:
+        return await dispatcher.dispatch(msg)
+    except Exception as e:
+        return {'error': str(e)}
+
+async def replay(journal_path: str, snapshot_path: str=None, exchange=None):
+    """Rebuilds an exchange from an optional snapshot and the journal entries written after it.
+
+    Args:
+        journal_path (str): the journal file.
+        snapshot_path (str, optional): a snapshot taken while journaling. Defaults to None, which replays the whole journal onto a new exchange.
+        exchange (Exchange, optional): the exchange to replay onto. Defaults to a new Exchange.
+
+    returns:
+        Tuple[Exchange, int]: the exchange and the number of requests replayed.
+    """
+    from .Exchange import Exchange
+    from .TopicDispatcher import TopicDispatcher
+    exchange = exchange if exchange is not None else Exchange()
+    dispatcher = TopicDispatcher(exchange)
+    after_seq = 0
+    if snapshot_path is not None:
+        after_seq = (await exchange.restore(snapshot_path)).get('journal_seq') or 0
+    replayed = 0
+    for entry in Journal.read(journal_path, after_seq):
+        if entry['dt'] is not None:
+            await exchange._set_datetime(entry['dt'])
+        await apply(dispatcher, entry['msg'])
+        replayed += 1
+    return exchange, replayed
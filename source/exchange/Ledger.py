@@ -0,0 +1,143 @@
+from typing import Dict
+from uuid import uuid4 as UUID
+from .types.Account import Account
+from .types.AccountRegistry import AccountRegistry
+
+class Ledger():
+    """The central record of agent balances for an exchange split into ticker shards.
+
+    Each agent's cash and assets are either available, held here, or reserved by one shard.
+    A shard reserves what an order could spend before placing it, and after every request it reports the balances it still holds
+    for the agents involved, releasing the rest back to available. Balances only move between available and a shard's reserve,
+    so an agent's total is always its available balance plus what each shard reports holding.
+    """
+    def __init__(self):
+        self.accounts = AccountRegistry()
+        self.reserved: Dict[str, Dict[str, Account]] = {}
+
+    def __repr__(self) -> str:
+        return f'<Ledger: {len(self.accounts)} agents, {len(self.reserved)} shards>'
+
+    def _account(self, agent) -> Account:
+        account = self.accounts.get(agent)
+        if account is None:
+            account = Account(agent, 0)
+            self.accounts.add(account)
+        return account
+
+    def _reserve_account(self, shard, agent) -> Account:
+        accounts = self.reserved.setdefault(shard, {})
+        if agent not in accounts:
+            accounts[agent] = Account(agent, 0)
+        return accounts[agent]
+
+    async def register_agent(self, name, initial_cash) -> dict:
+        registered_name = name + str(UUID())[0:8]
+        self.accounts.add(Account(registered_name, initial_cash))
+        return {'registered_agent':registered_name}
+
+    async def reserve(self, shard, agent, cash=0, ticker=None, qty=0) -> dict:
+        """Moves cash and/or assets of an agent from available to a shard's reserve, all or nothing.
+
+        Args:
+            shard (str): the name of the shard reserving.
+            agent (str): the name of the agent.
+            cash (float, optional): the cash to reserve. None reserves all of the agent's available cash. Defaults to 0.
+            ticker (str, optional): the asset to reserve. Defaults to None.
+            qty (int, optional): the quantity of the asset to reserve. Defaults to 0.
+
+        returns:
+            dict: {'reserved': True, 'cash', 'ticker', 'qty'} with the amounts reserved, or {'reserved': False, 'error'} if the agent cannot cover them.
+        """
+        account = self.accounts.get(agent)
+        if account is None:
+            return {'reserved': False, 'error': 'agent not found'}
+        if cash is None:
+            cash = max(account.cash, 0)
+        if account.cash < cash:
+            return {'reserved': False, 'error': 'insufficient funds'}
+        if qty and account.assets.get(ticker, 0) < qty:
+            return {'reserved': False, 'error': 'insufficient assets'}
+        reserve = self._reserve_account(shard, agent)
+        account.cash -= cash
+        reserve.cash += cash
+        if qty:
+            account.assets[ticker] -= qty
+            reserve.assets[ticker] = reserve.assets.get(ticker, 0) + qty
+        return {'reserved': True, 'cash': cash, 'ticker': ticker, 'qty': qty}
+
+    async def settle(self, shard, balances: Dict[str, dict]) -> dict:
+        """Records what a shard still holds for each agent after a request, and what it released.
+
+        Args:
+            shard (str): the name of the shard settling.
+            balances (Dict[str, dict]): per agent, the 'cash' and 'assets' the shard still holds, and the 'release_cash' and 'release_assets' it gave back.
+        """
+        for agent, balance in balances.items():
+            account = self._account(agent)
+            account.cash += balance['release_cash']
+            for ticker, qty in balance['release_assets'].items():
+                account.assets[ticker] = account.assets.get(ticker, 0) + qty
+            reserve = self._reserve_account(shard, agent)
+            reserve.cash = balance['cash']
+            reserve.assets = dict(balance['assets'])
+        return {'settled': len(balances)}
+
+    async def get_cash(self, agent) -> dict:
+        account = self.accounts.get(agent)
+        if account is None:
+            return {'error': 'agent not found'}
+        return {'cash': account.cash + sum(accounts[agent].cash for accounts in self.reserved.values() if agent in accounts)}
+
+    async def get_assets(self, agent) -> dict:
+        account = self.accounts.get(agent)
+        if account is None:
+            return {'error': 'agent not found'}
+        assets = dict(account.assets)
+        for accounts in self.reserved.values():
+            if agent in accounts:
+                for ticker, qty in accounts[agent].assets.items():
+                    assets[ticker] = assets.get(ticker, 0) + qty
+        return {'assets': assets}
+
+    async def get_agent(self, agent) -> dict:
+        """returns the total cash and assets of an agent. Positions and transactions are kept by the shard of each ticker.
+        """
+        cash = await self.get_cash(agent)
+        if 'error' in cash:
+            return cash
+        return {'name': agent, 'cash': cash['cash'], 'assets': (await self.get_assets(agent))['assets']}
+
+    async def get_agents_simple(self) -> list:
+        """returns every agent with its total cash and assets.
+        """
+        return [{'agent': account.name, 'cash': (await self.get_cash(account.name))['cash'], 'assets': (await self.get_assets(account.name))['assets']} for account in self.accounts]
+
+    async def handle(self, msg: dict):
+        """Answers a request sent to the ledger's socket.
+        """
+        topic = msg['topic']
+        if topic == 'reserve': return await self.reserve(msg['shard'], msg['agent'], msg['cash'], msg['ticker'], msg['qty'])
+        elif topic == 'settle': return await self.settle(msg['shard'], msg['balances'])
+        elif topic == 'register_agent': return await self.register_agent(msg['name'], msg['initial_cash'])
+        elif topic in ('cash', 'get_cash'): return await self.get_cash(msg['agent'])
+        elif topic in ('assets', 'get_assets'): return await self.get_assets(msg['agent'])
+        elif topic == 'get_agent': return await self.get_agent(msg['name'])
+        elif topic == 'get_agents_simple': return await self.get_agents_simple()
+        elif topic == 'add_cash': return await self.add_cash(msg['agent'], msg['amount'])
+        elif topic == 'remove_cash': return await self.remove_cash(msg['agent'], msg['amount'])
+        return {'error': f'unknown topic {topic}'}
+
+    async def add_cash(self, agent, amount) -> dict:
+        account = self.accounts.get(agent)
+        if account is None:
+            return {'error': 'agent not found'}
+        account.cash += amount
+        return await self.get_cash(agent)
+
+    async def remove_cash(self, agent, amount, notes='') -> dict:
+        account = self.accounts.get(agent)
+        if account is None:
+            return {'error': 'agent not found'}
+        account.cash -= amount
+        return await self.get_cash(agent)
@@ -0,0 +1,15 @@
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+from source.Requests import Requests
+
+class LedgerRequests(Requests):
+    def __init__(self, requester, cache=False, cache_policies=None, cache_size=1024):
+        super().__init__(requester, cache, cache_policies, cache_size)
+
+    async def reserve(self, shard, agent, cash=0, ticker=None, qty=0):
+        return await self.make_request('reserve', {'shard': shard, 'agent': agent, 'cash': cash, 'ticker': ticker, 'qty': qty}, self.requester)
+
+    async def settle(self, shard, balances):
+        return await self.make_request('settle', {'shard': shard, 'balances': balances}, self.requester)
@@ -0,0 +1,105 @@
+import json
+import time
+from typing import Dict
+from .types.LimitOrder import LimitOrder
+from .types.OrderBook import OrderBook
+from .types.OrderSide import OrderSide
+
+class MarketDataFeed():
+    """Publishes a sequenced market-data feed for every asset of an exchange: trades, L1 quote changes and L2 price-level deltas,
+    with a full L2 snapshot every `snapshot_interval` messages, or `snapshot_seconds` after the last one, so that a subscriber joining late can sync.
+    A quiet asset publishes nothing to trigger its time-based snapshot, so the exchange calls refresh to publish the overdue ones,
+    and a subscriber that is out of sync can ask for one through the exchange's market_data_snapshot topic.
+
+    Each asset has its own sequence. Every trade, l1 and l2 message takes the asset's next sequence number,
+    and a snapshot carries the sequence number it is current as of, so a subscriber applies the messages after it
+    and treats a skipped number as a gap to resync from the next snapshot.
+    Snapshots and l2 messages also carry the book's own sequence number, `book_seq`, the one OrderBook.depth reports.
+    Messages are published on the topic 'md:<ticker>:<type>', so subscribing to 'md:<ticker>:' receives all of an asset.
+    """
+    def __init__(self, publisher, snapshot_interval=1000, snapshot_seconds=None):
+        """
+        Args:
+            publisher (Publisher): anything with a publish(topic, message) method taking strings.
+            snapshot_interval (int, optional): the number of messages of an asset between two of its snapshots. Defaults to 1000.
+            snapshot_seconds (float, optional): the longest time between two snapshots of an asset. Defaults to None, which only counts messages.
+        """
+        self.publisher = publisher
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_seconds = snapshot_seconds
+        self.seq: Dict[str, int] = {}
+        self.since_snapshot: Dict[str, int] = {}
+        self.last_snapshot: Dict[str, float] = {}
+        self.quotes: Dict[str, dict] = {}
+
+    def __repr__(self) -> str:
+        return f'<MarketDataFeed: {len(self.seq)} assets>'
+
+    def _send(self, ticker, kind, message: dict) -> None:
+        message['type'] = kind
+        message['ticker'] = ticker
+        self.publisher.publish(f'md:{ticker}:{kind}', json.dumps(message, separators=(',', ':'), default=str))
+
+    def _publish(self, ticker, kind, message: dict) -> int:
+        seq = self.seq.get(ticker, 0) + 1
+        self.seq[ticker] = seq
+        self.since_snapshot[ticker] = self.since_snapshot.get(ticker, 0) + 1
+        message['seq'] = seq
+        self._send(ticker, kind, message)
+        return seq
+
+    def trade(self, ticker, price, qty, dt, buyer, seller, fee=0) -> int:
+        return self._publish(ticker, 'trade', {'price': price, 'qty': qty, 'dt': dt, 'buyer': buyer, 'seller': seller, 'fee': fee})
+
+    def level(self, book: OrderBook, order: LimitOrder) -> None:
+        """Publishes the new state of the price level an order rests at, after it was added, filled or removed,
+        then the L1 quote if the best levels changed, then a snapshot if one is due.
+        """
+        side = book.bids if order.type == OrderSide.BUY else book.asks
+        level = side.levels.get(order.ticks)
+        self._publish(book.ticker, 'l2', {
+            'side': 'bid' if order.type == OrderSide.BUY else 'ask',
+            'price': order.price,
+            'qty': level.qty if level is not None else 0,
+            'orders': len(level) if level is not None else 0,
+            'book_seq': book.seq
+        })
+        self.quote(book)
+        if self.since_snapshot[book.ticker] >= self.snapshot_interval or self._overdue(book.ticker, time.monotonic()):
+            self.snapshot(book)
+
+    def _overdue(self, ticker, now) -> bool:
+        return self.snapshot_seconds is not None and now - self.last_snapshot.get(ticker, 0) >= self.snapshot_seconds
+
+    def refresh(self, books) -> int:
+        """Publishes a snapshot of every book whose last one is older than `snapshot_seconds`, e.g. from the exchange's main loop.
+
+        Args:
+            books (Iterable[OrderBook]): the books of the exchange.
+
+        returns:
+            int: the number of snapshots published.
+        """
+        if self.snapshot_seconds is None:
+            return 0
+        now = time.monotonic()
+        overdue = [book for book in books if self._overdue(book.ticker, now)]
+        for book in overdue:
+            self.snapshot(book)
+        return len(overdue)
+
+    def quote(self, book: OrderBook) -> None:
+        """Publishes the L1 quote of a book if it differs from the last one published.
+        """
+        quote = book.quote()
+        if quote != self.quotes.get(book.ticker):
+            self.quotes[book.ticker] = dict(quote)
+            self._publish(book.ticker, 'l1', quote)
+
+    def snapshot(self, book: OrderBook) -> None:
+        """Publishes every price level of a book, as of the asset's current sequence number.
+        """
+        self.since_snapshot[book.ticker] = 0
+        self.last_snapshot[book.ticker] = time.monotonic()
+        depth = book.depth(None)
+        self._send(book.ticker, 'snapshot', {'seq': self.seq.get(book.ticker, 0), 'book_seq': depth['seq'], 'bids': depth['bids'], 'asks': depth['asks']})
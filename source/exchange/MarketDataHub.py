@@ -0,0 +1,214 @@
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional, Set
+import zmq
+import zmq.asyncio
+
+class MarketDataClient():
+    """The pending updates of one consumer of an asset, conflated until the consumer is ready for them.
+
+    Price levels and the quote carry absolute values, so only the latest of each is kept; trades are kept in order, up to `max_trades`.
+    A slow consumer therefore receives fewer, merged updates instead of falling further behind.
+    """
+    def __init__(self, ticker, max_trades=100):
+        self.ticker = ticker
+        self.max_trades = max_trades
+        self.levels: Dict[tuple, dict] = {}
+        self.quote = None
+        self.trades: List[dict] = []
+        self.dropped_trades = 0
+        self.seq = 0
+        self.resync = None
+        self.ready = asyncio.Event()
+
+    def __repr__(self) -> str:
+        return f'<MarketDataClient: {self.ticker} @ {self.seq}>'
+
+    def push(self, msg: dict) -> None:
+        if msg['type'] == 'l2':
+            self.levels[(msg['side'], msg['price'])] = {'side': msg['side'], 'price': msg['price'], 'qty': msg['qty'], 'orders': msg['orders']}
+        elif msg['type'] == 'l1':
+            self.quote = {key: msg[key] for key in ('bid_qty', 'bid_p', 'ask_qty', 'ask_p')}
+        elif msg['type'] == 'trade':
+            self.trades.append({key: msg[key] for key in ('price', 'qty', 'dt')})
+            if len(self.trades) > self.max_trades:
+                self.trades.pop(0)
+                self.dropped_trades += 1
+        self.seq = msg['seq']
+        self.ready.set()
+
+    def reset(self, book: dict) -> None:
+        """Replaces the pending updates with a whole book, after the hub lost and regained sync with the feed.
+        """
+        self.levels = {}
+        self.quote = None
+        self.trades = []
+        self.resync = book
+        self.seq = book['seq']
+        self.ready.set()
+
+    def drain(self) -> dict:
+        """returns the pending updates as one message and clears them.
+        """
+        if self.resync is not None:
+            update, self.resync = self.resync, None
+            self.ready.clear()
+            return update
+        update = {'type': 'update', 'ticker': self.ticker, 'seq': self.seq, 'levels': list(self.levels.values()), 'quote': self.quote, 'trades': self.trades}
+        if self.dropped_trades:
+            update['dropped_trades'] = self.dropped_trades
+        self.levels = {}
+        self.quote = None
+        self.trades = []
+        self.dropped_trades = 0
+        self.ready.clear()
+        return update
+
+class MarketDataHub():
+    """Fans one subscription to the exchange's market-data feed out to any number of consumers, e.g. WebSocket clients.
+
+    The hub keeps the current price levels and quote of every asset from the feed's snapshots and deltas,
+    so a new consumer starts from the whole book at once, then receives conflated updates through its MarketDataClient.
+    If the feed skips a sequence number the asset is marked out of sync until its next snapshot; needs_snapshot tells the owner when to ask the exchange for one.
+    An agent can also hold a hub of its own as a local replica of the books it trades, and read them through quote, book and latest_trade.
+    """
+    def __init__(self, channel=5590, tickers: List[str]=None, resync_seconds=1.0):
+        """
+        Args:
+            channel (int, optional): the port of the exchange's market-data feed. Defaults to 5590.
+            tickers (List[str], optional): the assets to subscribe to. Defaults to None, which subscribes to every asset.
+            resync_seconds (float, optional): the shortest time between two snapshot requests for an asset. Defaults to 1.0.
+        """
+        self.channel = channel
+        self.tickers = tickers
+        self.resync_seconds = resync_seconds
+        self.snapshot_requested: Dict[str, float] = {}
+        self.books: Dict[str, dict] = {}
+        self.trades: Dict[str, dict] = {}
+        # called with the ticker and sequence number of every feed message, e.g. to invalidate a Requests cache
+        self.listeners: List[Callable[[str, int], None]] = []
+        self.clients: Dict[str, Set[MarketDataClient]] = {}
+        self.task = None
+
+    def __repr__(self) -> str:
+        return f'<MarketDataHub: {sum(len(clients) for clients in self.clients.values())} clients>'
+
+    def start(self) -> None:
+        """Starts the upstream subscription, once, on the running event loop.
+        """
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+
+    async def run(self) -> None:
+        context = zmq.asyncio.Context()
+        socket = context.socket(zmq.SUB)
+        socket.connect(f'tcp://127.0.0.1:{self.channel}')
+        for topic in ([f'md:{ticker}:' for ticker in self.tickers] if self.tickers else ['md:']):
+            socket.setsockopt_string(zmq.SUBSCRIBE, topic)
+        try:
+            while True:
+                payload = await socket.recv()
+                self.handle(json.loads(payload.split(b'--> ', 1)[1]))
+        finally:
+            socket.close()
+            context.term()
+
+    def _book(self, ticker) -> dict:
+        if ticker not in self.books:
+            self.books[ticker] = {'seq': 0, 'book_seq': 0, 'synced': False, 'bid': {}, 'ask': {}, 'quote': None}
+        return self.books[ticker]
+
+    def handle(self, msg: dict) -> None:
+        """Applies a feed message to the asset's book and forwards it to the asset's clients.
+        """
+        book = self._book(msg['ticker'])
+        for listener in self.listeners:
+            listener(msg['ticker'], msg['seq'])
+        if msg['type'] == 'trade':
+            # a trade stands on its own, so the latest one is kept even while the book is out of sync, in the form of Trade.to_dict
+            self.trades[msg['ticker']] = {key: msg[key] for key in ('dt', 'ticker', 'qty', 'price', 'buyer', 'seller', 'fee')}
+        if msg['type'] == 'snapshot':
+            book['bid'] = {level['price']: level for level in msg['bids']}
+            book['ask'] = {level['price']: level for level in msg['asks']}
+            book['seq'] = msg['seq']
+            book['book_seq'] = msg['book_seq']
+            if not book['synced']:
+                book['synced'] = True
+                for client in self.clients.get(msg['ticker'], ()):
+                    client.reset(self.book(msg['ticker']))
+            return
+        if not book['synced'] or msg['seq'] <= book['seq']:
+            return
+        if msg['seq'] != book['seq'] + 1:
+            book['synced'] = False
+            return
+        book['seq'] = msg['seq']
+        if msg['type'] == 'l2':
+            book['book_seq'] = msg['book_seq']
+            if msg['qty'] > 0:
+                book[msg['side']][msg['price']] = {'price': msg['price'], 'qty': msg['qty'], 'orders': msg['orders']}
+            else:
+                book[msg['side']].pop(msg['price'], None)
+        elif msg['type'] == 'l1':
+            book['quote'] = {key: msg[key] for key in ('bid_qty', 'bid_p', 'ask_qty', 'ask_p')}
+        for client in self.clients.get(msg['ticker'], ()):
+            client.push(msg)
+
+    def book(self, ticker, limit=None) -> dict:
+        """returns the hub's current view of an asset's book, best levels first.
+        """
+        book = self._book(ticker)
+        return {
+            'type': 'book',
+            'ticker': ticker,
+            'seq': book['seq'],
+            'book_seq': book['book_seq'],
+            'synced': book['synced'],
+            'bids': sorted(book['bid'].values(), key=lambda level: -level['price'])[:limit],
+            'asks': sorted(book['ask'].values(), key=lambda level: level['price'])[:limit],
+            'quote': book['quote']
+        }
+
+    def synced(self, ticker) -> bool:
+        return ticker in self.books and self.books[ticker]['synced']
+
+    def needs_snapshot(self, ticker) -> bool:
+        """returns True if a subscribed asset is out of sync and no snapshot has been asked for in the last `resync_seconds`,
+        and if so counts the caller as asking for one now, so that many reads of a gapped asset make one request.
+        """
+        if self.synced(ticker) or (self.tickers and ticker not in self.tickers):
+            return False
+        now = time.monotonic()
+        if now - self.snapshot_requested.get(ticker, -self.resync_seconds) < self.resync_seconds:
+            return False
+        self.snapshot_requested[ticker] = now
+        return True
+
+    def best(self, ticker, side) -> Optional[dict]:
+        """returns the best price level of a side ('bid' or 'ask') of an asset, or None if the side is empty.
+        """
+        levels = self._book(ticker)[side]
+        if not levels:
+            return None
+        price = max(levels) if side == 'bid' else min(levels)
+        return {'ticker': ticker, 'price': price, 'qty': levels[price]['qty'], 'orders': levels[price]['orders']}
+
+    def quote(self, ticker) -> dict:
+        """returns the best bid and ask with the quantity at each, both quoted at 0 if either side is empty, as OrderBook.quote does.
+        """
+        bid, ask = self.best(ticker, 'bid'), self.best(ticker, 'ask')
+        if bid is None or ask is None:
+            return {'ticker': ticker, 'bid_qty': 0, 'bid_p': 0, 'ask_qty': 0, 'ask_p': 0}
+        return {'ticker': ticker, 'bid_qty': bid['qty'], 'bid_p': bid['price'], 'ask_qty': ask['qty'], 'ask_p': ask['price']}
+
+    def latest_trade(self, ticker) -> Optional[dict]:
+        return self.trades.get(ticker)
+
+    def subscribe(self, ticker, max_trades=100) -> MarketDataClient:
+        client = MarketDataClient(ticker, max_trades)
+        self.clients.setdefault(ticker, set()).add(client)
+        return client
+
+    def unsubscribe(self, client: MarketDataClient) -> None:
+        self.clients.get(client.ticker, set()).discard(client)
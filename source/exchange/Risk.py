@@ -0,0 +1,64 @@
+from typing import Dict
+from .types.Account import Account
+from .types.LimitOrder import LimitOrder
+from .types.OrderSide import OrderSide
+from .types.TickScale import TickScale
+
+class Risk():
+    """Keeps the cash and assets each agent has committed to its resting orders, so that pre-trade checks are made against what is still available.
+
+    A resting buy holds its price * qty in cash and a resting sell holds its qty of the asset. Fills and cancels release what they no longer need.
+    Reserved cash is held in the same integer units as Account.cash_units. Every check is a couple of dict lookups.
+    """
+    def __init__(self):
+        self.cash: Dict[str, int] = {}
+        self.assets: Dict[str, Dict[str, float]] = {}
+
+    def __repr__(self) -> str:
+        return f'<Risk: {len(self.cash)} agents holding cash, {len(self.assets)} holding assets>'
+
+    def reserved_cash(self, agent: str) -> int:
+        return self.cash.get(agent, 0)
+
+    def reserved_assets(self, agent: str) -> Dict[str, float]:
+        return self.assets.get(agent, {})
+
+    def available_cash(self, account: Account) -> int:
+        """returns the cash units of an account that are not held by its resting orders.
+        """
+        return account.cash_units - self.cash.get(account.name, 0)
+
+    def available_assets(self, account: Account, ticker: str):
+        return account.assets.get(ticker, 0) - self.assets.get(account.name, {}).get(ticker, 0)
+
+    def hold(self, order: LimitOrder, scale: TickScale) -> None:
+        """Reserves what a resting order could spend.
+        """
+        self._change(order, order.qty, scale, 1)
+
+    def release(self, order: LimitOrder, qty, scale: TickScale) -> None:
+        """Releases what a resting order held for qty that was filled or cancelled.
+        """
+        self._change(order, qty, scale, -1)
+
+    def _change(self, order: LimitOrder, qty, scale: TickScale, sign: int) -> None:
+        agent = order.creator
+        if order.type == OrderSide.BUY:
+            cash = self.cash.get(agent, 0) + sign * scale.cash_units(order.ticks, qty)
+            if cash > 0:
+                self.cash[agent] = cash
+            else:
+                self.cash.pop(agent, None)
+        else:
+            assets = self.assets.setdefault(agent, {})
+            held = assets.get(order.ticker, 0) + sign * qty
+            if held > 0:
+                assets[order.ticker] = held
+            else:
+                assets.pop(order.ticker, None)
+                if not assets:
+                    del self.assets[agent]
+
+    def clear(self) -> None:
+        self.cash.clear()
+        self.assets.clear()
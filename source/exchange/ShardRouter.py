@@ -0,0 +1,194 @@
+import asyncio
+import math
+import traceback
+from itertools import count
+from typing import Dict, List, Tuple
+import zmq
+import zmq.asyncio
+from .ExchangeShard import shard_for, shard_for_order
+from source.Codecs import get_codec, pack, unpack
+
+LEDGER_TOPICS = {'register_agent', 'cash', 'assets', 'get_cash', 'get_assets', 'get_agents_simple', 'add_cash', 'remove_cash'}
+
+def split_batch(actions: List[dict], shards: int) -> List[Tuple[List[int], List[Tuple[int, dict]]]]:
+    """Splits the actions of a batch into runs of consecutive actions that go to the same shards, keeping their order and original position.
+    An action on a ticker goes to the shard that owns it and a cancel_order to the shard its order id names.
+    cancel_all_orders without a ticker, and a cancel_order whose id does not name a shard, go to every shard.
+    Any other action without a ticker goes to -1.
+    """
+    runs = []
+    for idx, action in enumerate(actions):
+        if action.get('ticker'):
+            targets = [shard_for(action['ticker'], shards)]
+        elif action.get('topic') == 'cancel_order' and action.get('order_id'):
+            shard = shard_for_order(action['order_id'], shards)
+            targets = [shard] if shard is not None else list(range(shards))
+        elif action.get('topic') == 'cancel_all_orders':
+            targets = list(range(shards))
+        else:
+            targets = [-1]
+        if runs and runs[-1][0] == targets:
+            runs[-1][1].append((idx, action))
+        else:
+            runs.append((targets, [(idx, action)]))
+    return runs
+
+def merge_replies(first, second):
+    """Merges the replies of two shards to the same request: cancelled tickers are combined and a found order wins over 'order not found'.
+    """
+    if first is None:
+        return second
+    if isinstance(first, dict) and isinstance(second, dict):
+        if isinstance(first.get('cancelled_all_orders'), list) and isinstance(second.get('cancelled_all_orders'), list):
+            return {'cancelled_all_orders': sorted(set(first['cancelled_all_orders']) | set(second['cancelled_all_orders']))}
+        if first.get('cancelled_order') == 'order not found':
+            return second
+    return first
+
+def merge_positions(replies: List[dict], page_size: int, page: int, agent: str) -> dict:
+    """Combines each shard's newest page * page_size positions of an agent into the requested page of all its positions, newest first.
+    """
+    found = [reply for reply in replies if isinstance(reply, dict) and 'error' not in reply]
+    if not found:
+        return replies[0] if replies else {'error': 'agent not found'}
+    positions = sorted((position for reply in found for position in reply['positions']), key=lambda position: position['dt'], reverse=True)
+    total_positions = sum(reply['total_positions'] for reply in found)
+    start_idx = (page - 1) * page_size
+    end_idx = start_idx + page_size
+    return {
+        'agent': agent,
+        'total_positions': total_positions,
+        'page': page,
+        'total_pages': math.ceil(total_positions / page_size),
+        'page_size': page_size,
+        'positions': positions[start_idx:end_idx],
+        'next_page': page + 1 if end_idx < total_positions else None
+    }
+
+def merge_agents(replies: List[list], totals: List[dict]) -> List[dict]:
+    """Combines the accounts each shard keeps for the same agents, with the positions and transactions of every shard
+    and the agent's total cash and assets from the ledger.
+    """
+    agents = {}
+    for reply in replies:
+        for account in reply if isinstance(reply, list) else []:
+            merged = agents.setdefault(account['name'], {'name': account['name'], 'cash': 0, '_transactions': [], 'positions': [], 'assets': {}})
+            merged['_transactions'] += account['_transactions']
+            merged['positions'] += account['positions']
+    for total in totals if isinstance(totals, list) else []:
+        merged = agents.setdefault(total['agent'], {'name': total['agent'], 'cash': 0, '_transactions': [], 'positions': [], 'assets': {}})
+        merged['cash'] = total['cash']
+        merged['assets'] = total['assets']
+    return list(agents.values())
+
+class ShardRouter():
+    """Fronts a set of exchange shards and the ledger with the exchange's usual request socket.
+
+    Requests that name a ticker go to the shard that owns it, cancels go to the shard their order id names, account requests go to the ledger,
+    and requests that span tickers (a batch, cancel_all_orders without a ticker, an agent, its positions, the agents) are split across the shards and their replies merged.
+    A batch is sent as runs of consecutive actions for the same shards, one run after another, so its actions take effect in order.
+    Each backend is reached through a DEALER socket, so requests to different shards are in flight at the same time.
+    Each client is answered in the codec its request came in; the backends are always spoken to in `codec`.
+    """
+    def __init__(self, channel, shard_channels: List[int], ledger_channel, codec='json'):
+        self.channel = channel
+        self.codec = get_codec(codec)
+        self.shard_channels = shard_channels
+        self.ledger_channel = ledger_channel
+        self.ids = count()
+        self.pending: Dict[bytes, asyncio.Future] = {}
+
+    async def connect(self) -> None:
+        self.context = zmq.asyncio.Context()
+        self.front = self.context.socket(zmq.ROUTER)
+        self.front.bind(f'tcp://127.0.0.1:{self.channel}')
+        self.shards = []
+        for channel in self.shard_channels:
+            socket = self.context.socket(zmq.DEALER)
+            socket.connect(f'tcp://127.0.0.1:{channel}')
+            self.shards.append(socket)
+        self.ledger = self.context.socket(zmq.DEALER)
+        self.ledger.connect(f'tcp://127.0.0.1:{self.ledger_channel}')
+
+    async def forward(self, backend, msg: dict):
+        """Sends a request to one backend and waits for its reply, matched by a correlation id.
+        """
+        request_id = str(next(self.ids)).encode()
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        await backend.send_multipart([request_id, b'', pack(self.codec, msg)])
+        return await future
+
+    async def collect(self, backend) -> None:
+        while True:
+            request_id, _, reply = await backend.recv_multipart()
+            future = self.pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_result(unpack(reply)[1])
+
+    async def handle(self, msg: dict):
+        topic = msg.get('topic')
+        if topic == 'batch':
+            results = [None] * len(msg['actions'])
+            # runs go out one after another so the batch keeps the order of its actions across shards, as Exchange.submit_batch does
+            for targets, run in split_batch(msg['actions'], len(self.shards)):
+                if targets == [-1]:
+                    for idx, action in run:
+                        results[idx] = {'error': f'batch action {action.get("topic")} has no ticker'}
+                    continue
+                batch = {'topic': 'batch', 'actions': [action for _, action in run]}
+                for reply in await asyncio.gather(*(self.forward(self.shards[shard], batch) for shard in targets)):
+                    if not isinstance(reply, list):
+                        reply = [reply] * len(run)
+                    for (idx, _), result in zip(run, reply):
+                        results[idx] = merge_replies(results[idx], result)
+            return results
+        if msg.get('ticker'):
+            return await self.forward(self.shards[shard_for(msg['ticker'], len(self.shards))], msg)
+        if topic == 'get_agent':
+            total, replies = await asyncio.gather(self.forward(self.ledger, msg), self.broadcast(msg))
+            if 'error' in total:
+                return total
+            accounts = [[reply] for reply in replies if isinstance(reply, dict) and 'error' not in reply]
+            return merge_agents(accounts, [{'agent': total['name'], 'cash': total['cash'], 'assets': total['assets']}])[0]
+        if topic in LEDGER_TOPICS:
+            return await self.forward(self.ledger, msg)
+        if topic == 'cancel_order':
+            shard = shard_for_order(msg['order_id'], len(self.shards))
+            if shard is not None:
+                return await self.forward(self.shards[shard], msg)
+        if topic in ('cancel_order', 'cancel_all_orders'):
+            result = None
+            for reply in await self.broadcast(msg):
+                result = merge_replies(result, reply)
+            return result
+        if topic == 'get_positions':
+            # each shard returns its newest page * page_size positions, enough to cut the requested page from all of them
+            replies = await self.broadcast(dict(msg, page=1, page_size=msg['page'] * msg['page_size']))
+            return merge_positions(replies, msg['page_size'], msg['page'], msg['agent'])
+        if topic == 'get_agents':
+            replies, totals = await asyncio.gather(self.broadcast(msg), self.forward(self.ledger, {'topic': 'get_agents_simple'}))
+            return merge_agents(replies, totals)
+        if topic == 'order_index_stats':
+            replies = await self.broadcast(msg)
+            return {key: sum(reply.get(key, 0) for reply in replies if isinstance(reply, dict)) for key in ('orders', 'hits', 'misses')}
+        return await self.forward(self.shards[0], msg)
+
+    async def broadcast(self, msg: dict) -> list:
+        return await asyncio.gather(*(self.forward(shard, msg) for shard in self.shards))
+
+    async def reply(self, identity, codec, msg) -> None:
+        try:
+            response = await self.handle(msg)
+        except Exception as e:
+            print("[Router Error]", e, "Request:", msg)
+            print(traceback.format_exc())
+            response = {'error': str(e)}
+        await self.front.send_multipart([identity, b'', pack(codec, response)])
+
+    async def route(self) -> None:
+        for backend in self.shards + [self.ledger]:
+            asyncio.ensure_future(self.collect(backend))
+        while True:
+            identity, _, payload = await self.front.recv_multipart()
+            asyncio.ensure_future(self.reply(identity, *unpack(payload)))
@@ -0,0 +1,51 @@
+import os
+import pickle
+import struct
+
+SNAPSHOT_MAGIC = b'EXSNAP'
+SNAPSHOT_VERSION = 5
+_HEADER = struct.Struct('<6sH')
+
+def snapshot_path(directory: str, name: str) -> str:
+    """returns the file of a named snapshot in the exchange's snapshot directory, creating the directory if needed.
+    Snapshots requested over the network are only ever named, never given as paths, so a client can neither overwrite nor unpickle a file elsewhere.
+
+    raises:
+        ValueError: if the name is empty, contains a path separator or starts with a dot.
+    """
+    if not isinstance(name, str) or not name or name.startswith('.') or any(char in name for char in ('/', '\\', '\x00')):
+        raise ValueError(f'invalid snapshot name {name!r}')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+def write_snapshot(path: str, state: dict) -> int:
+    """Writes an exchange state to a file: a magic tag and format version, then the state pickled with the highest protocol.
+    The file is written next to `path` and moved into place, so a crash mid-write never leaves a truncated snapshot.
+
+    returns:
+        int: the size of the snapshot in bytes.
+    """
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return _HEADER.size + len(payload)
+
+def read_snapshot(path: str) -> dict:
+    """Reads an exchange state written by write_snapshot.
+
+    raises:
+        ValueError: if the file is not a snapshot or was written by another format version.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f'{path} is not an exchange snapshot')
+        magic, version = _HEADER.unpack(header)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f'{path} is not an exchange snapshot')
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f'{path} is snapshot version {version}, expected {SNAPSHOT_VERSION}')
+        return pickle.loads(f.read())
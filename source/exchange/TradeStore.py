@@ -0,0 +1,125 @@
+import sqlite3
+import time
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+class TradeStore():
+    """Persists trades to an SQLite database in WAL mode.
+
+    Trades are buffered and written in groups, one commit per `batch_size` trades or per `flush_interval` seconds, whichever comes first.
+    Trades are keyed by ticker and per-ticker sequence number and indexed by ticker and time, so tail and time-range reads do not scan the file.
+    """
+    def __init__(self, path='trades.db', batch_size=500, flush_interval=1.0, reset=False):
+        """
+        Args:
+            path (str, optional): the database file. Defaults to 'trades.db'.
+            batch_size (int, optional): the number of buffered trades that triggers a commit. Defaults to 500.
+            flush_interval (float, optional): the maximum seconds a buffered trade waits for a commit. Defaults to 1.0.
+            reset (bool, optional): drop any trades already in the file. Defaults to False.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending: List[tuple] = []
+        self.last_flush = time.time()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        if reset:
+            self.connection.execute('DROP TABLE IF EXISTS trades')
+        self.connection.execute('''CREATE TABLE IF NOT EXISTS trades (
+            ticker TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            dt TEXT,
+            price NUMERIC,
+            qty NUMERIC,
+            buyer TEXT,
+            seller TEXT,
+            fee NUMERIC,
+            PRIMARY KEY (ticker, seq)
+        )''')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS trades_ticker_dt ON trades (ticker, dt)')
+        self.connection.commit()
+
+    def __repr__(self) -> str:
+        return f'<TradeStore: {self.path}>'
+
+    def append(self, ticker, seq, dt, price, qty, buyer, seller, fee=0) -> None:
+        self.pending.append((ticker, seq, self._dump_dt(dt), price, qty, buyer, seller, fee))
+        if len(self.pending) >= self.batch_size or time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes all buffered trades in a single transaction.
+        """
+        if self.pending:
+            self.connection.executemany('INSERT OR REPLACE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self.pending)
+            self.connection.commit()
+            self.pending = []
+        self.last_flush = time.time()
+
+    def count(self, ticker) -> int:
+        self.flush()
+        row = self.connection.execute('SELECT MAX(seq) FROM trades WHERE ticker = ?', (ticker,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def tail(self, ticker, limit, before_seq=None) -> List[dict]:
+        """returns up to `limit` trades of a ticker with a sequence number below `before_seq`, oldest first.
+        """
+        self.flush()
+        if before_seq is None:
+            before_seq = self.count(ticker)
+        rows = self.connection.execute(
+            'SELECT ticker, seq, dt, price, qty, buyer, seller, fee FROM trades WHERE ticker = ? AND seq < ? ORDER BY seq DESC LIMIT ?',
+            (ticker, before_seq, limit)).fetchall()
+        return [self._row(row) for row in reversed(rows)]
+
+    def between(self, ticker, start=None, end=None) -> List[dict]:
+        """returns the trades of a ticker with start <= dt < end, oldest first.
+        """
+        self.flush()
+        query = 'SELECT ticker, seq, dt, price, qty, buyer, seller, fee FROM trades WHERE ticker = ?'
+        args = [ticker]
+        if start is not None:
+            query += ' AND dt >= ?'
+            args.append(self._dump_dt(start))
+        if end is not None:
+            query += ' AND dt < ?'
+            args.append(self._dump_dt(end))
+        query += ' ORDER BY seq'
+        return [self._row(row) for row in self.connection.execute(query, args)]
+
+    def rows(self, ticker=None) -> Iterator[dict]:
+        self.flush()
+        if ticker is None:
+            cursor = self.connection.execute('SELECT ticker, seq, dt, price, qty, buyer, seller, fee FROM trades ORDER BY ticker, seq')
+        else:
+            cursor = self.connection.execute('SELECT ticker, seq, dt, price, qty, buyer, seller, fee FROM trades WHERE ticker = ? ORDER BY seq', (ticker,))
+        for row in cursor:
+            yield self._row(row)
+
+    def clear(self) -> None:
+        self.pending = []
+        self.connection.execute('DELETE FROM trades')
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
+
+    @staticmethod
+    def _dump_dt(dt) -> str:
+        return dt.isoformat(sep=' ') if isinstance(dt, datetime) else dt
+
+    @staticmethod
+    def _row(row: Tuple) -> dict:
+        ticker, seq, dt, price, qty, buyer, seller, fee = row
+        return {
+            'dt': datetime.fromisoformat(dt) if dt is not None else None,
+            'ticker': ticker,
+            'qty': qty,
+            'price': price,
+            'buyer': buyer,
+            'seller': seller,
+            'fee': fee
+        }
@@ -0,0 +1,51 @@
+from typing import Dict, List
+from .TickScale import from_cash_units, to_cash_units
+
+class Account():
+    """The exchange's record of an agent: its cash, transactions, positions and assets.
+
+    Fields can also be read and written by key (account['cash']), so the record can be used wherever an agent dict was expected.
+    Cash is held as an integer number of 1e-8 units in `cash_units`; `cash` reads and writes it as a float.
+    """
+    __slots__ = ('name', 'cash_units', '_transactions', 'positions', 'assets')
+    FIELDS = ('name', 'cash', '_transactions', 'positions', 'assets')
+
+    def __init__(self, name:str, cash:float, _transactions:List[dict]=None, positions:List[dict]=None, assets:Dict[str,int]=None):
+        self.name = name
+        self.cash = cash
+        self._transactions = _transactions if _transactions is not None else []
+        self.positions = positions if positions is not None else []
+        self.assets = assets if assets is not None else {}
+
+    def __repr__(self) -> str:
+        return f'<Account: {self.name}>'
+
+    @property
+    def cash(self) -> float:
+        return from_cash_units(self.cash_units)
+
+    @cash.setter
+    def cash(self, value) -> None:
+        self.cash_units = to_cash_units(value)
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value) -> None:
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in self.FIELDS
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'cash': self.cash,
+            '_transactions': self._transactions,
+            'positions': self.positions,
+            'assets': self.assets
+        }
@@ -0,0 +1,45 @@
+from typing import Dict, Iterator, List, Union
+from .Account import Account
+
+class AccountRegistry():
+    """Holds the exchange's agent Accounts keyed by agent name, in registration order.
+    """
+    def __init__(self):
+        self._accounts: List[Account] = []
+        self._index: Dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return f'<AccountRegistry: {len(self._accounts)} accounts>'
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __iter__(self) -> Iterator[Account]:
+        return iter(self._accounts)
+
+    def __getitem__(self, idx: int) -> Account:
+        return self._accounts[idx]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def add(self, account: Account) -> Account:
+        """Registers an account, replacing any account that already has the same name.
+        """
+        if account.name in self._index:
+            self._accounts[self._index[account.name]] = account
+        else:
+            self._index[account.name] = len(self._accounts)
+            self._accounts.append(account)
+        return account
+
+    def get(self, name: str) -> Union[Account, None]:
+        idx = self._index.get(name)
+        return self._accounts[idx] if idx is not None else None
+
+    def index(self, name: str) -> Union[int, None]:
+        return self._index.get(name)
+
+    def clear(self) -> None:
+        self._accounts.clear()
+        self._index.clear()
@@ -0,0 +1,84 @@
+from bisect import insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from source.utils._utils import get_interval_timedelta
+
+BAR_ORIGIN = datetime(1700, 1, 1)
+
+class BarSeries():
+    """Open, high, low, close and volume bars of a single interval, updated one trade at a time.
+    """
+    def __init__(self, interval: timedelta):
+        self.interval = interval
+        self.starts: List[datetime] = []
+        self.bars: Dict[datetime, list] = {}
+
+    def __repr__(self) -> str:
+        return f'<BarSeries: {self.interval} {len(self.starts)} bars>'
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def bar_start(self, dt: datetime) -> datetime:
+        """returns the start of the bar a time falls in. Intraday bars are aligned to midnight, daily and longer bars to the sim clock origin.
+        """
+        if self.interval < timedelta(days=1):
+            origin = datetime(dt.year, dt.month, dt.day)
+        else:
+            origin = BAR_ORIGIN
+        return origin + ((dt - origin) // self.interval) * self.interval
+
+    def add(self, dt: datetime, price, qty) -> None:
+        start = self.bar_start(dt)
+        bar = self.bars.get(start)
+        if bar is None:
+            self.bars[start] = [price, price, price, price, qty]
+            if not self.starts or start > self.starts[-1]:
+                self.starts.append(start)
+            else:
+                insort(self.starts, start)
+        else:
+            if price > bar[1]: bar[1] = price
+            if price < bar[2]: bar[2] = price
+            bar[3] = price
+            bar[4] += qty
+
+    def tail(self, limit=20) -> List[dict]:
+        """returns the last `limit` bars, oldest first.
+        """
+        bars = []
+        for start in self.starts[max(len(self.starts) - limit, 0):]:
+            bar = self.bars[start]
+            bars.append({'open': bar[0], 'high': bar[1], 'low': bar[2], 'close': bar[3], 'volume': bar[4], 'dt': start.strftime("%m/%d/%Y, %H:%M:%S")})
+        return bars
+
+class BarAggregator():
+    """Keeps the price bars of an asset for a set of intervals, updated as each trade is processed, so candles are read without resampling the trade history.
+    """
+    def __init__(self, ticker: str, intervals: Iterable[str]=('1Min', '15Min', '1H', '1D')):
+        self.ticker = ticker
+        self.series: Dict[timedelta, BarSeries] = {}
+        for interval in intervals:
+            delta = get_interval_timedelta(interval)
+            self.series[delta] = BarSeries(delta)
+
+    def __repr__(self) -> str:
+        return f'<BarAggregator: {self.ticker}>'
+
+    def add(self, dt: datetime, price, qty) -> None:
+        if dt is None:
+            return
+        for series in self.series.values():
+            series.add(dt, price, qty)
+
+    def get(self, interval: str, limit=20, trades: Iterable[dict]=None) -> List[dict]:
+        """returns the last `limit` bars of an interval. Intervals that are not kept up to date are built from `trades`, if given.
+        """
+        delta = get_interval_timedelta(interval)
+        series = self.series.get(delta)
+        if series is None:
+            series = BarSeries(delta)
+            for trade in trades if trades is not None else []:
+                if trade['dt'] is not None:
+                    series.add(trade['dt'], trade['price'], trade['qty'])
+        return series.tail(limit)
@@ -0,0 +1,156 @@
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Iterator, List, Union
+from .LimitOrder import LimitOrder
+from .OrderSide import OrderSide
+from .PriceLevel import PriceLevel
+
+class BookSide():
+    """One side of an OrderBook: a sorted map of price levels, iterated best price first, each level holding a FIFO queue of orders.
+    Levels are keyed by the orders' integer ticks, so prices that are equal on the asset's grid always share a level.
+
+    Lookups of a level are O(1), the best order is O(1), and filled or cancelled orders are removed from their level in O(1).
+    The level keys are a sorted list ordered worst price first, so the best level is at its end: adding or dropping a level is an
+    O(log P) search plus a shift of the levels better than it, which is short for the levels near the top of the book where most orders arrive.
+
+    `seq` counts every change to the side and `top_seq` counts the changes to its best level,
+    so cached views of the side can tell whether they are stale without walking it.
+    """
+    def __init__(self, side: OrderSide, orders: List[LimitOrder]=None):
+        """
+        Args:
+            side (OrderSide): BUY sides are sorted by descending price, SELL sides by ascending price.
+            orders (List[LimitOrder], optional): orders to seed the side with, in queue order.
+        """
+        self.side = side
+        self.levels: Dict[int, PriceLevel] = {}
+        self._keys = []
+        self._count = 0
+        self.seq = 0
+        self.top_seq = 0
+        for order in orders or []:
+            self.add(order)
+
+    def __repr__(self) -> str:
+        return f'<BookSide: {self.side.value} {self._count} orders>'
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __iter__(self) -> Iterator[LimitOrder]:
+        """Iterates orders in price-time priority. The current level is copied before it is walked, so orders may be filled or removed while iterating.
+        """
+        if not self._keys:
+            return
+        key = self._keys[-1]
+        while True:
+            for order in list(self.levels[self._ticks(key)].orders.values()):
+                yield order
+            # the next level is the next worse key, whether or not this level was dropped while it was walked
+            idx = bisect_left(self._keys, key)
+            if idx == 0:
+                return
+            key = self._keys[idx - 1]
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[LimitOrder, List[LimitOrder]]:
+        if isinstance(idx, slice):
+            return list(self)[idx]
+        if idx < 0:
+            idx += self._count
+        if idx == 0 and self._count > 0:
+            return self.best
+        order = next(islice(iter(self), idx, None), None) if idx >= 0 else None
+        if order is None:
+            raise IndexError('BookSide index out of range')
+        return order
+
+    def _key(self, ticks):
+        # better prices get larger keys, so the best level sorts last
+        return ticks if self.side == OrderSide.BUY else -ticks
+
+    def _ticks(self, key):
+        return key if self.side == OrderSide.BUY else -key
+
+    @property
+    def best(self) -> Union[LimitOrder, None]:
+        """returns the first order of the best price level, or None if the side is empty.
+        """
+        if not self._keys:
+            return None
+        return self.levels[self._ticks(self._keys[-1])].first
+
+    @property
+    def best_level(self) -> Union[PriceLevel, None]:
+        if not self._keys:
+            return None
+        return self.levels[self._ticks(self._keys[-1])]
+
+    def add(self, order: LimitOrder) -> None:
+        """Queues an order at the back of its price level, creating the level if needed.
+        """
+        if not self._keys or self._key(order.ticks) >= self._keys[-1]:
+            self.top_seq += 1
+        self.seq += 1
+        level = self.levels.get(order.ticks)
+        if level is None:
+            level = PriceLevel(order.price, order.ticks)
+            self.levels[order.ticks] = level
+            insort(self._keys, self._key(order.ticks))
+        level.append(order)
+        self._count += 1
+
+    def remove(self, order: LimitOrder) -> bool:
+        """Removes an order from its price level, dropping the level once it is empty.
+
+        returns:
+            bool: False if the order was not resting on this side.
+        """
+        level = self.levels.get(order.ticks)
+        if level is None or order.id not in level.orders:
+            return False
+        self._touch(order.ticks)
+        level.remove(order)
+        self._count -= 1
+        if not level.orders:
+            self._drop_level(level)
+        return True
+
+    def fill(self, order: LimitOrder, qty: int) -> None:
+        """Reduces a resting order by a filled quantity, removing it from the book once it is fully filled.
+        """
+        level = self.levels[order.ticks]
+        self._touch(order.ticks)
+        level.fill(order, qty)
+        if order.qty <= 0:
+            self.remove(order)
+
+    def clear(self) -> None:
+        self.levels.clear()
+        self._keys.clear()
+        self._count = 0
+        self.seq += 1
+        self.top_seq += 1
+
+    def _touch(self, ticks) -> None:
+        self.seq += 1
+        if self._keys and self._keys[-1] == self._key(ticks):
+            self.top_seq += 1
+
+    def _drop_level(self, level: PriceLevel) -> None:
+        del self.levels[level.ticks]
+        key = self._key(level.ticks)
+        idx = bisect_left(self._keys, key)
+        if idx < len(self._keys) and self._keys[idx] == key:
+            self._keys.pop(idx)
+
+    def to_list(self, limit=None) -> List[LimitOrder]:
+        return list(islice(iter(self), limit))
+
+    def depth(self, limit=None) -> List[dict]:
+        """returns the best `limit` price levels, each aggregated to its price, total quantity and number of orders.
+        """
+        levels = [self.levels[self._ticks(key)] for key in islice(reversed(self._keys), limit)]
+        return [{'price': level.price, 'qty': level.qty, 'orders': len(level)} for level in levels]
@@ -0,0 +1,29 @@
+from typing import Dict
+
+class HoldingsIndex():
+    """Keeps, for every ticker, the agents that hold it with their quantity, and the running total of shares outstanding.
+    An agent stays among a ticker's holders at zero once it has held it, as the ticker stays in its account's assets.
+    """
+    def __init__(self):
+        self.holders: Dict[str, Dict[str, int]] = {}
+        self.outstanding: Dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return f'<HoldingsIndex: {len(self.holders)} tickers>'
+
+    def add(self, agent: str, ticker: str, qty) -> None:
+        """Adds a signed quantity to an agent's holding of a ticker.
+        """
+        holders = self.holders.setdefault(ticker, {})
+        holders[agent] = holders.get(agent, 0) + qty
+        self.outstanding[ticker] = self.outstanding.get(ticker, 0) + qty
+
+    def get_holders(self, ticker: str) -> Dict[str, int]:
+        return self.holders.get(ticker, {})
+
+    def get_outstanding(self, ticker: str) -> int:
+        return self.outstanding.get(ticker, 0)
+
+    def clear(self) -> None:
+        self.holders.clear()
+        self.outstanding.clear()
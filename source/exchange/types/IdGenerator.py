@@ -0,0 +1,26 @@
+class IdGenerator():
+    """Hands out ids from a monotonic counter, as strings so they serialize the same way the random ids they replace did.
+
+    Each exchange owns one, so its ids are unique within it and repeat exactly when the same requests are replayed.
+    The counter fits in 64 bits for any realistic run; the prefix tells apart the ids of different generators, e.g. per shard.
+    """
+    __slots__ = ('prefix', 'last')
+
+    def __init__(self, prefix='', last=0):
+        """
+        Args:
+            prefix (str, optional): prepended to every id. Defaults to ''.
+            last (int, optional): the last id handed out; the next one is last + 1. Defaults to 0.
+        """
+        self.prefix = prefix
+        self.last = last
+
+    def __repr__(self) -> str:
+        return f'<IdGenerator: {self.prefix}{self.last}>'
+
+    def __call__(self) -> str:
+        self.last += 1
+        return f'{self.prefix}{self.last}'
+
+# used by objects created outside an exchange, e.g. in tests or by agents
+default_ids = IdGenerator('local.')
@@ -2,16 +2,20 @@ import sys
 import os
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 from datetime import datetime
-from decimal import Decimal
 from .OrderSide import OrderSide
-from source.utils._utils import get_random_string
+from .IdGenerator import default_ids
 
 class LimitOrder():
+    """A resting or submitted limit order. `ticks` is the price as a whole number of the asset's ticks, which the book sorts and groups by;
+    orders created without it, outside an exchange, use their price as is.
+    """
+    __slots__ = ('id', 'ticker', 'price', 'ticks', 'type', 'qty', 'creator', 'dt', 'fee', 'position_id', 'accounting')
 
-    def __init__(self, ticker, price, qty, creator, side, dt=None, fee=0, accounting='FIFO', position_id=None):
-        self.id = get_random_string()
+    def __init__(self, ticker, price, qty, creator, side, dt=None, fee=0, accounting='FIFO', position_id=None, id=None, ticks=None):
+        self.id = id if id is not None else default_ids()
         self.ticker: str = ticker
-        self.price: Decimal = price
+        self.price: float = price
+        self.ticks: int = ticks if ticks is not None else price
         self.type: OrderSide = side
         self.qty: int = qty
         self.creator: str = creator
@@ -21,7 +25,9 @@ class LimitOrder():
         self.accounting = accounting
 
     def to_dict(self) -> dict:
-        if self.ticker == 'error' and self.type == OrderSide.BUY: 
+        if self.ticker == 'error' and self.creator == 'invalid_lot_size':
+            return {'limit_buy' if self.type == OrderSide.BUY else 'limit_sell': "invalid lot size", 'id': self.id}
+        elif self.ticker == 'error' and self.type == OrderSide.BUY: 
             return {'limit_buy': "insufficient funds", 'id': self.id}
         elif self.ticker == 'error' and self.type == OrderSide.SELL:
             return {'limit_sell': "insufficient assets", 'id': self.id}
@@ -1,9 +1,14 @@
 import pandas as pd
 from typing import List
 from .LimitOrder import LimitOrder
+from .OrderSide import OrderSide
+from .BookSide import BookSide
 
 class OrderBook():
-    """An OrderBook contains all the relevant trading data of a given asset. It contains the list of bids and asks, ordered by their place in the queue.
+    """An OrderBook contains all the relevant trading data of a given asset. It contains the bids and asks, each kept as price levels ordered by their place in the queue.
+
+    The book keeps a cached L1 quote, rebuilt only when the best level of either side changes,
+    and a cached L2 depth view, rebuilt only when the book's sequence number has moved.
     """
     def __init__(self, ticker:str):
         """_summary_
@@ -12,16 +17,59 @@ class OrderBook():
             ticker (str): the corresponding asset that is going to be traded in the OrderBook.
         """
         self.ticker = ticker
-        self.bids: List[LimitOrder] = []
-        self.asks: List[LimitOrder] = []
+        self._bids = BookSide(OrderSide.BUY)
+        self._asks = BookSide(OrderSide.SELL)
+        self._quote = None
+        self._quote_key = None
+        self._depth = None
+        self._depth_key = None
 
     def __repr__(self) -> str:
         return f'<OrderBook: {self.ticker}>'
 
     def __str__(self) -> str:
         return f'<OrderBook: {self.ticker}>'
-    
 
+    @property
+    def bids(self) -> BookSide:
+        return self._bids
+
+    @bids.setter
+    def bids(self, orders: List[LimitOrder]) -> None:
+        self._bids = self._replace(self._bids, BookSide(OrderSide.BUY, orders))
+
+    @property
+    def asks(self) -> BookSide:
+        return self._asks
+
+    @asks.setter
+    def asks(self, orders: List[LimitOrder]) -> None:
+        self._asks = self._replace(self._asks, BookSide(OrderSide.SELL, orders))
+
+    @staticmethod
+    def _replace(old: BookSide, new: BookSide) -> BookSide:
+        # carry the counters over so the book's sequence numbers never go backwards
+        new.seq += old.seq + 1
+        new.top_seq += old.top_seq + 1
+        return new
+
+    @property
+    def seq(self) -> int:
+        """a number that increases every time an order is added to, filled on or removed from the book.
+        """
+        return self._bids.seq + self._asks.seq
+
+    def side(self, side: OrderSide) -> BookSide:
+        return self._bids if side == OrderSide.BUY else self._asks
+
+    def add(self, order: LimitOrder) -> None:
+        self.side(order.type).add(order)
+
+    def remove(self, order: LimitOrder) -> bool:
+        return self.side(order.type).remove(order)
+
+    def fill(self, order: LimitOrder, qty: int) -> None:
+        self.side(order.type).fill(order, qty)
 
     @property
     def df(self) -> dict:
@@ -34,9 +82,47 @@ class OrderBook():
             'bids': pd.DataFrame.from_records([b.to_dict() for b in self.bids]),
             'asks': pd.DataFrame.from_records([a.to_dict() for a in self.asks])
         }
-    
+
+    def quote(self) -> dict:
+        """returns the best bid and ask with the total quantity resting at each price.
+        If either side is empty both sides are quoted at 0.
+        """
+        key = (self._bids.top_seq, self._asks.top_seq)
+        if key != self._quote_key:
+            best_bid = self._bids.best_level
+            best_ask = self._asks.best_level
+            if best_bid is None or best_ask is None:
+                bid_qty, bid_p, ask_qty, ask_p = 0, 0, 0, 0
+            else:
+                bid_qty, bid_p, ask_qty, ask_p = best_bid.qty, best_bid.price, best_ask.qty, best_ask.price
+            self._quote = {
+                'ticker': self.ticker,
+                'bid_qty': bid_qty,
+                'bid_p': bid_p,
+                'ask_qty': ask_qty,
+                'ask_p': ask_p,
+            }
+            self._quote_key = key
+        return dict(self._quote)
+
+    def depth(self, limit=10) -> dict:
+        """returns the best `limit` price levels of each side, aggregated to price, total quantity and number of orders.
+        The levels are cached until the book changes; callers get a copy, so changing it does not change the cache.
+        """
+        key = (self.seq, limit)
+        if key != self._depth_key:
+            self._depth = {
+                'ticker': self.ticker,
+                'seq': self.seq,
+                'bids': self._bids.depth(limit),
+                'asks': self._asks.depth(limit)
+            }
+            self._depth_key = key
+        depth = self._depth
+        return {'ticker': depth['ticker'], 'seq': depth['seq'], 'bids': [dict(level) for level in depth['bids']], 'asks': [dict(level) for level in depth['asks']]}
+
     def to_dict(self, limit=20) -> dict:
         return {
-            "bids": [b.to_dict() for b in self.bids][:limit], 
-            "asks": [a.to_dict() for a in self.asks][:limit]
+            "bids": [b.to_dict() for b in self.bids.to_list(limit)],
+            "asks": [a.to_dict() for a in self.asks.to_list(limit)]
         }
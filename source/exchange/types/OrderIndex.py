@@ -0,0 +1,63 @@
+from typing import Dict, List, Tuple, Union
+from .LimitOrder import LimitOrder
+from .OrderSide import OrderSide
+
+class OrderIndex():
+    """An exchange-wide index of resting orders, keyed by order id, so orders can be found without scanning the books.
+    Orders are also grouped by creator and ticker, so one agent's orders can be found without scanning the books either.
+    """
+    def __init__(self):
+        self.orders: Dict[str, Tuple[str, OrderSide, LimitOrder]] = {}
+        self.agent_orders: Dict[str, Dict[str, Dict[str, LimitOrder]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f'<OrderIndex: {len(self.orders)} orders>'
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def __contains__(self, order_id) -> bool:
+        return order_id in self.orders
+
+    def add(self, order: LimitOrder) -> None:
+        self.orders[order.id] = (order.ticker, order.type, order)
+        self.agent_orders.setdefault(order.creator, {}).setdefault(order.ticker, {})[order.id] = order
+
+    def remove(self, order_id: str) -> Union[Tuple[str, OrderSide, LimitOrder], None]:
+        entry = self.orders.pop(order_id, None)
+        if entry is not None:
+            ticker, side, order = entry
+            tickers = self.agent_orders[order.creator]
+            del tickers[ticker][order_id]
+            if not tickers[ticker]:
+                del tickers[ticker]
+                if not tickers:
+                    del self.agent_orders[order.creator]
+        return entry
+
+    def get(self, order_id: str) -> Union[Tuple[str, OrderSide, LimitOrder], None]:
+        """returns the (ticker, side, order) entry of a resting order, counting the lookup as a hit or a miss.
+        """
+        entry = self.orders.get(order_id)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def get_agent_orders(self, agent: str, ticker: str=None) -> List[LimitOrder]:
+        """returns the resting orders of an agent, on one ticker or on every ticker if none is given.
+        """
+        tickers = self.agent_orders.get(agent, {})
+        if ticker is not None:
+            return list(tickers.get(ticker, {}).values())
+        return [order for orders in tickers.values() for order in orders.values()]
+
+    def clear(self) -> None:
+        self.orders.clear()
+        self.agent_orders.clear()
+
+    def stats(self) -> dict:
+        return {'orders': len(self.orders), 'hits': self.hits, 'misses': self.misses}
@@ -1,15 +1,17 @@
 
 class Position():
-    def __init__(self, id, ticker, qty, dt, enters=[], exits=[]):
+    __slots__ = ('id', 'ticker', 'qty', 'dt', 'enters', 'exits')
+
+    def __init__(self, id, ticker, qty, dt, enters=None, exits=None):
         self.id = str(id)
         self.ticker = ticker
         self.qty = qty
         self.dt = dt
-        self.enters = enters # enters is a list of transactions
-        self.exits = exits # exits is a list of transactions
+        self.enters = enters if enters is not None else [] # enters is a list of transactions
+        self.exits = exits if exits is not None else [] # exits is a list of transactions
 
     def __repr__(self) -> str:
-        return f"Position({self.id}, {self.ticker}, {self.qty}, {self.dt}, {self.transactions})"
+        return f"Position({self.id}, {self.ticker}, {self.qty}, {self.dt}, {self.enters}, {self.exits})"
     
     def __str__(self) -> str:
         return f"<Position({self.ticker} {self.qty} @ {self.dt}>"
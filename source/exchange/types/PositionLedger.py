@@ -0,0 +1,126 @@
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+from .IdGenerator import IdGenerator, default_ids
+from .Position import Position
+from .Transaction import Exit
+
+class Lot():
+    """The open part of one enter transaction: the position it belongs to, the enter itself and how much of it is still held.
+    """
+    __slots__ = ('position', 'enter', 'qty')
+
+    def __init__(self, position: dict, enter: dict, qty):
+        self.position = position
+        self.enter = enter
+        self.qty = qty
+
+    def __repr__(self) -> str:
+        return f'<Lot: {self.position["ticker"]} {self.qty} of {self.enter["id"]}>'
+
+    @property
+    def price(self):
+        return -self.enter['cash_flow'] / self.enter['qty']
+
+class PositionLedger():
+    """Keeps the open lots of every agent in per (agent, ticker) queues, oldest lot first.
+
+    Buys append a lot to the back of the queue. Sells consume lots from the front (FIFO) or the back (LIFO),
+    so closing a lot and appending its realized-PnL exit never sorts or scans the agent's positions.
+    The position dicts themselves still live in each account's `positions` list, in the order they were opened.
+    """
+    def __init__(self, ids: IdGenerator=None):
+        """
+        Args:
+            ids (IdGenerator, optional): the generator of position and exit ids. Defaults to the shared default generator.
+        """
+        self.ids = ids if ids is not None else default_ids
+        self.lots: Dict[Tuple[str, str], Deque[Lot]] = {}
+        self.positions: Dict[str, dict] = {}
+        self.ticker_positions: Dict[Tuple[str, str], List[dict]] = {}
+
+    def __repr__(self) -> str:
+        return f'<PositionLedger: {len(self.positions)} positions>'
+
+    def get_lots(self, agent: str, ticker: str) -> List[Lot]:
+        return list(self.lots.get((agent, ticker), ()))
+
+    def get_positions(self, agent: str, ticker: str) -> List[dict]:
+        """returns every position an agent has opened in a ticker, open or closed, in the order they were opened.
+        """
+        return self.ticker_positions.get((agent, ticker), [])
+
+    def enter(self, account, transaction: dict, position_id=None) -> dict:
+        """Opens a lot for a buy, adding it to the position `position_id` if the ledger knows it, or to a new position otherwise.
+
+        Args:
+            account (Account): the buyer.
+            transaction (dict): the buy side of the trade, as recorded in the account's transactions.
+            position_id (str, optional): the position to add to. Defaults to None.
+
+        returns:
+            dict: the position the lot was added to.
+        """
+        position = self.positions.get(position_id) if position_id is not None else None
+        if position is not None:
+            position['qty'] += transaction['qty']
+            position['enters'].append(transaction)
+        else:
+            position = Position(position_id if position_id is not None else self.ids(), transaction['ticker'], transaction['qty'], transaction['dt'], enters=[transaction]).to_dict()
+            account.positions.append(position)
+            self.positions[position['id']] = position
+            self.ticker_positions.setdefault((account.name, position['ticker']), []).append(position)
+        if transaction['qty'] > 0:
+            self.lots.setdefault((account.name, transaction['ticker']), deque()).append(Lot(position, transaction, transaction['qty']))
+        return position
+
+    def exit(self, account, transaction: dict, accounting='FIFO') -> List[dict]:
+        """Closes lots for a sell, oldest first for FIFO and newest first for LIFO, recording an exit on each position it touches.
+        Any quantity sold beyond the agent's open lots is left without an exit.
+
+        Args:
+            account (Account): the seller.
+            transaction (dict): the sell side of the trade, as recorded in the account's transactions.
+            accounting (str, optional): 'FIFO' or 'LIFO'. Defaults to 'FIFO'.
+
+        returns:
+            List[dict]: the exits that were recorded.
+        """
+        lots = self.lots.get((account.name, transaction['ticker']))
+        remaining = abs(transaction['qty'])
+        if not lots or remaining == 0:
+            return []
+        price = abs(transaction['cash_flow']) / remaining
+        lifo = accounting == 'LIFO'
+        exits = []
+        while remaining > 0 and lots:
+            lot = lots[-1] if lifo else lots[0]
+            qty = min(lot.qty, remaining)
+            exit = Exit(price * qty, transaction['ticker'], qty, transaction['dt'], transaction['type'], (price - lot.price) * qty, lot.enter['id'], lot.enter['dt'], self.ids()).to_dict()
+            lot.position['exits'].append(exit)
+            lot.position['qty'] -= qty
+            lot.qty -= qty
+            remaining -= qty
+            exits.append(exit)
+            if lot.qty <= 0:
+                if lifo:
+                    lots.pop()
+                else:
+                    lots.popleft()
+        if not lots:
+            del self.lots[(account.name, transaction['ticker'])]
+        return exits
+
+    def remove_account(self, account) -> None:
+        """Forgets the lots and positions of an account, e.g. before an account with the same name replaces it.
+        """
+        for key in [key for key in self.lots if key[0] == account.name]:
+            del self.lots[key]
+        for key in [key for key in self.ticker_positions if key[0] == account.name]:
+            del self.ticker_positions[key]
+        for position in account.positions:
+            self.positions.pop(position['id'], None)
+
+    def clear(self) -> None:
+        self.lots.clear()
+        self.positions.clear()
+        self.ticker_positions.clear()
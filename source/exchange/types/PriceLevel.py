@@ -0,0 +1,33 @@
+from collections import OrderedDict
+from .LimitOrder import LimitOrder
+
+class PriceLevel():
+    """A PriceLevel holds every resting order at a single price, in the order they arrived (FIFO).
+    """
+    def __init__(self, price, ticks=None):
+        self.price = price
+        self.ticks = ticks if ticks is not None else price
+        self.qty = 0
+        self.orders: "OrderedDict[str, LimitOrder]" = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f'<PriceLevel: {self.qty}@{self.price}>'
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def append(self, order: LimitOrder) -> None:
+        self.orders[order.id] = order
+        self.qty += order.qty
+
+    def remove(self, order: LimitOrder) -> None:
+        del self.orders[order.id]
+        self.qty -= order.qty
+
+    def fill(self, order: LimitOrder, qty: int) -> None:
+        order.qty -= qty
+        self.qty -= qty
+
+    @property
+    def first(self) -> LimitOrder:
+        return next(iter(self.orders.values()))
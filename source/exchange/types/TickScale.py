@@ -0,0 +1,60 @@
+CASH_SCALE = 10**8
+
+def to_cash_units(amount) -> int:
+    """returns a cash amount as an integer number of 1e-8 units.
+    """
+    return round(amount * CASH_SCALE)
+
+def from_cash_units(units: int) -> float:
+    return units / CASH_SCALE
+
+class TickScale():
+    """The price grid and lot size of an asset.
+
+    Prices are held as an integer number of ticks so that resting orders compare and group exactly,
+    and the cash of a trade is computed in integer 1e-8 units from the ticks, so balances never pick up float error.
+    Prices and cash are turned back into floats only where they leave the exchange.
+    """
+    __slots__ = ('tick_size', 'lot_size', '_ticks_per_unit', '_units_per_tick')
+
+    def __init__(self, tick_size=0.01, lot_size=1):
+        """
+        Args:
+            tick_size (float, optional): the smallest price increment, either a whole number or 1/n of one, and no finer than 1e-8. Defaults to 0.01.
+            lot_size (float, optional): quantities must be a multiple of it. Defaults to 1.
+        """
+        if tick_size <= 0 or lot_size <= 0:
+            raise ValueError('tick_size and lot_size must be positive')
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        # dividing by a whole number of ticks per unit gives the closest float to the price, where multiplying by 0.01 may not
+        self._ticks_per_unit = round(1 / tick_size) if tick_size < 1 else None
+        self._units_per_tick = round(tick_size * CASH_SCALE)
+        if self._units_per_tick == 0:
+            raise ValueError('tick_size must be at least 1e-8')
+
+    def __repr__(self) -> str:
+        return f'<TickScale: {self.tick_size} x {self.lot_size}>'
+
+    def to_ticks(self, price) -> int:
+        """returns a price as the nearest whole number of ticks.
+        """
+        if self._ticks_per_unit is not None:
+            return round(price * self._ticks_per_unit)
+        return round(price / self.tick_size)
+
+    def to_price(self, ticks: int) -> float:
+        if self._ticks_per_unit is not None:
+            return ticks / self._ticks_per_unit
+        return ticks * self.tick_size
+
+    def cash_units(self, ticks: int, qty) -> int:
+        """returns the cash value of qty at a price in ticks, in integer 1e-8 units.
+        """
+        if type(qty) is int:
+            return ticks * self._units_per_tick * qty
+        return round(ticks * self._units_per_tick * qty)
+
+    def valid_qty(self, qty) -> bool:
+        lots = qty / self.lot_size
+        return abs(lots - round(lots)) < 1e-9
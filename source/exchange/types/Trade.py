@@ -1,6 +1,8 @@
 from datetime import datetime
 
 class Trade():
+    __slots__ = ('ticker', 'qty', 'price', 'buyer', 'seller', 'dt', 'fee')
+
     def __init__(self, ticker, qty, price, buyer, seller, dt=None, fee=0):
         self.ticker = ticker
         self.qty = qty
@@ -0,0 +1,97 @@
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Union
+from .Trade import Trade
+from .TradeTape import TradeTape
+
+class TradeLog():
+    """The exchange's trade history, kept as one TradeTape per ticker.
+
+    With a TradeStore, every trade is also persisted and each tape only keeps the most recent `hot_window` trades in memory;
+    older trades are paged in from the store when they are asked for.
+    """
+    def __init__(self, store=None, hot_window=None):
+        """
+        Args:
+            store (TradeStore, optional): where trades are persisted. Defaults to None, which keeps every trade in memory.
+            hot_window (int, optional): the number of trades per ticker kept in memory when a store is used. Defaults to None, which keeps them all.
+        """
+        self.store = store
+        self.hot_window = hot_window if store is not None else None
+        self.tapes: Dict[str, TradeTape] = {}
+
+    def __repr__(self) -> str:
+        return f'<TradeLog: {len(self)} trades>'
+
+    def __len__(self) -> int:
+        return sum(tape.next_seq for tape in self.tapes.values())
+
+    def __iter__(self) -> Iterator[dict]:
+        for ticker in list(self.tapes):
+            yield from self.rows(ticker)
+
+    def tape(self, ticker:str) -> TradeTape:
+        if ticker not in self.tapes:
+            offset = self.store.count(ticker) if self.store is not None else 0
+            self.tapes[ticker] = TradeTape(ticker, offset=offset)
+        return self.tapes[ticker]
+
+    def get(self, ticker:str) -> Union[TradeTape, None]:
+        return self.tapes.get(ticker)
+
+    def record(self, ticker, qty, price, buyer, seller, dt=None, fee=0) -> None:
+        tape = self.tape(ticker)
+        if self.store is not None:
+            self.store.append(ticker, tape.next_seq, dt, price, qty, buyer, seller, fee)
+        tape.append(dt, price, qty, buyer, seller, fee)
+        if self.hot_window is not None and len(tape) > self.hot_window + self.hot_window // 4:
+            tape.trim(self.hot_window)
+
+    def append(self, trade: Trade) -> None:
+        self.record(trade.ticker, trade.qty, trade.price, trade.buyer, trade.seller, trade.dt, trade.fee)
+
+    def tail(self, ticker:str, limit=20) -> List[dict]:
+        """returns the last `limit` trades of a ticker, oldest first, paging older trades in from the store if needed.
+        """
+        tape = self.tapes.get(ticker)
+        if tape is None:
+            return []
+        trades = tape.tail(limit)
+        missing = limit - len(trades)
+        if missing > 0 and tape.offset > 0 and self.store is not None:
+            trades = self.store.tail(ticker, missing, before_seq=tape.offset) + trades
+        return trades
+
+    def between(self, ticker:str, start=None, end=None) -> List[dict]:
+        """returns the trades of a ticker with start <= dt < end, oldest first.
+        Without a store, e.g. after restoring a trimmed tape, only the trades still in memory can be returned.
+        """
+        tape = self.tapes.get(ticker)
+        if tape is None:
+            return []
+        in_memory = tape.offset == 0 or (start is not None and len(tape) > 0 and start >= tape.dt[0])
+        if not in_memory and self.store is not None:
+            return self.store.between(ticker, start, end)
+        lo = bisect_left(tape.dt, start) if start is not None else 0
+        hi = bisect_left(tape.dt, end) if end is not None else len(tape)
+        return [tape.row(idx) for idx in range(lo, hi)]
+
+    def rows(self, ticker:str) -> Iterator[dict]:
+        """iterates every trade of a ticker, oldest first.
+        """
+        tape = self.tapes.get(ticker)
+        if tape is None:
+            return
+        if self.store is not None and tape.offset > 0:
+            yield from self.store.rows(ticker)
+        else:
+            for idx in range(len(tape)):
+                yield tape.row(idx)
+
+    def flush(self) -> None:
+        if self.store is not None:
+            self.store.flush()
+
+    def clear(self) -> None:
+        self.tapes.clear()
+        if self.store is not None:
+            self.store.clear()
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import List, Union
+
+class TradeTape():
+    """An append-only, columnar record of the trades of a single asset.
+
+    Each trade is stored as one entry in each column, so the latest trade is read in O(1) and the last N trades are a slice of the columns.
+    When older trades are trimmed, `offset` counts them, so `offset + len(tape)` is the sequence number of the next trade.
+    """
+    def __init__(self, ticker:str, offset=0):
+        self.ticker = ticker
+        self.offset = offset
+        self.dt: List[datetime] = []
+        self.price: List[float] = []
+        self.qty: List[int] = []
+        self.buyer: List[str] = []
+        self.seller: List[str] = []
+        self.fee: List[float] = []
+
+    def __repr__(self) -> str:
+        return f'<TradeTape: {self.ticker} {len(self.dt)} trades>'
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+    def append(self, dt, price, qty, buyer, seller, fee=0) -> None:
+        self.dt.append(dt)
+        self.price.append(price)
+        self.qty.append(qty)
+        self.buyer.append(buyer)
+        self.seller.append(seller)
+        self.fee.append(fee)
+
+    def row(self, idx:int) -> dict:
+        """returns a trade in the same shape as Trade.to_dict()
+        """
+        return {
+            'dt': self.dt[idx],
+            'ticker': self.ticker,
+            'qty': self.qty[idx],
+            'price': self.price[idx],
+            'buyer': self.buyer[idx],
+            'seller': self.seller[idx],
+            'fee': self.fee[idx]
+        }
+
+    def latest(self) -> Union[dict, None]:
+        if not self.dt:
+            return None
+        return self.row(-1)
+
+    def tail(self, limit=20) -> List[dict]:
+        """returns the last `limit` trades, oldest first.
+        """
+        start = max(len(self.dt) - limit, 0)
+        return [self.row(idx) for idx in range(start, len(self.dt))]
+
+    @property
+    def next_seq(self) -> int:
+        return self.offset + len(self.dt)
+
+    def trim(self, keep:int) -> None:
+        """Drops all but the most recent `keep` trades from memory.
+        """
+        drop = len(self.dt) - keep
+        if drop <= 0:
+            return
+        for column in (self.dt, self.price, self.qty, self.buyer, self.seller, self.fee):
+            del column[:drop]
+        self.offset += drop
+
+    def clear(self) -> None:
+        for column in (self.dt, self.price, self.qty, self.buyer, self.seller, self.fee):
+            column.clear()
+        self.offset = 0
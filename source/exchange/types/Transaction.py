@@ -1,10 +1,13 @@
-from uuid import uuid4 as UUID
+from .IdGenerator import default_ids
+
 class Transaction():
-    def __init__(self, cash_flow, ticker, qty, dt, side):
+    __slots__ = ('id', 'cash_flow', 'ticker', 'qty', 'dt', 'type')
+
+    def __init__(self, cash_flow, ticker, qty, dt, side, id=None):
         """
         Represents one side of a transaction.
         """
-        self.id = str(UUID())
+        self.id = id if id is not None else default_ids()
         self.cash_flow = cash_flow
         self.ticker = ticker
         self.qty = qty
@@ -28,8 +31,10 @@ class Transaction():
         }
 
 class Exit(Transaction):
-    def __init__(self, cash_flow, ticker, qty, dt, side, pnl, enter_id, enter_date):
-        super().__init__(cash_flow, ticker, qty, dt, side)
+    __slots__ = ('pnl', 'enter_id', 'enter_date')
+
+    def __init__(self, cash_flow, ticker, qty, dt, side, pnl, enter_id, enter_date, id=None):
+        super().__init__(cash_flow, ticker, qty, dt, side, id)
         self.pnl = pnl
         self.enter_id = enter_id
         self.enter_date = enter_date
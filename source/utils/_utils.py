@@ -1,5 +1,6 @@
 from datetime import timedelta, datetime
 import random, string
+import re
 import json
 
 def dumps(data):
@@ -21,6 +22,23 @@ def get_timedelta(time_unit) -> timedelta:
         'day': timedelta(days=1),
     }[time_unit]
 
+def get_interval_timedelta(interval) -> timedelta:
+    """Parses a pandas style bar interval such as '1Min', '15Min', '1H' or '1D' into a timedelta.
+    """
+    match = re.fullmatch(r'\s*(\d*)\s*([a-zA-Z]+)\s*', str(interval))
+    if match is None:
+        raise ValueError(f'unknown interval {interval}')
+    count = int(match.group(1)) if match.group(1) else 1
+    unit = {
+        's': 'seconds', 'sec': 'seconds', 'second': 'seconds',
+        't': 'minutes', 'min': 'minutes', 'minute': 'minutes',
+        'h': 'hours', 'hour': 'hours',
+        'd': 'days', 'day': 'days',
+    }.get(match.group(2).lower())
+    if unit is None:
+        raise ValueError(f'unknown interval {interval}')
+    return timedelta(**{unit: count})
+
 def get_datetime_range(start_date, end_date,time_unit='day') -> list:
     date_range =[]
     delta = get_timedelta(time_unit)
@@ -44,4 +62,7 @@ def format_dataframe_rows_to_dict(df) -> list:
     return result_list
 
 def string_to_time(string) -> datetime:
+    if isinstance(string, datetime):
+        # the msgpack codec already decodes datetimes
+        return string
     return datetime.strptime(string, '%Y-%m-%d %H:%M:%S')
\ No newline at end of file
@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+from source.exchange.types.Account import Account
+from source.exchange.types.AccountRegistry import AccountRegistry
+
+class AccountTests(unittest.TestCase):
+
+    def test_account_to_dict(self):
+        account = Account('agent1', 100)
+        self.assertEqual(account.to_dict(), {'name': 'agent1', 'cash': 100, '_transactions': [], 'positions': [], 'assets': {}})
+
+    def test_account_item_access(self):
+        account = Account('agent1', 100, assets={'AAPL': 2})
+        account['cash'] += 50
+        self.assertEqual(account.cash, 150)
+        self.assertEqual(account['assets'], {'AAPL': 2})
+        self.assertNotIn('error', account)
+        with self.assertRaises(KeyError):
+            account['error']
+
+    def test_account_has_no_dict(self):
+        account = Account('agent1', 100)
+        with self.assertRaises(AttributeError):
+            account.other = 1
+
+class AccountRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = AccountRegistry()
+        self.registry.add(Account('agent1', 100))
+        self.registry.add(Account('agent2', 200))
+
+    def test_registry_get(self):
+        self.assertEqual(self.registry.get('agent2').cash, 200)
+        self.assertIsNone(self.registry.get('agent3'))
+        self.assertIn('agent1', self.registry)
+
+    def test_registry_order(self):
+        self.assertEqual([account.name for account in self.registry], ['agent1', 'agent2'])
+        self.assertEqual(self.registry[1].name, 'agent2')
+        self.assertEqual(self.registry.index('agent2'), 1)
+        self.assertEqual(len(self.registry), 2)
+
+    def test_registry_clear(self):
+        self.registry.clear()
+        self.assertEqual(len(self.registry), 0)
+        self.assertIsNone(self.registry.get('agent1'))
+
+if __name__ == '__main__':
+    unittest.main()
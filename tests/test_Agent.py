@@ -5,8 +5,11 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
 from source.agents.AgentProcess import Agent
 from source.exchange.ExchangeRequests import ExchangeRequests as Requests
+from source.exchange.MarketDataFeed import MarketDataFeed
+from source.exchange.MarketDataHub import MarketDataHub
 from .MockRequester import MockRequester
 import asyncio
+import json
 
 class TestAgent(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
@@ -333,6 +336,98 @@ class GetAssetsTest(unittest.IsolatedAsyncioTestCase):
 
     async def test_get_assets(self):
         self.assertEqual(await self.agent.get_assets(), await self.requester.get_assets(self.agent.name))
+class HubPublisher():
+    def __init__(self, hub):
+        self.hub = hub
+        self.dropping = False
+
+    def publish(self, topic, message):
+        if not self.dropping:
+            self.hub.handle(json.loads(message))
+        return True
+
+class LocalMarketDataTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.mock_requester = MockRequester()
+        await self.mock_requester.init()
+        self.exchange = self.mock_requester.responder.exchange
+        self.hub = MarketDataHub(tickers=["AAPL"])
+        self.publisher = HubPublisher(self.hub)
+        self.exchange.feed = MarketDataFeed(self.publisher)
+        self.exchange.feed.snapshot(self.exchange.books["AAPL"])
+        self.requester = Requests(self.mock_requester)
+        self.agent = Agent("TestAgent", 10000, requester=self.requester, market_data=self.hub)
+
+    async def asyncTearDown(self) -> None:
+        if self.hub.task is not None:
+            self.hub.task.cancel()
+
+    async def assertSameAsExchange(self):
+        self.assertEqual(await self.agent.get_best_bid("AAPL"), await self.requester.get_best_bid("AAPL"))
+        self.assertEqual(await self.agent.get_best_ask("AAPL"), await self.requester.get_best_ask("AAPL"))
+        self.assertEqual(await self.agent.get_midprice("AAPL"), await self.requester.get_midprice("AAPL"))
+        self.assertEqual(await self.agent.get_quotes("AAPL"), await self.requester.get_quotes("AAPL"))
+        self.assertEqual(await self.agent.get_depth("AAPL", 5), await self.requester.get_depth("AAPL", 5))
+        self.assertEqual(await self.agent.get_order_book("AAPL"), await self.requester.get_order_book("AAPL"))
+        self.assertEqual(await self.agent.get_latest_trade("AAPL"), await self.requester.get_latest_trade("AAPL"))
+
+    async def test_reads_served_locally(self):
+        await self.exchange.market_buy("AAPL", 2, self.mock_requester.responder.agent)
+        await self.exchange.limit_buy("AAPL", 149, 3, self.mock_requester.responder.agent)
+        self.assertTrue(self.hub.synced("AAPL"))
+        self.assertEqual(await self.agent.get_depth("AAPL"), self.exchange.books["AAPL"].depth(10))
+        await self.assertSameAsExchange()
+
+    async def test_same_results_from_replica_and_exchange(self):
+        await self.exchange.market_buy("AAPL", 2, self.mock_requester.responder.agent)
+        await self.assertSameAsExchange()
+        self.publisher.dropping = True
+        await self.exchange.limit_buy("AAPL", 149.5, 1, self.mock_requester.responder.agent)
+        self.publisher.dropping = False
+        await self.exchange.limit_buy("AAPL", 149.6, 1, self.mock_requester.responder.agent)
+        self.assertFalse(self.hub.synced("AAPL"))
+        # the replica's snapshot request is lost too, so every read falls back to the exchange
+        self.publisher.dropping = True
+        await self.assertSameAsExchange()
+        self.assertFalse(self.hub.synced("AAPL"))
+
+    async def test_feed_invalidates_requests_cache(self):
+        requester = Requests(self.mock_requester, cache=True)
+        agent = Agent("CachingAgent", 10000, requester=requester, market_data=self.hub)
+        self.exchange.feed.snapshot(self.exchange.books["AAPL"])
+        first = await requester.get_best_bid("AAPL")
+        self.assertIs(await requester.get_best_bid("AAPL"), first)
+        await self.exchange.limit_buy("AAPL", 149.5, 1, self.mock_requester.responder.agent)
+        self.assertEqual(requester.cache.seq["AAPL"], self.exchange.feed.seq["AAPL"])
+        self.assertEqual((await requester.get_best_bid("AAPL"))['price'], 149.5)
+
+    async def test_resyncs_when_out_of_sync(self):
+        self.publisher.dropping = True
+        await self.exchange.limit_buy("AAPL", 149.5, 1, self.mock_requester.responder.agent)
+        self.publisher.dropping = False
+        await self.exchange.limit_buy("AAPL", 149.6, 1, self.mock_requester.responder.agent)
+        self.assertFalse(self.hub.synced("AAPL"))
+        self.assertEqual(await self.agent.get_best_bid("AAPL"), await self.requester.get_best_bid("AAPL"))
+        # the first read asks the exchange for a snapshot, which brings the replica back in sync
+        self.assertEqual((await self.agent.get_quotes("AAPL"))['bid_p'], 149.6)
+        self.assertTrue(self.hub.synced("AAPL"))
+
+    async def test_new_replica_requests_snapshot(self):
+        hub = MarketDataHub(tickers=["AAPL"])
+        self.publisher.hub = hub
+        agent = Agent("LateAgent", 10000, requester=self.requester, market_data=hub)
+        self.publisher.dropping = True
+        await agent.get_quotes("AAPL")
+        self.publisher.dropping = False
+        # a second read within resync_seconds does not ask again
+        await agent.get_quotes("AAPL")
+        self.assertFalse(hub.synced("AAPL"))
+        hub.snapshot_requested["AAPL"] -= hub.resync_seconds
+        self.assertEqual(await agent.get_quotes("AAPL"), await self.requester.get_quotes("AAPL"))
+        self.assertTrue(hub.synced("AAPL"))
+        self.assertFalse(hub.needs_snapshot("MSFT"))
+        hub.task.cancel()
+
 
 if __name__ == '__main__':
     asyncio.run(unittest.main())
@@ -0,0 +1,41 @@
+import unittest
+from datetime import datetime
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+from source.exchange.types.BarAggregator import BarAggregator
+from source.exchange.types.TradeTape import TradeTape
+
+class BarAggregatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = BarAggregator('AAPL', intervals=('1Min', '15Min', '1D'))
+        self.bars.add(datetime(2023, 1, 1, 0, 0), 100, 1)
+        self.bars.add(datetime(2023, 1, 1, 0, 5), 105, 2)
+        self.bars.add(datetime(2023, 1, 1, 0, 10), 95, 3)
+        self.bars.add(datetime(2023, 1, 1, 0, 20), 101, 4)
+
+    def test_daily_bar(self):
+        self.assertEqual(self.bars.get('1D'), [{'open': 100, 'high': 105, 'low': 95, 'close': 101, 'volume': 10, 'dt': '01/01/2023, 00:00:00'}])
+
+    def test_intraday_bars(self):
+        bars = self.bars.get('15Min')
+        self.assertEqual(len(bars), 2)
+        self.assertEqual(bars[0], {'open': 100, 'high': 105, 'low': 95, 'close': 95, 'volume': 6, 'dt': '01/01/2023, 00:00:00'})
+        self.assertEqual(bars[1]['dt'], '01/01/2023, 00:15:00')
+        self.assertEqual(len(self.bars.get('1Min', limit=2)), 2)
+
+    def test_unkept_interval_from_tape(self):
+        tape = TradeTape('AAPL')
+        tape.append(datetime(2023, 1, 1, 0, 0), 100, 1, 'Buyer', 'Seller')
+        tape.append(datetime(2023, 1, 1, 0, 6), 110, 1, 'Buyer', 'Seller')
+        bars = self.bars.get('5Min', trades=tape.tail(len(tape)))
+        self.assertEqual([bar['close'] for bar in bars], [100, 110])
+
+    def test_ignores_trades_without_time(self):
+        self.bars.add(None, 1000, 1)
+        self.assertEqual(self.bars.get('1D')[0]['high'], 105)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from source.exchange.CallAuction import clearing_price
+
+class ClearingPriceTestCase(unittest.TestCase):
+    def test_no_cross(self):
+        self.assertEqual(clearing_price([{'price': 99, 'qty': 5}], [{'price': 101, 'qty': 5}]), (None, 0))
+        self.assertEqual(clearing_price([], [{'price': 101, 'qty': 5}]), (None, 0))
+
+    def test_maximizes_volume(self):
+        bids = [{'price': 102, 'qty': 3}, {'price': 101, 'qty': 4}, {'price': 100, 'qty': 5}]
+        asks = [{'price': 99, 'qty': 2}, {'price': 100, 'qty': 3}, {'price': 101, 'qty': 4}]
+        # demand at 101 is 7 and supply 9, the most that crosses anywhere
+        self.assertEqual(clearing_price(bids, asks), (101.0, 7))
+
+    def test_ties_go_to_smallest_imbalance_then_reference(self):
+        bids = [{'price': 101, 'qty': 5}]
+        asks = [{'price': 99, 'qty': 5}]
+        self.assertEqual(clearing_price(bids, asks), (99.0, 5))
+        self.assertEqual(clearing_price(bids, asks, reference=100.6), (101.0, 5))
+
+if __name__ == '__main__':
+    unittest.main()
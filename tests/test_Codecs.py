@@ -0,0 +1,60 @@
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+import unittest
+from datetime import datetime
+from source.Codecs import get_codec, pack, unpack, msgpack
+from source.exchange.ExchangeRequests import ExchangeRequests as Requests
+from .MockRequester import MockRequester
+
+class JsonCodecTest(unittest.TestCase):
+    def test_compact(self):
+        codec = get_codec('json')
+        self.assertEqual(pack(codec, {'b': 1, 'a': [1, 2]}), b'{"b":1,"a":[1,2]}')
+
+    def test_datetime(self):
+        codec = get_codec('json')
+        self.assertEqual(unpack(pack(codec, {'dt': datetime(2023, 1, 1, 9, 30)}))[1], {'dt': '2023-01-01 09:30:00'})
+
+    def test_untagged_frame(self):
+        codec, msg = unpack(b'{"topic": "sim_time"}')
+        self.assertEqual(codec.name, 'json')
+        self.assertEqual(msg, {'topic': 'sim_time'})
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            get_codec('xml')
+
+@unittest.skipIf(msgpack is None, 'msgpack is not installed')
+class MsgpackCodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        codec = get_codec('msgpack')
+        msg = {'price': 150.25, 'qty': 3, 'ids': ['a', 'b'], 'dt': datetime(1700, 1, 1, 0, 0, 1, 5), 1: None}
+        frame = pack(codec, msg)
+        self.assertEqual(frame[:1], b'm')
+        decoded_codec, decoded = unpack(frame)
+        self.assertIs(decoded_codec, codec)
+        self.assertEqual(decoded, msg)
+
+    def test_smaller_than_json(self):
+        msg = {'bids': [{'price': 149.5 + i, 'qty': i} for i in range(20)]}
+        self.assertLess(len(pack(get_codec('msgpack'), msg)), len(pack(get_codec('json'), msg)))
+
+@unittest.skipIf(msgpack is None, 'msgpack is not installed')
+class MsgpackRequestsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mock_requester = MockRequester('msgpack')
+        await self.mock_requester.init()
+        self.requests = Requests(self.mock_requester)
+
+    async def test_sim_time(self):
+        self.assertEqual(await self.requests.get_sim_time(), datetime(2023, 1, 1))
+
+    async def test_best_bid(self):
+        bid = await self.requests.get_best_bid('AAPL')
+        self.assertEqual(bid['price'], 149)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import asyncio
+import tempfile
 import unittest
 from datetime import datetime
 import sys
@@ -9,8 +10,8 @@ sys.path.append(parent_dir)
 from source.exchange.Exchange import Exchange
 from source.exchange.types.LimitOrder import LimitOrder
 from source.exchange.types.OrderSide import OrderSide
-from source.exchange.types.Position import Position
 from source.exchange.types.Transaction import Transaction
+from source.exchange.types.TickScale import to_cash_units
 
 class CreateAssetTestCase(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
@@ -153,6 +154,24 @@ class CancelOrderTestCase(unittest.IsolatedAsyncioTestCase):
         cancel = await self.exchange.cancel_order("error")
         self.assertEqual(cancel, {"cancelled_order": "order not found"})
 
+    async def test_cancel_order_updates_index(self):
+        order = await self.exchange.limit_buy("AAPL", price=149, qty=2, creator=self.agent)
+        self.assertIn(order.id, self.exchange.order_index)
+        await self.exchange.cancel_order(order.id)
+        self.assertNotIn(order.id, self.exchange.order_index)
+        await self.exchange.cancel_order(order.id)
+        stats = await self.exchange.get_order_index_stats()
+        self.assertEqual(stats, {'orders': 2, 'hits': 1, 'misses': 1})
+
+    async def test_filled_order_leaves_index(self):
+        seed_bid = self.exchange.books["AAPL"].bids.best
+        seed_ask = self.exchange.books["AAPL"].asks.best
+        order = await self.exchange.limit_buy("AAPL", price=152, qty=2, creator=self.agent)
+        self.assertIn(seed_ask.id, self.exchange.order_index)
+        self.assertNotIn(order.id, self.exchange.order_index)
+        await self.exchange.market_sell("AAPL", qty=1, seller=self.agent)
+        self.assertNotIn(seed_bid.id, self.exchange.order_index)
+
 class CancelAllOrdersTestCase(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
         self.exchange = Exchange(datetime=datetime(2023, 1, 1))
@@ -174,6 +193,20 @@ class CancelAllOrdersTestCase(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(self.exchange.books["AAPL"].bids), 2)
         self.assertEqual(len(self.exchange.books["AAPL"].asks), 1)
 
+    async def test_cancel_all_orders_all_tickers(self):
+        await self.exchange.create_asset("MSFT", seed_price=100, seed_bid=0.99, seed_ask=1.01)
+        await self.exchange.limit_buy("AAPL", price=150, qty=1, creator=self.agent1, tif="TEST")
+        await self.exchange.limit_buy("MSFT", price=100, qty=1, creator=self.agent1, tif="TEST")
+        await self.exchange.limit_buy("MSFT", price=100, qty=1, creator=self.agent2, tif="TEST")
+
+        result = await self.exchange.cancel_all_orders(self.agent1)
+
+        self.assertEqual(result, {"cancelled_all_orders": ["AAPL", "MSFT"]})
+        self.assertEqual(len(self.exchange.books["AAPL"].bids), 1)
+        self.assertEqual(len(self.exchange.books["MSFT"].bids), 2)
+        self.assertEqual(self.exchange.order_index.get_agent_orders(self.agent1), [])
+        self.assertEqual(len(self.exchange.order_index.get_agent_orders(self.agent2, "MSFT")), 1)
+
 class LimitBuyTestCase(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
         self.exchange = Exchange(datetime=datetime(2023, 1, 1))
@@ -396,6 +429,191 @@ class GetAgentIndexTestCase(unittest.IsolatedAsyncioTestCase):
         result = await self.exchange._Exchange__get_agent_index(self.agent)
         self.assertEqual(result, 0)
 
+class SubmitBatchTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1))
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        self.agent = (await self.exchange.register_agent("quoter", initial_cash=10000))['registered_agent']
+
+    async def test_submit_batch(self):
+        order = await self.exchange.limit_buy("AAPL", price=148, qty=1, creator=self.agent)
+        results = await self.exchange.submit_batch([
+            {'topic': 'cancel_all_orders', 'agent': self.agent, 'ticker': 'AAPL'},
+            {'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 149, 'qty': 2, 'creator': self.agent},
+            {'topic': 'market_buy', 'ticker': 'AAPL', 'qty': 1, 'buyer': self.agent},
+            {'topic': 'cancel_order', 'order_id': order.id},
+            {'topic': 'fly'},
+            {'topic': 'limit_sell', 'ticker': 'AAPL', 'price': 160},
+        ])
+        self.assertEqual(results[0], {'cancelled_all_orders': 'AAPL'})
+        self.assertEqual(results[1]['price'], 149)
+        self.assertEqual(results[1]['qty'], 2)
+        self.assertEqual(results[2]['fills'][0]['price'], 151.5)
+        self.assertEqual(results[3], {'cancelled_order': 'order not found'})
+        self.assertIn('error', results[4])
+        self.assertIn('error', results[5])
+        self.assertEqual(self.exchange.books["AAPL"].bids.best.id, results[1]['id'])
+
+class AuctionTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1), auction=True)
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        self.buyer1 = (await self.exchange.register_agent("buyer1", initial_cash=10000))['registered_agent']
+        self.buyer2 = (await self.exchange.register_agent("buyer2", initial_cash=10000))['registered_agent']
+
+    async def test_orders_rest_until_tick(self):
+        await self.exchange.limit_buy("AAPL", price=152, qty=3, creator=self.buyer1)
+        self.assertEqual(len(self.exchange.books["AAPL"].bids), 2)
+        self.assertEqual(self.exchange.books["AAPL"].asks.best.qty, 1000)
+
+        await self.exchange._set_datetime(datetime(2023, 1, 2))
+        self.assertEqual(self.exchange.datetime, datetime(2023, 1, 2))
+        self.assertEqual(self.exchange.books["AAPL"].asks.best.qty, 997)
+        trade = await self.exchange.get_latest_trade("AAPL")
+        self.assertEqual(trade['price'], 151.5)
+        self.assertEqual(trade['dt'], datetime(2023, 1, 1))
+
+    async def test_run_auction_uniform_price(self):
+        await self.exchange.limit_buy("AAPL", price=153, qty=2, creator=self.buyer1)
+        await self.exchange.limit_buy("AAPL", price=152, qty=2, creator=self.buyer2)
+        result = await self.exchange.run_auction("AAPL")
+        self.assertEqual(result[0]['price'], 151.5)
+        self.assertEqual(result[0]['qty'], 4)
+        self.assertEqual([fill['buyer'] for fill in result[0]['fills']], [self.buyer1, self.buyer2])
+        self.assertEqual((await self.exchange.get_assets(self.buyer1))['assets']['AAPL'], 2)
+        self.assertEqual((await self.exchange.get_cash(self.buyer2))['cash'], 10000 - 2 * 151.5)
+        self.assertEqual(len(self.exchange.books["AAPL"].bids), 1)
+        self.assertEqual(await self.exchange.run_auction(), [])
+
+    async def test_auction_cancels_unsettleable_orders(self):
+        await self.exchange.limit_buy("AAPL", price=160, qty=60, creator=self.buyer1)
+        await self.exchange.remove_cash(self.buyer1, 9000)
+        await self.exchange.limit_buy("AAPL", price=155, qty=2, creator=self.buyer2)
+        result = await self.exchange.run_auction("AAPL")
+        self.assertEqual(result[0]['fills'], [{'qty': 2, 'price': result[0]['price'], 'buyer': self.buyer2, 'seller': 'init_seed_AAPL'}])
+        self.assertEqual(self.exchange.order_index.get_agent_orders(self.buyer1), [])
+
+class SnapshotTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1))
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        self.agent = (await self.exchange.register_agent("agent", initial_cash=10000))['registered_agent']
+        await self.exchange.market_buy("AAPL", qty=2, buyer=self.agent, fee=0)
+        self.order = await self.exchange.limit_buy("AAPL", price=149, qty=3, creator=self.agent)
+        self.path = os.path.join(tempfile.mkdtemp(), 'exchange.snapshot')
+
+    async def test_snapshot_and_restore(self):
+        result = await self.exchange.snapshot(self.path)
+        self.assertEqual(result['snapshot'], self.path)
+        self.assertGreater(result['bytes'], 0)
+
+        restored = Exchange()
+        self.assertEqual(await restored.restore(self.path), {'restored': self.path, 'datetime': datetime(2023, 1, 1), 'journal_seq': None})
+        self.assertEqual(await restored.get_cash(self.agent), await self.exchange.get_cash(self.agent))
+        self.assertEqual(await restored.get_quotes("AAPL"), await self.exchange.get_quotes("AAPL"))
+        self.assertEqual(await restored.get_latest_trade("AAPL"), await self.exchange.get_latest_trade("AAPL"))
+        self.assertEqual(await restored.get_shares_outstanding("AAPL"), 1000)
+
+        # the restored state is live: resting orders can be cancelled and lots closed
+        self.assertEqual(await restored.cancel_order(self.order.id), {'cancelled_order': self.order.id})
+        await restored.limit_buy("AAPL", 148, 2, 'init_seed_AAPL')
+        await restored.market_sell("AAPL", qty=2, seller=self.agent, fee=0)
+        positions = (await restored.get_agent(self.agent))['positions']
+        self.assertEqual(positions[0]['qty'], 0)
+        self.assertEqual(len(self.exchange.books["AAPL"].bids), 2)
+
+    async def test_restore_continues_ids(self):
+        await self.exchange.snapshot(self.path)
+        restored = Exchange()
+        await restored.restore(self.path)
+        order = await restored.limit_buy("AAPL", 140, 1, self.agent)
+        self.assertEqual(order.id, str(self.exchange.ids.last + 1))
+        self.assertEqual((await self.exchange.limit_buy("AAPL", 140, 1, self.agent)).id, order.id)
+
+    async def test_restore_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        with self.assertRaises(ValueError):
+            await Exchange().restore(self.path)
+
+class RiskTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1))
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        self.agent = (await self.exchange.register_agent("agent", initial_cash=1000))['registered_agent']
+
+    async def test_resting_orders_reserve_cash(self):
+        first = await self.exchange.limit_buy("AAPL", 140, 5, self.agent)
+        self.assertEqual(first.creator, self.agent)
+        # 700 is held by the first order, so a second order for 700 is over the 300 left
+        second = await self.exchange.limit_buy("AAPL", 140, 5, self.agent)
+        self.assertEqual(second.creator, 'insufficient_funds')
+        await self.exchange.cancel_order(first.id)
+        self.assertEqual((await self.exchange.limit_buy("AAPL", 140, 5, self.agent)).creator, self.agent)
+
+    async def test_resting_orders_reserve_assets(self):
+        await self.exchange.market_buy("AAPL", 2, self.agent)
+        await self.exchange.limit_sell("AAPL", 160, 2, self.agent)
+        self.assertEqual(await self.exchange.market_sell("AAPL", 1, self.agent), {'market_sell': 'insufficient assets'})
+        self.assertEqual(self.exchange.risk.reserved_assets(self.agent), {'AAPL': 2})
+
+    async def test_fills_release_reservations(self):
+        order = await self.exchange.limit_buy("AAPL", 149, 4, self.agent)
+        await self.exchange.cancel_order('init_seed_AAPL_ask')
+        await self.exchange.market_sell("AAPL", 3, 'init_seed_AAPL')
+        self.assertEqual(self.exchange.risk.reserved_cash(self.agent), to_cash_units(149))
+        await self.exchange.cancel_order(order.id)
+        self.assertEqual(self.exchange.risk.reserved_cash(self.agent), 0)
+
+    async def test_market_buy_stops_at_available_cash(self):
+        seller = (await self.exchange.register_agent("seller", initial_cash=1000))['registered_agent']
+        await self.exchange.market_buy("AAPL", 1, seller)
+        await self.exchange.cancel_order('init_seed_AAPL_bid')
+        await self.exchange.limit_sell("AAPL", 100, 1, seller)
+        # 7 at the best price of 100 passes the check, but after the first fill 900 only pays for 5 more at 151.5
+        result = await self.exchange.market_buy("AAPL", 7, self.agent)
+        self.assertEqual(result['fills'], [{'qty': 1, 'price': 100.0, 'fee': 0.0}, {'qty': 5, 'price': 151.5, 'fee': 0.0}])
+        self.assertEqual((await self.exchange.get_cash(self.agent))['cash'], 1000 - 100 - 5 * 151.5)
+
+    async def test_remove_cash_cancels_uncovered_orders(self):
+        old = await self.exchange.limit_buy("AAPL", 100, 2, self.agent)
+        self.exchange.datetime = datetime(2023, 1, 2)
+        new = await self.exchange.limit_buy("AAPL", 100, 5, self.agent)
+        await self.exchange.remove_cash(self.agent, 500)
+        self.assertEqual([order.id for order in self.exchange.order_index.get_agent_orders(self.agent)], [old.id])
+
+class TickSizeTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1))
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        await self.exchange.create_asset("BRK", seed_price=500, seed_bid=0.99, seed_ask=1.01, tick_size=0.05, lot_size=10)
+        self.agent = (await self.exchange.register_agent("agent", initial_cash=10000))['registered_agent']
+
+    async def test_asset_settings(self):
+        self.assertEqual(self.exchange.assets["AAPL"], {'type': 'stock', 'tick_size': 0.01, 'lot_size': 1})
+        self.assertEqual(self.exchange.assets["BRK"], {'type': 'stock', 'tick_size': 0.05, 'lot_size': 10})
+
+    async def test_prices_snap_to_ticks(self):
+        order = await self.exchange.limit_buy("BRK", 490.12, 10, self.agent)
+        self.assertEqual(order.price, 490.1)
+        self.assertEqual(order.ticks, 9802)
+        # 0.1 + 0.2 is not 0.3 as a float, but both land on the same level
+        await self.exchange.limit_buy("AAPL", 140.1 + 0.2, 1, self.agent)
+        await self.exchange.limit_buy("AAPL", 140.3, 1, self.agent)
+        self.assertEqual(self.exchange.books["AAPL"].bids.levels[14030].qty, 2)
+
+    async def test_lot_size(self):
+        self.assertEqual((await self.exchange.limit_buy("BRK", 490, 5, self.agent)).to_dict()['limit_buy'], 'invalid lot size')
+        self.assertEqual(await self.exchange.market_buy("BRK", 15, self.agent), {'market_buy': 'invalid lot size'})
+
+    async def test_cash_is_exact(self):
+        for _ in range(10):
+            await self.exchange.market_buy("AAPL", 1, self.agent)
+            await self.exchange.limit_buy("AAPL", 148.51, 1, 'init_seed_AAPL')
+            await self.exchange.market_sell("AAPL", 1, self.agent)
+        # summing the float cash flows would give 9970.100000000002
+        self.assertEqual((await self.exchange.get_cash(self.agent))['cash'], 9970.1)
+
 class UpdateAgentsTestCase(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
         self.exchange = Exchange(datetime=datetime(2023, 1, 1))
@@ -409,7 +627,7 @@ class UpdateAgentsTestCase(unittest.IsolatedAsyncioTestCase):
         fake_buy_txn = Transaction(-50, "AAPL", 1, self.exchange.datetime, "buy").to_dict()
     
         self.exchange.agents[1]['_transactions'].append(fake_buy_txn)
-        self.exchange.agents[1]['positions'].append(Position("fake_buy_id", "AAPL", 1, self.exchange.datetime, enters=[fake_buy_txn]).to_dict())
+        self.exchange.positions.enter(self.exchange.agents[1], fake_buy_txn, "fake_buy_id")
         transaction = [
             {'agent': self.agent1, 'cash_flow': -50, 'ticker': 'AAPL', 'qty': 1, 'dt': self.exchange.datetime, 'type': 'buy'},
             {'agent': self.agent2, 'cash_flow': 50, 'ticker': 'AAPL', 'qty': 1, 'dt': self.exchange.datetime, 'type': 'sell'}
@@ -434,9 +652,37 @@ class UpdateAgentsTestCase(unittest.IsolatedAsyncioTestCase):
         self.assertDictEqual(self.exchange.agents[0]['positions'][0]['enters'][0], self.exchange.agents[0]['_transactions'][0])
         self.assertDictEqual(self.exchange.agents[1]['positions'][0]['enters'][0], self.exchange.agents[1]['_transactions'][0])
         self.assertEqual(self.exchange.agents[1]['positions'][0]['exits'][0]['cash_flow'], 50)
-        self.assertEqual(self.exchange.agents[1]['positions'][0]['exits'][0]['pnl'], 100)
+        self.assertEqual(self.exchange.agents[1]['positions'][0]['exits'][0]['pnl'], 0)
         self.assertEqual(self.exchange.agents[1]['positions'][0]['exits'][0]['qty'], 1)
         self.assertEqual(self.exchange.agents[1]['positions'][0]['exits'][0]['type'], 'sell')
+        self.assertEqual(self.exchange.agents[1]['positions'][0]['qty'], 0)
+
+    async def test_update_agents_fifo_lifo(self):
+        self.exchange.agents.clear()
+        buyer = (await self.exchange.register_agent("Buyer", initial_cash=1000))['registered_agent']
+        seller = (await self.exchange.register_agent("Seller", initial_cash=1000))['registered_agent']
+        for price in [10, 20]:
+            await self.exchange._Exchange__update_agents([
+                {'agent': buyer, 'cash_flow': -price * 2, 'ticker': 'AAPL', 'qty': 2, 'dt': self.exchange.datetime, 'type': 'buy'},
+                {'agent': seller, 'cash_flow': price * 2, 'ticker': 'AAPL', 'qty': -2, 'dt': self.exchange.datetime, 'type': 'sell'}
+            ], "FIFO", None)
+        sell = lambda agent, qty: [{'agent': agent, 'cash_flow': 30 * qty, 'ticker': 'AAPL', 'qty': -qty, 'dt': self.exchange.datetime, 'type': 'sell'}]
+        await self.exchange._Exchange__update_agents(sell(buyer, 3), "FIFO", None)
+        positions = self.exchange.agents.get(buyer).positions
+        self.assertEqual([position['qty'] for position in positions], [0, 1])
+        self.assertEqual([exit['pnl'] for exit in positions[0]['exits']], [40])
+        self.assertEqual([exit['pnl'] for exit in positions[1]['exits']], [10])
+        self.assertEqual(positions[1]['exits'][0]['enter_id'], positions[1]['enters'][0]['id'])
+        self.assertEqual(len(self.exchange.positions.get_lots(buyer, 'AAPL')), 1)
+        self.assertEqual(self.exchange.positions.get_lots(seller, 'AAPL'), [])
+
+        await self.exchange._Exchange__update_agents([
+            {'agent': buyer, 'cash_flow': -50 * 2, 'ticker': 'AAPL', 'qty': 2, 'dt': self.exchange.datetime, 'type': 'buy'}
+        ], "FIFO", None)
+        await self.exchange._Exchange__update_agents(sell(buyer, 2), "LIFO", None)
+        self.assertEqual(positions[2]['qty'], 0)
+        self.assertEqual(positions[2]['exits'][0]['pnl'], -40)
+        self.assertEqual(positions[1]['qty'], 1)
 
 class UpdateAgentsCurrencyTestCase(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
@@ -573,6 +819,27 @@ class getSharesOutstandingTest(unittest.IsolatedAsyncioTestCase):
         result = await self.exchange.get_shares_outstanding("AAPL")
         self.assertEqual(result, 1000)
 
+    async def test_get_shares_outstanding_after_trades(self):
+        agent = (await self.exchange.register_agent("agent", initial_cash=10000))['registered_agent']
+        await self.exchange.market_buy("AAPL", qty=5, buyer=agent, fee=0)
+        self.assertEqual(await self.exchange.get_shares_outstanding("AAPL"), 1000)
+        self.assertEqual(self.exchange.holdings.get_holders("AAPL"), {'init_seed_AAPL': 995, agent: 5})
+        await self.exchange.limit_buy("AAPL", 148.5, 5, 'init_seed_AAPL')
+        await self.exchange.market_sell("AAPL", qty=5, seller=agent, fee=0)
+        # an agent that sold out is still listed, at zero, as its account still lists the asset
+        self.assertEqual(await self.exchange.get_agents_holding("AAPL"), ['init_seed_AAPL', agent])
+        self.assertEqual(self.exchange.holdings.get_holders("AAPL")[agent], 0)
+        self.assertEqual(await self.exchange.get_shares_outstanding("AAPL"), 1000)
+
+    async def test_relisting_does_not_double_count(self):
+        agent = (await self.exchange.register_agent("agent", initial_cash=10000))['registered_agent']
+        await self.exchange.market_buy("AAPL", qty=5, buyer=agent, fee=0)
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        self.assertEqual(self.exchange.holdings.get_holders("AAPL"), {'init_seed_AAPL': 1000, agent: 5})
+        self.assertEqual(await self.exchange.get_shares_outstanding("AAPL"), 1005)
+        seed_positions = self.exchange.positions.get_positions('init_seed_AAPL', "AAPL")
+        self.assertEqual([position['qty'] for position in seed_positions], [1000])
+
 class getAgentsHoldingTest(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
         self.exchange = Exchange(datetime=datetime(2023, 1, 1))
@@ -609,12 +876,25 @@ class getAgentsPositionsTest(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result[0]['positions'][0]['ticker'], 'AAPL')
         self.assertEqual(result[0]['positions'][0]['qty'], 1000)
         self.assertEqual(result[0]['positions'][0]['dt'], datetime(2023, 1, 1, 0, 0))
-        self.assertEqual(result[0]['positions'][0]['exits'][0]['cash_flow'], 50)
+        self.assertEqual(result[0]['positions'][0]['exits'], [])
+
+    async def test_get_agents_positions_after_sell(self):
+        buyer = (await self.exchange.register_agent("buyer", initial_cash=1000))['registered_agent']
+        await self.exchange.market_buy("AAPL", qty=1, buyer=buyer, fee=0)
+        result = await self.exchange.get_agents_positions("AAPL")
+        self.assertEqual([agent['agent'] for agent in result], ['init_seed_AAPL', buyer])
+        self.assertEqual(result[0]['positions'][0]['qty'], 999)
+        self.assertEqual(result[0]['positions'][0]['exits'][0]['cash_flow'], 151.5)
         self.assertEqual(result[0]['positions'][0]['exits'][0]['ticker'], 'AAPL')
         self.assertEqual(result[0]['positions'][0]['exits'][0]['qty'], 1)
         self.assertEqual(result[0]['positions'][0]['exits'][0]['dt'], datetime(2023, 1, 1, 0, 0))
         self.assertEqual(result[0]['positions'][0]['exits'][0]['type'], 'sell')
-        self.assertEqual(result[0]['positions'][0]['exits'][0]['pnl'], 100)
+        self.assertEqual(result[0]['positions'][0]['exits'][0]['pnl'], 1.5)
+
+    async def test_get_agents_positions_lists_every_agent(self):
+        agent = (await self.exchange.register_agent("idle", initial_cash=1000))['registered_agent']
+        result = await self.exchange.get_agents_positions("AAPL")
+        self.assertEqual(result[1], {'agent': agent, 'positions': []})
 
 class calculateMarketCapTest(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self) -> None:
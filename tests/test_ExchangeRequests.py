@@ -156,6 +156,8 @@ class LimitSellTest(unittest.IsolatedAsyncioTestCase):
         self.requests = Requests(self.mock_requester)
 
     async def test_limit_sell(self):
+        # the seed's whole supply rests in its seed ask, which has to be cancelled before it can sell more
+        await self.mock_requester.responder.exchange.cancel_order('init_seed_AAPL_ask')
         response = await self.requests.make_request('limit_sell', {'ticker': "AAPL", 'price': 151.5, 'qty': 1, 'creator': 'init_seed_AAPL', 'fee': 0.0}, self.mock_requester)
         order = response
         self.assertEqual(order['ticker'], "AAPL")
@@ -185,6 +187,23 @@ class CancelAllOrdersTest(unittest.IsolatedAsyncioTestCase):
         response = await self.requests.make_request('cancel_all_orders', {'ticker': 'AAPL', 'agent': self.mock_requester.responder.agent}, self.mock_requester)
         self.assertEqual(response, {'cancelled_all_orders': 'AAPL'})
 
+class SubmitBatchTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mock_requester = MockRequester()
+        await self.mock_requester.init()
+        self.requests = Requests(self.mock_requester)
+
+    async def test_submit_batch(self):
+        agent = self.mock_requester.responder.agent
+        actions = [
+            {'topic': 'cancel_all_orders', 'ticker': 'AAPL', 'agent': agent},
+            {'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 148, 'qty': 1, 'creator': agent, 'fee': 0}
+        ]
+        response = await self.requests.make_request('batch', {'actions': actions}, self.mock_requester)
+        self.assertEqual(response[0], {'cancelled_all_orders': 'AAPL'})
+        self.assertEqual(response[1]['price'], 148)
+        self.assertEqual(response[1]['creator'], agent)
+
 class GetPriceBarsTest(unittest.IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
         self.mock_requester = MockRequester()
@@ -251,6 +270,7 @@ class MarketSellTest(unittest.IsolatedAsyncioTestCase):
         self.requests = Requests(self.mock_requester)
 
     async def test_market_sell(self):
+        await self.mock_requester.responder.exchange.cancel_order('init_seed_AAPL_ask')
         response = await self.requests.make_request('market_sell', {'ticker': 'AAPL', 'qty': 1, 'seller': 'init_seed_AAPL', 'fee': 0.0}, self.mock_requester)
         self.assertEqual(response, {'market_sell': 'AAPL', 'seller': 'init_seed_AAPL', 'fills': [{'qty': 1, 'price': 149, 'fee': 0.0}]})
 
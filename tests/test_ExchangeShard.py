@@ -0,0 +1,196 @@
+import unittest
+from datetime import datetime
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from source.exchange.Exchange import Exchange
+from source.exchange.ExchangeShard import ExchangeShard, shard_for, shard_for_order, shard_name
+from source.exchange.Ledger import Ledger
+from source.exchange.ShardRouter import ShardRouter, split_batch
+
+class ExchangeShardTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.ledger = Ledger()
+        self.shard_a = ExchangeShard('shard_a', self.ledger, Exchange(datetime=datetime(2023, 1, 1)))
+        self.shard_b = ExchangeShard('shard_b', self.ledger, Exchange(datetime=datetime(2023, 1, 1)))
+        await self.shard_a.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        await self.shard_b.create_asset("MSFT", seed_price=100, seed_bid=0.99, seed_ask=1.01)
+        self.agent = (await self.ledger.register_agent("agent", 10000))['registered_agent']
+
+    async def test_seed_balances_are_reserved(self):
+        self.assertEqual(self.ledger.reserved['shard_a']['init_seed_AAPL'].assets, {'AAPL': 1000})
+        self.assertEqual(self.ledger.reserved['shard_a']['init_seed_AAPL'].cash, 148.5)
+        self.assertEqual(await self.ledger.get_assets('init_seed_AAPL'), {'assets': {'AAPL': 1000}})
+        self.assertEqual(await self.ledger.get_cash('init_seed_AAPL'), {'cash': 150000})
+
+    async def test_limit_buy_reserves_and_releases(self):
+        order = await self.shard_a.limit_buy("AAPL", 140, 10, self.agent)
+        self.assertEqual(order.qty, 10)
+        self.assertEqual(self.ledger.accounts.get(self.agent).cash, 8600)
+        self.assertEqual(self.ledger.reserved['shard_a'][self.agent].cash, 1400)
+        self.assertEqual(await self.ledger.get_cash(self.agent), {'cash': 10000})
+
+        await self.shard_a.cancel_order(order.id)
+        self.assertEqual(self.ledger.accounts.get(self.agent).cash, 10000)
+        self.assertEqual(self.ledger.reserved['shard_a'][self.agent].cash, 0)
+
+    async def test_fills_settle_across_shards(self):
+        await self.shard_a.limit_buy("AAPL", 155, 2, self.agent)
+        self.assertEqual(await self.ledger.get_cash(self.agent), {'cash': 10000 - 2 * 151.5})
+        self.assertEqual(await self.ledger.get_assets(self.agent), {'assets': {'AAPL': 2}})
+        self.assertEqual(self.ledger.reserved['shard_a'][self.agent].cash, 0)
+        self.assertEqual(await self.ledger.get_cash('init_seed_AAPL'), {'cash': 150000 + 2 * 151.5})
+
+        await self.shard_b.market_buy("MSFT", 3, self.agent)
+        self.assertEqual(await self.ledger.get_assets(self.agent), {'assets': {'AAPL': 2, 'MSFT': 3}})
+        self.assertEqual(self.ledger.reserved['shard_b'][self.agent].cash, 0)
+
+        sell = await self.shard_a.limit_sell("AAPL", 160, 2, self.agent)
+        self.assertEqual(sell.qty, 2)
+        self.assertEqual(self.ledger.accounts.get(self.agent).assets['AAPL'], 0)
+        self.assertEqual(self.ledger.reserved['shard_a'][self.agent].assets, {'AAPL': 2})
+        self.assertEqual(await self.shard_a.cancel_all_orders(self.agent), {'cancelled_all_orders': ['AAPL']})
+        self.assertEqual(self.ledger.accounts.get(self.agent).assets['AAPL'], 2)
+
+    async def test_limit_buy_reserves_rounded_notional(self):
+        agent = (await self.ledger.register_agent("exact", 1000.10))['registered_agent']
+        # 100.006 rests at 100.01, so the order needs 1000.10 rather than 1000.06
+        order = await self.shard_a.limit_buy("AAPL", 100.006, 10, agent)
+        self.assertEqual(order.price, 100.01)
+        self.assertEqual(self.ledger.reserved['shard_a'][agent].cash, 1000.10)
+        self.assertEqual(self.ledger.accounts.get(agent).cash, 0)
+
+    async def test_market_buy_reserves_walked_notional(self):
+        reserved = []
+        reserve = self.ledger.reserve
+        async def recording_reserve(shard, agent, cash=0, ticker=None, qty=0):
+            reserved.append(cash)
+            return await reserve(shard, agent, cash, ticker, qty)
+        self.ledger.reserve = recording_reserve
+        await self.shard_b.market_buy("MSFT", 3, self.agent)
+        self.assertEqual(reserved, [3 * 101])
+        self.assertEqual(await self.ledger.get_assets(self.agent), {'assets': {'MSFT': 3}})
+        self.assertEqual(await self.ledger.get_cash(self.agent), {'cash': 10000 - 3 * 101})
+
+        # a buyer who covers the best price but not the whole walk reserves what it has and is filled as far as it goes
+        await self.shard_b.limit_sell("MSFT", 100.5, 1, self.agent)
+        reserved.clear()
+        poor = (await self.ledger.register_agent("poor", 201.2))['registered_agent']
+        result = await self.shard_b.market_buy("MSFT", 2, poor)
+        self.assertEqual(reserved, [100.5 + 101, None])
+        self.assertEqual(result['fills'], [{'qty': 1, 'price': 100.5, 'fee': 0.0}])
+        self.assertEqual(await self.ledger.get_cash(poor), {'cash': 100.7})
+
+    async def test_reservation_is_all_or_nothing(self):
+        order = await self.shard_a.limit_buy("AAPL", 140, 100, self.agent)
+        self.assertEqual(order.creator, 'insufficient_funds')
+        self.assertEqual(self.ledger.accounts.get(self.agent).cash, 10000)
+        result = await self.shard_b.market_sell("MSFT", 1, self.agent)
+        self.assertEqual(result, {"market_sell": "insufficient assets"})
+
+    async def test_submit_batch(self):
+        results = await self.shard_a.submit_batch([
+            {'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 140, 'qty': 1, 'creator': self.agent},
+            {'topic': 'cancel_all_orders', 'ticker': 'AAPL', 'agent': self.agent},
+        ])
+        self.assertEqual(results[1], {'cancelled_all_orders': 'AAPL'})
+        self.assertEqual(self.ledger.accounts.get(self.agent).cash, 10000)
+
+class ShardRoutingTestCase(unittest.TestCase):
+    def test_shard_for_is_stable(self):
+        self.assertEqual(shard_for('AAPL', 4), shard_for('AAPL', 4))
+        self.assertTrue(all(0 <= shard_for(ticker, 3) < 3 for ticker in ['AAPL', 'MSFT', 'XYZ']))
+
+    def test_split_batch(self):
+        aapl = shard_for('AAPL', 2)
+        other = 1 - aapl
+        actions = [{'topic': 'limit_buy', 'ticker': 'AAPL'}, {'topic': 'cancel_order', 'order_id': shard_name(other) + '.7'}, {'topic': 'limit_sell', 'ticker': 'AAPL'}, {'topic': 'cancel_all_orders', 'agent': 'agent'}, {'topic': 'add_cash'}]
+        self.assertEqual(split_batch(actions, 2), [
+            ([aapl], [(0, actions[0])]),
+            ([other], [(1, actions[1])]),
+            ([aapl], [(2, actions[2])]),
+            ([0, 1], [(3, actions[3])]),
+            ([-1], [(4, actions[4])]),
+        ])
+        self.assertEqual(split_batch(actions[2:3] * 2, 2), [([aapl], [(0, actions[2]), (1, actions[2])])])
+
+    def test_shard_for_order(self):
+        self.assertEqual(shard_for_order('shard_1.42', 2), 1)
+        self.assertEqual(shard_for_order('init_seed_AAPL_ask', 2), shard_for('AAPL', 2))
+        self.assertIsNone(shard_for_order('shard_5.1', 2))
+        self.assertIsNone(shard_for_order('local.3', 2))
+
+class ShardRouterTestCase(unittest.IsolatedAsyncioTestCase):
+    """Runs the router's request handling against in-process shards and ledger instead of sockets.
+    """
+    async def asyncSetUp(self) -> None:
+        self.ledger = Ledger()
+        self.shards = [ExchangeShard(shard_name(idx), self.ledger, Exchange(datetime=datetime(2023, 1, 1))) for idx in range(2)]
+        self.tickers = {}
+        for ticker in ['AAPL', 'MSFT', 'XYZ', 'ABC']:
+            self.tickers.setdefault(shard_for(ticker, 2), ticker)
+        for idx, ticker in self.tickers.items():
+            await self.shards[idx].create_asset(ticker, seed_price=100, seed_bid=0.99, seed_ask=1.01)
+        self.router = ShardRouter(None, [None, None], None)
+        self.router.shards = [shard.dispatcher() for shard in self.shards]
+        self.router.ledger = self.ledger
+
+        async def forward(backend, msg):
+            return await (backend.handle(msg) if backend is self.ledger else backend.dispatch(msg))
+        self.router.forward = forward
+        self.agent = (await self.router.handle({'topic': 'register_agent', 'name': 'agent', 'initial_cash': 10000}))['registered_agent']
+
+    async def order(self, idx, price=90):
+        return await self.router.handle({'topic': 'limit_buy', 'ticker': self.tickers[idx], 'price': price, 'qty': 1, 'creator': self.agent, 'fee': 0})
+
+    async def test_cancel_on_any_shard(self):
+        orders = [await self.order(0), await self.order(1)]
+        for order in orders:
+            self.assertEqual(await self.router.handle({'topic': 'cancel_order', 'order_id': order['id']}), {'cancelled_order': order['id']})
+        self.assertEqual(await self.router.handle({'topic': 'cancel_order', 'order_id': 'unknown'}), {'cancelled_order': 'order not found'})
+        self.assertEqual(await self.ledger.get_cash(self.agent), {'cash': 10000})
+
+    async def test_batch_cancel_across_shards(self):
+        orders = [await self.order(0), await self.order(1)]
+        results = await self.router.handle({'topic': 'batch', 'actions': [
+            {'topic': 'cancel_order', 'order_id': orders[1]['id']},
+            {'topic': 'cancel_order', 'order_id': orders[0]['id']},
+        ]})
+        self.assertEqual(results, [{'cancelled_order': orders[1]['id']}, {'cancelled_order': orders[0]['id']}])
+        self.assertEqual(self.ledger.accounts.get(self.agent).cash, 10000)
+
+    async def test_batch_keeps_order_across_shards(self):
+        results = await self.router.handle({'topic': 'batch', 'actions': [
+            {'topic': 'limit_buy', 'ticker': self.tickers[1], 'price': 90, 'qty': 100, 'creator': self.agent, 'fee': 0},
+            {'topic': 'limit_buy', 'ticker': self.tickers[0], 'price': 90, 'qty': 100, 'creator': self.agent, 'fee': 0},
+            {'topic': 'cancel_all_orders', 'ticker': self.tickers[1], 'agent': self.agent},
+        ]})
+        self.assertNotEqual(results[0].get('limit_buy'), 'insufficient funds')
+        self.assertEqual(results[1]['limit_buy'], 'insufficient funds')
+        self.assertEqual(results[2], {'cancelled_all_orders': self.tickers[1]})
+        self.assertEqual(self.ledger.accounts.get(self.agent).cash, 10000)
+
+    async def test_agent_queries_span_shards(self):
+        await self.order(0, price=105)
+        await self.order(1, price=105)
+        positions = await self.router.handle({'topic': 'get_positions', 'agent': self.agent, 'page_size': 1, 'page': 1})
+        self.assertEqual(positions['total_positions'], 2)
+        self.assertEqual(positions['total_pages'], 2)
+        self.assertEqual(positions['next_page'], 2)
+        self.assertEqual(len(positions['positions']), 1)
+        agents = {agent['name']: agent for agent in await self.router.handle({'topic': 'get_agents'})}
+        self.assertEqual(len(agents[self.agent]['positions']), 2)
+        self.assertEqual(agents[self.agent]['cash'], 10000 - 2 * 101)
+        self.assertEqual(agents[self.agent]['assets'], {self.tickers[0]: 1, self.tickers[1]: 1})
+        agent = await self.router.handle({'topic': 'get_agent', 'name': self.agent})
+        self.assertEqual(len(agent['positions']), 2)
+        self.assertEqual(len(agent['_transactions']), 2)
+        self.assertEqual(agent['cash'], 10000 - 2 * 101)
+        self.assertEqual(agent['assets'], {self.tickers[0]: 1, self.tickers[1]: 1})
+        self.assertEqual(await self.router.handle({'topic': 'get_agent', 'name': 'unknown'}), {'error': 'agent not found'})
+        self.assertEqual(await self.router.handle({'topic': 'cancel_all_orders', 'agent': 'init_seed_' + self.tickers[0]}), {'cancelled_all_orders': [self.tickers[0]]})
+
+if __name__ == '__main__':
+    unittest.main()
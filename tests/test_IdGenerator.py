@@ -0,0 +1,27 @@
+import unittest
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from source.exchange.types.IdGenerator import IdGenerator
+from source.exchange.types.LimitOrder import LimitOrder
+from source.exchange.types.OrderSide import OrderSide
+
+class IdGeneratorTestCase(unittest.TestCase):
+    def test_monotonic_string_ids(self):
+        ids = IdGenerator()
+        self.assertEqual([ids(), ids(), ids()], ['1', '2', '3'])
+        self.assertEqual(ids.last, 3)
+
+    def test_prefix_and_start(self):
+        ids = IdGenerator('shard_0.', last=41)
+        self.assertEqual(ids(), 'shard_0.42')
+
+    def test_objects_have_no_dict(self):
+        order = LimitOrder('AAPL', 150.0, 1, 'Creator', OrderSide.BUY)
+        self.assertFalse(hasattr(order, '__dict__'))
+        self.assertTrue(order.id.startswith('local.'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+import sys
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from source.exchange.Exchange import Exchange
+from source.exchange.Journal import Journal, apply, replay
+from source.exchange.TopicDispatcher import TopicDispatcher
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'exchange.journal')
+
+    def test_append_and_read(self):
+        journal = Journal(self.path, batch_size=2, flush_interval=60)
+        journal.append({'topic': 'add_cash', 'agent': 'a', 'amount': 1}, datetime(2023, 1, 1))
+        self.assertEqual(list(Journal.read(self.path)), [])
+        journal.append({'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 1, 'qty': 1, 'creator': 'a', 'fee': 0}, datetime(2023, 1, 1, 0, 1))
+        entries = list(Journal.read(self.path))
+        self.assertEqual([entry['seq'] for entry in entries], [1, 2])
+        self.assertEqual(entries[1]['dt'], datetime(2023, 1, 1, 0, 1))
+        self.assertNotIn('order_id', entries[1]['msg'])
+        self.assertEqual([entry['seq'] for entry in Journal.read(self.path, after_seq=1)], [2])
+        journal.close()
+
+    def test_flush_if_due(self):
+        journal = Journal(self.path, batch_size=256, flush_interval=0.05)
+        journal.last_flush = time.time()
+        journal.append({'topic': 'add_cash', 'agent': 'a', 'amount': 1})
+        self.assertFalse(journal.flush_if_due())
+        self.assertEqual(list(Journal.read(self.path)), [])
+        time.sleep(0.06)
+        self.assertTrue(journal.flush_if_due())
+        self.assertEqual([entry['seq'] for entry in Journal.read(self.path)], [1])
+        self.assertFalse(journal.flush_if_due())
+        journal.close()
+
+    def test_reopen_continues_sequence_and_skips_torn_line(self):
+        journal = Journal(self.path, batch_size=1)
+        journal.append({'topic': 'register_agent', 'name': 'agent', 'initial_cash': 1})
+        journal.close()
+        with open(self.path, 'a') as f:
+            f.write('{"seq": 2, "dt"')
+        self.assertEqual(len(list(Journal.read(self.path))), 1)
+        reopened = Journal(self.path)
+        self.assertEqual(reopened.seq, 1)
+        reopened.close()
+        reset = Journal(self.path, reset=True)
+        self.assertEqual(reset.seq, 0)
+        reset.close()
+
+class JournalFlushTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_lone_append_is_flushed_on_a_quiet_exchange(self):
+        path = os.path.join(tempfile.mkdtemp(), 'exchange.journal')
+        journal = Journal(path, batch_size=256, flush_interval=0.05)
+        flusher = asyncio.ensure_future(journal.flush_periodically())
+        journal.last_flush = time.time()
+        journal.append({'topic': 'add_cash', 'agent': 'a', 'amount': 1})
+        self.assertEqual(list(Journal.read(path)), [])
+        await asyncio.sleep(0.2)
+        self.assertEqual([entry['seq'] for entry in Journal.read(path)], [1])
+        flusher.cancel()
+        journal.close()
+
+class ReplayTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        directory = tempfile.mkdtemp()
+        self.journal_path = os.path.join(directory, 'exchange.journal')
+        self.snapshot_path = os.path.join(directory, 'exchange.snapshot')
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1), journal=Journal(self.journal_path, reset=True))
+
+    async def handle(self, msg):
+        self.exchange.journal.append(msg, self.exchange.datetime)
+        return await apply(TopicDispatcher(self.exchange), msg)
+
+    async def test_replay_snapshot_and_tail(self):
+        await self.handle({'topic': 'create_asset', 'ticker': 'AAPL', 'asset_type': 'stock', 'qty': 1000, 'seed_price': 150, 'seed_bid': 0.99, 'seed_ask': 1.01})
+        agent = (await self.handle({'topic': 'register_agent', 'name': 'agent', 'initial_cash': 10000}))['registered_agent']
+        order = await self.handle({'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 149, 'qty': 3, 'creator': agent, 'fee': 0})
+        await self.exchange.snapshot(self.snapshot_path)
+
+        self.exchange.datetime = datetime(2023, 1, 2)
+        await self.handle({'topic': 'market_buy', 'ticker': 'AAPL', 'qty': 2, 'buyer': agent, 'fee': 0})
+        await self.handle({'topic': 'cancel_order', 'order_id': order['id']})
+        await self.handle({'topic': 'batch', 'actions': [{'topic': 'limit_sell', 'ticker': 'AAPL', 'price': 160, 'qty': 1, 'creator': agent}]})
+        self.exchange.journal.flush()
+
+        for snapshot in [self.snapshot_path, None]:
+            replayed, count = await replay(self.journal_path, snapshot)
+            self.assertEqual(count, 3 if snapshot else 6)
+            self.assertEqual(replayed.datetime, datetime(2023, 1, 2))
+            self.assertEqual(await replayed.get_cash(agent), await self.exchange.get_cash(agent))
+            self.assertEqual(await replayed.get_assets(agent), await self.exchange.get_assets(agent))
+            self.assertEqual([o.id for o in replayed.books['AAPL'].asks], [o.id for o in self.exchange.books['AAPL'].asks])
+            self.assertIsNone(replayed.order_index.get(order['id']))
+
+    async def test_replay_continues_past_failed_request(self):
+        await self.handle({'topic': 'create_asset', 'ticker': 'AAPL', 'asset_type': 'stock', 'qty': 1000, 'seed_price': 150, 'seed_bid': 0.99, 'seed_ask': 1.01})
+        agent = (await self.handle({'topic': 'register_agent', 'name': 'agent', 'initial_cash': 10000}))['registered_agent']
+        self.assertIn('error', await self.handle({'topic': 'limit_buy', 'ticker': 'NOPE', 'price': 149, 'qty': 3, 'creator': agent, 'fee': 0}))
+        order = await self.handle({'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 149, 'qty': 3, 'creator': agent, 'fee': 0})
+        self.exchange.journal.flush()
+
+        replayed, count = await replay(self.journal_path)
+        self.assertEqual(count, 4)
+        self.assertEqual(replayed.order_index.get(order['id'])[2].price, 149)
+        self.assertEqual(await replayed.get_cash(agent), await self.exchange.get_cash(agent))
+
+    async def test_apply_rejects_unjournaled_topics(self):
+        with self.assertRaises(ValueError):
+            await apply(TopicDispatcher(self.exchange), {'topic': 'snapshot', 'name': 'daily'})
+
+    async def test_restore_continues_journal_sequence(self):
+        await self.handle({'topic': 'create_asset', 'ticker': 'AAPL', 'asset_type': 'stock', 'qty': 1000, 'seed_price': 150, 'seed_bid': 0.99, 'seed_ask': 1.01})
+        agent = (await self.handle({'topic': 'register_agent', 'name': 'agent', 'initial_cash': 10000}))['registered_agent']
+        order = await self.handle({'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 149, 'qty': 3, 'creator': agent, 'fee': 0})
+        await self.exchange.snapshot(self.snapshot_path)
+        self.exchange.journal.close()
+
+        # a restarted exchange starts a new journal and restores the snapshot into it
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1), journal=Journal(self.journal_path, reset=True))
+        await self.exchange.restore(self.snapshot_path)
+        await self.handle({'topic': 'add_cash', 'agent': agent, 'amount': 1})
+        await self.handle({'topic': 'add_cash', 'agent': agent, 'amount': 1})
+        new_order = await self.handle({'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 148, 'qty': 1, 'creator': agent, 'fee': 0})
+        self.assertNotEqual(new_order['id'], order['id'])
+        self.assertEqual(self.exchange.order_index.get(order['id'])[2].price, 149)
+        await self.handle({'topic': 'cancel_order', 'order_id': order['id']})
+        self.assertEqual([o.id for o in self.exchange.books['AAPL'].bids], ['init_seed_AAPL_bid', new_order['id']])
+        self.exchange.journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
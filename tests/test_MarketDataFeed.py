@@ -0,0 +1,86 @@
+import unittest
+import json
+import sys
+import os
+from datetime import datetime
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from source.exchange.Exchange import Exchange
+from source.exchange.MarketDataFeed import MarketDataFeed
+
+class MockPublisher():
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, topic, message):
+        self.messages.append((topic, json.loads(message)))
+        return True
+
+class MarketDataFeedTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.publisher = MockPublisher()
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1), feed=MarketDataFeed(self.publisher, snapshot_interval=10))
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        self.agent = (await self.exchange.register_agent("agent", initial_cash=10000))['registered_agent']
+        self.exchange.feed.snapshot(self.exchange.books["AAPL"])
+        self.publisher.messages.clear()
+
+    async def test_sequenced_messages(self):
+        await self.exchange.limit_buy("AAPL", 149, 3, self.agent)
+        await self.exchange.market_buy("AAPL", 2, self.agent)
+        topics = [topic for topic, _ in self.publisher.messages]
+        self.assertEqual(topics, ['md:AAPL:l2', 'md:AAPL:l1', 'md:AAPL:trade', 'md:AAPL:l2', 'md:AAPL:l1'])
+        seqs = [msg['seq'] for _, msg in self.publisher.messages]
+        self.assertEqual(seqs, list(range(seqs[0], seqs[0] + 5)))
+        self.assertEqual(self.publisher.messages[0][1], {'type': 'l2', 'ticker': 'AAPL', 'seq': seqs[0], 'side': 'bid', 'price': 149.0, 'qty': 3, 'orders': 1, 'book_seq': self.publisher.messages[0][1]['book_seq']})
+        self.assertEqual(self.publisher.messages[2][1]['price'], 151.5)
+        self.assertEqual(self.publisher.messages[3][1]['qty'], 998)
+        self.assertEqual(self.publisher.messages[3][1]['book_seq'], self.exchange.books['AAPL'].seq)
+        self.assertEqual(self.publisher.messages[4][1]['ask_qty'], 998)
+
+    async def test_cancel_publishes_removed_level(self):
+        order = await self.exchange.limit_buy("AAPL", 140, 1, self.agent)
+        self.publisher.messages.clear()
+        await self.exchange.cancel_order(order.id)
+        self.assertEqual([(topic, msg['qty']) for topic, msg in self.publisher.messages], [('md:AAPL:l2', 0)])
+
+    async def test_periodic_snapshot(self):
+        self.exchange.feed.snapshot_interval = 6
+        for price in range(140, 146):
+            await self.exchange.limit_buy("AAPL", price, 1, self.agent)
+        snapshots = [msg for topic, msg in self.publisher.messages if topic == 'md:AAPL:snapshot']
+        self.assertEqual(len(snapshots), 1)
+        # the snapshot is current as of the message before it and does not take a sequence number
+        self.assertEqual(snapshots[0]['seq'], self.exchange.feed.seq['AAPL'])
+        self.assertEqual(snapshots[0]['bids'][0], {'price': 148.5, 'qty': 1, 'orders': 1})
+        self.assertEqual(len(snapshots[0]['bids']), 7)
+
+    async def test_time_based_snapshot(self):
+        self.exchange.feed.snapshot_seconds = 5
+        await self.exchange.limit_buy("AAPL", 140, 1, self.agent)
+        self.assertNotIn('md:AAPL:snapshot', [topic for topic, _ in self.publisher.messages])
+        self.exchange.feed.last_snapshot["AAPL"] -= 5
+        await self.exchange.limit_buy("AAPL", 141, 1, self.agent)
+        self.assertEqual(self.publisher.messages[-1][0], 'md:AAPL:snapshot')
+
+    async def test_refresh_snapshots_quiet_assets(self):
+        await self.exchange.create_asset("MSFT", seed_price=100)
+        books = self.exchange.books.values()
+        self.assertEqual(self.exchange.feed.refresh(books), 0)
+        self.exchange.feed.snapshot_seconds = 5
+        self.publisher.messages.clear()
+        self.exchange.feed.last_snapshot["AAPL"] -= 5
+        # MSFT has never had a snapshot, AAPL's is overdue
+        self.assertEqual(self.exchange.feed.refresh(books), 2)
+        self.assertEqual(sorted(topic for topic, _ in self.publisher.messages), ['md:AAPL:snapshot', 'md:MSFT:snapshot'])
+        self.assertEqual(self.exchange.feed.refresh(books), 0)
+
+    async def test_snapshot_on_request(self):
+        response = await self.exchange.publish_snapshot("AAPL")
+        self.assertEqual(response, {'snapshot': 'AAPL', 'seq': self.exchange.feed.seq['AAPL']})
+        self.assertEqual(self.publisher.messages[-1][0], 'md:AAPL:snapshot')
+        self.assertIn('error', await self.exchange.publish_snapshot("XYZ"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import asyncio
+import json
+import sys
+import os
+from datetime import datetime
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from source.exchange.Exchange import Exchange
+from source.exchange.MarketDataFeed import MarketDataFeed
+from source.exchange.MarketDataHub import MarketDataHub
+from source.exchange.API import API
+
+class HubPublisher():
+    def __init__(self, hub):
+        self.hub = hub
+        self.dropping = False
+
+    def publish(self, topic, message):
+        if not self.dropping:
+            self.hub.handle(json.loads(message))
+        return True
+
+class MarketDataHubTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.hub = MarketDataHub()
+        self.publisher = HubPublisher(self.hub)
+        self.exchange = Exchange(datetime=datetime(2023, 1, 1), feed=MarketDataFeed(self.publisher))
+        await self.exchange.create_asset("AAPL", seed_price=150, seed_bid=0.99, seed_ask=1.01)
+        self.exchange.feed.snapshot(self.exchange.books["AAPL"])
+        self.agent = (await self.exchange.register_agent("agent", initial_cash=10000))['registered_agent']
+
+    async def test_book_follows_feed(self):
+        await self.exchange.limit_buy("AAPL", 149, 3, self.agent)
+        await self.exchange.market_buy("AAPL", 2, self.agent)
+        book = self.hub.book("AAPL")
+        self.assertTrue(book['synced'])
+        self.assertEqual(book['bids'], [{'price': 149.0, 'qty': 3, 'orders': 1}, {'price': 148.5, 'qty': 1, 'orders': 1}])
+        self.assertEqual(book['asks'], [{'price': 151.5, 'qty': 998, 'orders': 1}])
+        self.assertEqual(book['quote'], {'bid_qty': 3, 'bid_p': 149.0, 'ask_qty': 998, 'ask_p': 151.5})
+
+    async def test_slow_client_gets_conflated_update(self):
+        client = self.hub.subscribe("AAPL")
+        for _ in range(5):
+            await self.exchange.market_buy("AAPL", 1, self.agent)
+        update = client.drain()
+        self.assertEqual(update['levels'], [{'side': 'ask', 'price': 151.5, 'qty': 995, 'orders': 1}])
+        self.assertEqual(len(update['trades']), 5)
+        self.assertEqual(update['quote']['ask_qty'], 995)
+        self.assertFalse(client.ready.is_set())
+
+    async def test_gap_resyncs_on_snapshot(self):
+        client = self.hub.subscribe("AAPL")
+        self.publisher.dropping = True
+        await self.exchange.limit_buy("AAPL", 140, 1, self.agent)
+        self.publisher.dropping = False
+        await self.exchange.limit_buy("AAPL", 141, 1, self.agent)
+        self.assertFalse(self.hub.book("AAPL")['synced'])
+        self.exchange.feed.snapshot(self.exchange.books["AAPL"])
+        update = client.drain()
+        self.assertEqual(update['type'], 'book')
+        self.assertEqual([level['price'] for level in update['bids']], [148.5, 141.0, 140.0])
+
+    async def test_websocket_route(self):
+        self.hub.task = asyncio.get_running_loop().create_future()
+        app = await API(None, hub=self.hub)
+        async with app.test_client().websocket('/ws/v1/market/AAPL') as ws:
+            book = json.loads(await ws.receive())
+            self.assertEqual(book['type'], 'book')
+            self.assertEqual(book['asks'][0]['price'], 151.5)
+            await asyncio.sleep(0)
+            await self.exchange.market_buy("AAPL", 1, self.agent)
+            update = json.loads(await ws.receive())
+            self.assertEqual(update['trades'][0]['price'], 151.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import socket
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+import unittest
+import zmq
+import zmq.asyncio
+from source.Messaging import RouterResponder, DealerRequester, Requester
+from source.Codecs import pack, unpack, msgpack
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class RouterDealerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.port = free_port()
+        self.responder = RouterResponder(self.port)
+        await self.responder.connect()
+        self.dealers = [DealerRequester(self.port, timeout=5), DealerRequester(self.port, codec='json' if msgpack is None else 'msgpack', timeout=5)]
+        for dealer in self.dealers:
+            await dealer.connect()
+
+    async def asyncTearDown(self):
+        for dealer in self.dealers:
+            await dealer.close()
+        self.responder.socket.close(linger=0)
+        self.responder.context.term()
+
+    async def echo(self, msg):
+        return {'client': msg['client'], 'n': msg['n']}
+
+    async def test_replies_routed_by_identity(self):
+        # the second client writes msgpack when it is installed, so each reply must also come back in its caller's codec
+        tasks = [asyncio.ensure_future(dealer.request({'topic': 'echo', 'client': idx, 'n': n})) for n in range(3) for idx, dealer in enumerate(self.dealers)]
+        handled = 0
+        while handled < len(tasks):
+            handled += await self.responder.respond(self.echo)
+        replies = await asyncio.gather(*tasks)
+        self.assertEqual(replies, [{'client': idx, 'n': n} for n in range(3) for idx in range(len(self.dealers))])
+
+    async def test_drains_waiting_requests_in_one_call(self):
+        tasks = [asyncio.ensure_future(self.dealers[n % 2].request({'topic': 'echo', 'client': n % 2, 'n': n})) for n in range(6)]
+        await asyncio.sleep(0.2)
+        self.assertEqual(await self.responder.respond(self.echo), 6)
+        self.assertEqual([reply['n'] for reply in await asyncio.gather(*tasks)], list(range(6)))
+
+    async def test_max_batch(self):
+        self.responder.max_batch = 2
+        tasks = [asyncio.ensure_future(self.dealers[0].request({'topic': 'echo', 'client': 0, 'n': n})) for n in range(3)]
+        await asyncio.sleep(0.2)
+        self.assertEqual(await self.responder.respond(self.echo), 2)
+        self.assertEqual(await self.responder.respond(self.echo), 1)
+        await asyncio.gather(*tasks)
+
+    async def test_req_client(self):
+        requester = Requester(self.port)
+        await requester.connect()
+        task = asyncio.ensure_future(requester.request({'topic': 'echo', 'client': 'req', 'n': 1}))
+        await self.responder.respond(self.echo)
+        self.assertEqual(await task, {'client': 'req', 'n': 1})
+        requester.socket.close(linger=0)
+
+    async def test_handler_error_is_replied(self):
+        async def fail(msg):
+            raise ValueError('boom')
+        task = asyncio.ensure_future(self.dealers[0].request({'topic': 'fail'}))
+        await self.responder.respond(fail)
+        self.assertEqual(await task, {'error': 'boom'})
+
+class DealerCorrelationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_out_of_order_replies(self):
+        port = free_port()
+        context = zmq.asyncio.Context()
+        router = context.socket(zmq.ROUTER)
+        router.bind(f'tcp://127.0.0.1:{port}')
+        dealer = DealerRequester(port, timeout=5)
+        await dealer.connect()
+        tasks = [asyncio.ensure_future(dealer.request({'n': n})) for n in range(3)]
+        requests = [await router.recv_multipart() for _ in range(3)]
+        # the server answers the last request first
+        for frames in reversed(requests):
+            codec, msg = unpack(frames[-1])
+            await router.send_multipart(frames[:-1] + [pack(codec, {'n': msg['n'] * 10})])
+        self.assertEqual(await asyncio.gather(*tasks), [{'n': 0}, {'n': 10}, {'n': 20}])
+        self.assertEqual(dealer.pending, {})
+        await dealer.close()
+        router.close(linger=0)
+        context.term()
+
+    async def test_timeout(self):
+        dealer = DealerRequester(free_port(), timeout=0.05)
+        await dealer.connect()
+        self.assertIsNone(await dealer.request({'topic': 'nobody'}))
+        self.assertEqual(dealer.pending, {})
+        dealer.socket.setsockopt(zmq.LINGER, 0)
+        await dealer.close()
+
+if __name__ == '__main__':
+    unittest.main()
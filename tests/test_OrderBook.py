@@ -123,5 +123,98 @@ class OrderBookTests(unittest.TestCase):
             self.assertIn('dt', orderbook_dict['asks'][index].keys())
 
 
+    def test_order_book_price_time_priority(self):
+        first = LimitOrder("AAPL", 150.0, 1, "Creator1", OrderSide.BUY)
+        second = LimitOrder("AAPL", 150.0, 2, "Creator2", OrderSide.BUY)
+        better = LimitOrder("AAPL", 151.0, 3, "Creator3", OrderSide.BUY)
+        worse = LimitOrder("AAPL", 149.0, 4, "Creator4", OrderSide.BUY)
+        for order in [first, second, better, worse]:
+            self.order_book.add(order)
+        self.assertEqual(self.order_book.bids.to_list(), [better, first, second, worse])
+        self.assertEqual(self.order_book.bids.best, better)
+        self.assertEqual(self.order_book.bids[1], first)
+        self.assertEqual(len(self.order_book.bids), 4)
+        self.assertEqual(self.order_book.bids.levels[150.0].qty, 3)
+
+        ask = LimitOrder("AAPL", 160.0, 5, "Creator5", OrderSide.SELL)
+        cheaper_ask = LimitOrder("AAPL", 155.0, 6, "Creator6", OrderSide.SELL)
+        self.order_book.add(ask)
+        self.order_book.add(cheaper_ask)
+        self.assertEqual(self.order_book.asks.to_list(), [cheaper_ask, ask])
+
+    def test_order_book_walk_while_filling(self):
+        asks = [LimitOrder("AAPL", price, 1, "Creator", OrderSide.SELL) for price in [153.0, 151.0, 152.0, 151.0, 154.0]]
+        for order in asks:
+            self.order_book.add(order)
+        walked = []
+        # a market order fills each order as it walks, dropping each level before it moves on to the next
+        for order in self.order_book.asks:
+            walked.append(order.price)
+            self.order_book.fill(order, 1)
+            if len(walked) == 4:
+                break
+        self.assertEqual(walked, [151.0, 151.0, 152.0, 153.0])
+        self.assertEqual(self.order_book.asks.to_list(), [asks[4]])
+        self.assertEqual(self.order_book.asks.depth(), [{'price': 154.0, 'qty': 1, 'orders': 1}])
+
+    def test_order_book_fill_and_remove(self):
+        first = LimitOrder("AAPL", 150.0, 5, "Creator1", OrderSide.SELL)
+        second = LimitOrder("AAPL", 150.0, 5, "Creator2", OrderSide.SELL)
+        self.order_book.add(first)
+        self.order_book.add(second)
+        self.order_book.fill(first, 2)
+        self.assertEqual(first.qty, 3)
+        self.assertEqual(self.order_book.asks.best, first)
+        self.order_book.fill(first, 3)
+        self.assertEqual(self.order_book.asks.best, second)
+        self.assertEqual(len(self.order_book.asks), 1)
+        self.assertTrue(self.order_book.remove(second))
+        self.assertFalse(self.order_book.remove(second))
+        self.assertIsNone(self.order_book.asks.best)
+        self.assertEqual(self.order_book.asks.levels, {})
+        with self.assertRaises(IndexError):
+            self.order_book.asks[0]
+
+    def test_order_book_quote_aggregates_best_level(self):
+        self.assertEqual(self.order_book.quote(), {'ticker': 'AAPL', 'bid_qty': 0, 'bid_p': 0, 'ask_qty': 0, 'ask_p': 0})
+        first = LimitOrder("AAPL", 150.0, 1, "Creator1", OrderSide.BUY)
+        second = LimitOrder("AAPL", 150.0, 2, "Creator2", OrderSide.BUY)
+        ask = LimitOrder("AAPL", 152.0, 5, "Creator3", OrderSide.SELL)
+        for order in [first, second, ask]:
+            self.order_book.add(order)
+        self.assertEqual(self.order_book.quote(), {'ticker': 'AAPL', 'bid_qty': 3, 'bid_p': 150.0, 'ask_qty': 5, 'ask_p': 152.0})
+
+        top_seq = self.order_book.bids.top_seq
+        self.order_book.add(LimitOrder("AAPL", 149.0, 4, "Creator4", OrderSide.BUY))
+        self.assertEqual(self.order_book.bids.top_seq, top_seq)
+        self.order_book.fill(first, 1)
+        self.assertEqual(self.order_book.quote()['bid_qty'], 2)
+        self.order_book.remove(second)
+        self.assertEqual(self.order_book.quote()['bid_p'], 149.0)
+        self.assertEqual(self.order_book.quote()['bid_qty'], 4)
+        self.order_book.bids.clear()
+        self.assertEqual(self.order_book.quote()['ask_p'], 0)
+
+    def test_order_book_depth(self):
+        seq = self.order_book.seq
+        for price, qty in [(150.0, 1), (150.0, 2), (149.0, 4), (148.0, 1)]:
+            self.order_book.add(LimitOrder("AAPL", price, qty, "Creator", OrderSide.BUY))
+        self.order_book.add(LimitOrder("AAPL", 151.0, 5, "Creator", OrderSide.SELL))
+        self.assertEqual(self.order_book.seq, seq + 5)
+        depth = self.order_book.depth(2)
+        self.assertEqual(depth['bids'], [{'price': 150.0, 'qty': 3, 'orders': 2}, {'price': 149.0, 'qty': 4, 'orders': 1}])
+        self.assertEqual(depth['asks'], [{'price': 151.0, 'qty': 5, 'orders': 1}])
+        self.assertEqual(depth['seq'], self.order_book.seq)
+        self.assertEqual(self.order_book.depth(2), depth)
+        # the caller's copy can be changed without changing the cached levels
+        depth['bids'][0]['qty'] = 0
+        depth['asks'].clear()
+        self.assertEqual(self.order_book.depth(2)['bids'][0]['qty'], 3)
+        self.assertEqual(len(self.order_book.depth(2)['asks']), 1)
+        self.order_book.bids = []
+        self.assertGreater(self.order_book.seq, depth['seq'])
+        self.assertEqual(self.order_book.depth(2)['bids'], [])
+
+
 if __name__ == '__main__':
     asyncio.run(unittest.main())
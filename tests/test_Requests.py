@@ -39,7 +39,7 @@ class RequestsStringTests(unittest.IsolatedAsyncioTestCase):
         topic = "test_topic"
         message = {"data": "test_data"}
         result = await self.requests.make_request(topic, message, None)
-        self.assertEqual(result, {"result": "success"})
+        self.assertEqual(result, '{"result": "success"}')
 
 class RequestsListTests(unittest.IsolatedAsyncioTestCase):
 
@@ -105,6 +105,84 @@ class RequestsDictTests(unittest.IsolatedAsyncioTestCase):
         self.assertIsInstance(result, dict)
         self.assertEqual(result, {'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5, 'timestamp': 6})
 
+class CountingRequester():
+    def __init__(self):
+        self.requests = []
+
+    async def request(self, msg):
+        self.requests.append(dict(msg))
+        return {'topic': msg['topic'], 'ticker': msg.get('ticker'), 'n': len(self.requests)}
+
+class RequestsCacheTests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.mock_requester = CountingRequester()
+        self.requests = Requests(self.mock_requester, cache=True, cache_size=2)
+
+    async def test_not_cached_without_sequence(self):
+        await self.requests.make_request('latest_trade', {'ticker': 'AAA'}, None)
+        await self.requests.make_request('latest_trade', {'ticker': 'AAA'}, None)
+        self.assertEqual(len(self.mock_requester.requests), 2)
+
+    async def test_keyed_on_arguments(self):
+        self.requests.observe('AAA', 1)
+        self.requests.observe('BBB', 1)
+        aaa = await self.requests.make_request('latest_trade', {'ticker': 'AAA'}, None)
+        bbb = await self.requests.make_request('latest_trade', {'ticker': 'BBB'}, None)
+        self.assertEqual(aaa['ticker'], 'AAA')
+        self.assertEqual(bbb['ticker'], 'BBB')
+        self.assertEqual(await self.requests.make_request('latest_trade', {'ticker': 'AAA'}, None), aaa)
+        self.assertEqual(len(self.mock_requester.requests), 2)
+
+    async def test_invalidated_by_sequence(self):
+        self.requests.observe('AAA', 1)
+        first = await self.requests.make_request('best_bid', {'ticker': 'AAA'}, None)
+        self.assertEqual(await self.requests.make_request('best_bid', {'ticker': 'AAA'}, None), first)
+        self.requests.observe('AAA', 2)
+        self.assertNotEqual(await self.requests.make_request('best_bid', {'ticker': 'AAA'}, None), first)
+
+    async def test_invalidated_by_own_write(self):
+        self.requests.observe('AAA', 1)
+        first = await self.requests.make_request('best_bid', {'ticker': 'AAA'}, None)
+        await self.requests.make_request('limit_buy', {'ticker': 'AAA', 'price': 1, 'qty': 1}, None)
+        await self.requests.make_request('limit_buy', {'ticker': 'AAA', 'price': 1, 'qty': 1}, None)
+        self.assertNotEqual(await self.requests.make_request('best_bid', {'ticker': 'AAA'}, None), first)
+        self.assertEqual(len(self.mock_requester.requests), 4)
+
+    async def test_invalidated_by_clock(self):
+        self.requests.tick(1)
+        message = {'ticker': 'AAA', 'interval': '1h', 'limit': 10}
+        first = await self.requests.make_request('candles', dict(message), None)
+        self.assertEqual(await self.requests.make_request('candles', dict(message), None), first)
+        self.requests.tick(2)
+        self.assertNotEqual(await self.requests.make_request('candles', dict(message), None), first)
+
+    async def test_clock_entry_invalidated_by_own_write(self):
+        self.requests.tick(1)
+        message = {'ticker': 'AAA'}
+        first = await self.requests.make_request('get_agents_positions', dict(message), None)
+        self.assertEqual(await self.requests.make_request('get_agents_positions', dict(message), None), first)
+        await self.requests.make_request('market_buy', {'ticker': 'AAA', 'qty': 1, 'buyer': 'a', 'fee': 0}, None)
+        self.assertNotEqual(await self.requests.make_request('get_agents_positions', dict(message), None), first)
+
+    async def test_lru_eviction(self):
+        for ticker in ('AAA', 'BBB', 'CCC'):
+            self.requests.observe(ticker, 1)
+        await self.requests.make_request('midprice', {'ticker': 'AAA'}, None)
+        await self.requests.make_request('midprice', {'ticker': 'BBB'}, None)
+        await self.requests.make_request('midprice', {'ticker': 'AAA'}, None)
+        await self.requests.make_request('midprice', {'ticker': 'CCC'}, None)
+        self.assertEqual(len(self.requests.cache.entries), 2)
+        await self.requests.make_request('midprice', {'ticker': 'AAA'}, None)
+        await self.requests.make_request('midprice', {'ticker': 'BBB'}, None)
+        self.assertEqual([msg['ticker'] for msg in self.mock_requester.requests], ['AAA', 'BBB', 'CCC', 'BBB'])
+
+    async def test_uncached_topic(self):
+        self.requests.observe('AAA', 1)
+        await self.requests.make_request('cash', {'agent': 'a'}, None)
+        await self.requests.make_request('cash', {'agent': 'a'}, None)
+        self.assertEqual(len(self.mock_requester.requests), 2)
+
 
 if __name__ == '__main__':
     asyncio.run(unittest.main())
\ No newline at end of file
@@ -0,0 +1,35 @@
+import unittest
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from source.exchange.types.TickScale import TickScale, to_cash_units, from_cash_units
+
+class TickScaleTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        scale = TickScale(0.01)
+        self.assertEqual(scale.to_ticks(148.505), 14850)
+        self.assertEqual(scale.to_price(14851), 148.51)
+        self.assertEqual(TickScale(5).to_ticks(1012), 202)
+        self.assertEqual(TickScale(5).to_price(202), 1010)
+
+    def test_cash_units(self):
+        scale = TickScale(0.01)
+        self.assertEqual(scale.cash_units(15150, 2), to_cash_units(303))
+        self.assertEqual(from_cash_units(scale.cash_units(14851, 3)), 445.53)
+        self.assertEqual(TickScale(1e-8).cash_units(12345, 0.5), 6172)
+
+    def test_valid_qty(self):
+        self.assertTrue(TickScale(0.01, 10).valid_qty(30))
+        self.assertFalse(TickScale(0.01, 10).valid_qty(35))
+        self.assertTrue(TickScale(1e-8, 1e-8).valid_qty(0.12345678))
+
+    def test_rejects_bad_settings(self):
+        with self.assertRaises(ValueError):
+            TickScale(0)
+        with self.assertRaises(ValueError):
+            TickScale(1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import os
+import tempfile
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+import unittest
+from source.exchange.TopicDispatcher import LatencyHistogram
+from source.exchange.ExchangeRequests import ExchangeRequests as Requests
+from .MockRequester import MockRequester
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.percentile(50), 0.0)
+        self.assertEqual(histogram.to_dict()['count'], 0)
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for _ in range(98):
+            histogram.record(0.0001)
+        histogram.record(0.01)
+        histogram.record(0.02)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.max, 0.02)
+        self.assertAlmostEqual(histogram.percentile(50), 0.0001, delta=0.00002)
+        self.assertAlmostEqual(histogram.percentile(99), 0.01, delta=0.002)
+        self.assertEqual(histogram.percentile(100), 0.02)
+        self.assertAlmostEqual(histogram.to_dict()['max_ms'], 20)
+
+class TopicDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.mock_requester = MockRequester()
+        await self.mock_requester.init()
+        self.requests = Requests(self.mock_requester)
+        self.dispatcher = self.mock_requester.responder.dispatcher
+
+    async def test_unknown_topic(self):
+        response = await self.mock_requester.request({'topic': 'no_such_topic'})
+        self.assertEqual(response, {'error': 'unknown topic no_such_topic'})
+        self.assertNotIn('no_such_topic', self.dispatcher.histograms)
+
+    async def test_stats(self):
+        await self.requests.get_best_bid('AAPL')
+        await self.requests.get_best_bid('AAPL')
+        await self.requests.get_midprice('AAPL')
+        stats = await self.requests.get_stats()
+        self.assertEqual(stats['best_bid']['count'], 2)
+        self.assertEqual(stats['midprice']['count'], 1)
+        self.assertNotIn('limit_buy', stats)
+        self.assertGreaterEqual(stats['best_bid']['max_ms'], stats['best_bid']['p50_ms'])
+
+    async def test_register(self):
+        async def echo(msg):
+            return msg['value']
+        self.dispatcher.register('echo', echo, str)
+        response = await self.mock_requester.request({'topic': 'echo', 'value': 5})
+        self.assertEqual(response, '5')
+        self.assertEqual(self.dispatcher.histograms['echo'].count, 1)
+        self.assertEqual(self.dispatcher.table().row_count, 1)
+    async def test_snapshot_by_name(self):
+        exchange = self.mock_requester.responder.exchange
+        exchange.snapshot_dir = tempfile.mkdtemp()
+        result = await self.requests.snapshot('daily')
+        self.assertEqual(result['snapshot'], 'daily')
+        self.assertTrue(os.path.exists(os.path.join(exchange.snapshot_dir, 'daily')))
+        await self.requests.cancel_order('init_seed_AAPL_ask')
+        self.assertEqual((await self.requests.restore('daily'))['restored'], 'daily')
+        self.assertIn('init_seed_AAPL_ask', exchange.order_index)
+
+    async def test_snapshot_rejects_paths(self):
+        exchange = self.mock_requester.responder.exchange
+        exchange.snapshot_dir = tempfile.mkdtemp()
+        for name in ['../daily', 'a/b', '..', '.hidden', '', os.path.join(tempfile.gettempdir(), 'daily')]:
+            response = await self.mock_requester.request({'topic': 'snapshot', 'name': name})
+            self.assertIn('error', response)
+            response = await self.mock_requester.request({'topic': 'restore', 'name': name})
+            self.assertIn('error', response)
+        self.assertEqual(os.listdir(exchange.snapshot_dir), [])
+
+    async def test_order_ids_are_assigned_by_the_exchange(self):
+        exchange = self.mock_requester.responder.exchange
+        agent = self.mock_requester.responder.agent
+        order = await self.mock_requester.request({'topic': 'limit_sell', 'ticker': 'AAPL', 'price': 160, 'qty': 1, 'creator': agent, 'fee': 0, 'order_id': 'init_seed_AAPL_ask'})
+        self.assertNotEqual(order['id'], 'init_seed_AAPL_ask')
+        batch = await self.mock_requester.request({'topic': 'batch', 'actions': [{'topic': 'limit_buy', 'ticker': 'AAPL', 'price': 140, 'qty': 1, 'creator': agent, 'order_id': 'X'}] * 2})
+        self.assertEqual(len({result['id'] for result in batch}), 2)
+        self.assertNotIn('X', exchange.order_index)
+        self.assertEqual(await self.requests.cancel_order('init_seed_AAPL_ask'), {'cancelled_order': 'init_seed_AAPL_ask'})
+
+    async def test_register_agent_does_not_replace_an_account(self):
+        agent = self.mock_requester.responder.agent
+        response = await self.mock_requester.request({'topic': 'register_agent', 'name': 'x', 'initial_cash': 1, 'registered_name': agent})
+        self.assertIn('error', response)
+        self.assertNotEqual((await self.requests.get_cash(agent))['cash'], 1)
+
+if __name__ == '__main__':
+    asyncio.run(unittest.main())
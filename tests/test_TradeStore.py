@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+from source.exchange.TradeStore import TradeStore
+from source.exchange.types.TradeLog import TradeLog
+
+class TradeStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'trades.db')
+        self.store = TradeStore(self.path, batch_size=3)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_group_commit(self):
+        self.store.append('AAPL', 0, datetime(2023, 1, 1), 100, 1, 'Buyer', 'Seller')
+        self.store.append('AAPL', 1, datetime(2023, 1, 1), 101, 1, 'Buyer', 'Seller')
+        self.assertEqual(len(self.store.pending), 2)
+        self.store.append('AAPL', 2, datetime(2023, 1, 1), 102, 1, 'Buyer', 'Seller')
+        self.assertEqual(len(self.store.pending), 0)
+
+    def test_tail_and_between(self):
+        for i in range(10):
+            self.store.append('AAPL', i, datetime(2023, 1, 1) + timedelta(minutes=i), 100 + i, 1, 'Buyer', 'Seller')
+        self.assertEqual([t['price'] for t in self.store.tail('AAPL', 3)], [107, 108, 109])
+        self.assertEqual([t['price'] for t in self.store.tail('AAPL', 2, before_seq=5)], [103, 104])
+        trades = self.store.between('AAPL', datetime(2023, 1, 1, 0, 2), datetime(2023, 1, 1, 0, 4))
+        self.assertEqual([t['price'] for t in trades], [102, 103])
+        self.assertEqual(trades[0]['dt'], datetime(2023, 1, 1, 0, 2))
+        self.assertEqual(self.store.count('AAPL'), 10)
+
+    def test_reopen(self):
+        self.store.append('AAPL', 0, datetime(2023, 1, 1), 100, 1, 'Buyer', 'Seller')
+        self.store.close()
+        self.store = TradeStore(self.path)
+        self.assertEqual(self.store.count('AAPL'), 1)
+
+class TradeLogHotWindowTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = TradeStore(os.path.join(self.tmp.name, 'trades.db'))
+        self.log = TradeLog(self.store, hot_window=4)
+        for i in range(20):
+            self.log.record('AAPL', 1, 100 + i, 'Buyer', 'Seller', datetime(2023, 1, 1) + timedelta(minutes=i))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_memory_is_bounded(self):
+        tape = self.log.get('AAPL')
+        self.assertLessEqual(len(tape), 5)
+        self.assertEqual(tape.next_seq, 20)
+        self.assertEqual(tape.latest()['price'], 119)
+
+    def test_tail_pages_from_store(self):
+        self.assertEqual([t['price'] for t in self.log.tail('AAPL', 10)], list(range(110, 120)))
+
+    def test_between_pages_from_store(self):
+        trades = self.log.between('AAPL', datetime(2023, 1, 1), datetime(2023, 1, 1, 0, 3))
+        self.assertEqual([t['price'] for t in trades], [100, 101, 102])
+        self.assertEqual(len(list(self.log.rows('AAPL'))), 20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from datetime import datetime
+import sys
+import os
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+from source.exchange.types.Trade import Trade
+from source.exchange.types.TradeTape import TradeTape
+from source.exchange.types.TradeLog import TradeLog
+
+class TradeTapeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tape = TradeTape('AAPL')
+        for i in range(5):
+            self.tape.append(datetime(2023, 1, 1, 0, i), 100 + i, 1, 'Buyer', 'Seller')
+
+    def test_latest(self):
+        self.assertEqual(self.tape.latest(), {'dt': datetime(2023, 1, 1, 0, 4), 'ticker': 'AAPL', 'qty': 1, 'price': 104, 'buyer': 'Buyer', 'seller': 'Seller', 'fee': 0})
+
+    def test_latest_empty(self):
+        self.assertIsNone(TradeTape('AAPL').latest())
+
+    def test_tail(self):
+        self.assertEqual([t['price'] for t in self.tape.tail(3)], [102, 103, 104])
+        self.assertEqual(len(self.tape.tail(20)), 5)
+
+    def test_row_matches_trade(self):
+        trade = Trade('AAPL', 1, 100, 'Buyer', 'Seller', datetime(2023, 1, 1, 0, 0))
+        self.assertEqual(self.tape.row(0), trade.to_dict())
+
+class TradeLogTests(unittest.TestCase):
+
+    def test_record_per_ticker(self):
+        log = TradeLog()
+        log.record('AAPL', 1, 100, 'Buyer', 'Seller')
+        log.append(Trade('MSFT', 2, 200, 'Buyer', 'Seller'))
+        self.assertEqual(len(log), 2)
+        self.assertEqual(log.get('MSFT').latest()['price'], 200)
+        self.assertIsNone(log.get('TSLA'))
+        log.clear()
+        self.assertEqual(len(log), 0)
+
+    def test_between_without_store(self):
+        log = TradeLog()
+        # a tape whose older trades were trimmed, e.g. restored from a snapshot into an exchange without a TradeStore
+        log.tapes['AAPL'] = TradeTape('AAPL', offset=3)
+        log.record('AAPL', 1, 100, 'Buyer', 'Seller', datetime(2023, 1, 1, 0, 5))
+        log.record('AAPL', 1, 101, 'Buyer', 'Seller', datetime(2023, 1, 1, 0, 6))
+        self.assertEqual([t['price'] for t in log.between('AAPL', datetime(2023, 1, 1), datetime(2023, 1, 1, 0, 6))], [100])
+        self.assertEqual([t['price'] for t in log.between('AAPL')], [100, 101])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ import sys
 import os
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
-from source.utils._utils import dumps, get_pandas_time, get_timedelta, get_datetime_range, get_random_string, format_dataframe_rows_to_dict
+from source.utils._utils import dumps, get_pandas_time, get_timedelta, get_interval_timedelta, get_datetime_range, get_random_string, format_dataframe_rows_to_dict
 
 class TestUtilsTest(unittest.TestCase):
     def test_dumps(self):
@@ -12,6 +12,14 @@ class TestUtilsTest(unittest.TestCase):
         expected_output = '{\n    "key": "value"\n}'
         self.assertEqual(dumps(data), expected_output)
 
+    def test_get_interval_timedelta(self):
+        self.assertEqual(get_interval_timedelta('1Min'), timedelta(minutes=1))
+        self.assertEqual(get_interval_timedelta('15Min'), timedelta(minutes=15))
+        self.assertEqual(get_interval_timedelta('1H'), timedelta(hours=1))
+        self.assertEqual(get_interval_timedelta('1D'), timedelta(days=1))
+        with self.assertRaises(ValueError):
+            get_interval_timedelta('1Fortnight')
+
     def test_get_pandas_time(self):
         self.assertEqual(get_pandas_time('second'), '1s')
         self.assertEqual(get_pandas_time('minute'), '1Min')